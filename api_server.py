@@ -0,0 +1,31 @@
+import sys
+import logging
+from pathlib import Path
+
+CODE_DIR = Path(__file__).parent / "code"
+sys.path.append(str(CODE_DIR))
+
+import uvicorn
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+def main():
+    config = Config()
+    logging.basicConfig(level=logging.INFO)
+    if config.api_workers > 1 and config.job_backend != "redis":
+        # Each worker would keep its own in-memory jobs, so polling a job ID would often return 404
+        logger.error(f"API_WORKERS={config.api_workers} requires JOB_BACKEND=redis, so all workers share job records")
+        sys.exit(1)
+
+    # Workers are separate processes, so the app is passed as an import string
+    uvicorn.run(
+        "api.server:app",
+        app_dir=str(CODE_DIR),
+        host=config.api_host,
+        port=config.api_port,
+        workers=config.api_workers
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark FormRecord against plain nested dicts for the operations done per document.
+
+Run from the repository root:
+    python benchmarks/bench_form_record.py
+"""
+import json
+import pickle
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+
+from utils.form_record import FormRecord, orjson, msgpack
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+def flatten_dict(data, parent_key=""):
+    """The recursive flatten used for plain dicts"""
+    items = []
+    for key, value in data.items():
+        new_key = f"{parent_key}.{key}" if parent_key else key
+        if isinstance(value, dict):
+            items.extend(flatten_dict(value, new_key).items())
+        else:
+            items.append((new_key, value))
+    return dict(items)
+
+def time_call(func, number: int = 20000) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+def main():
+    with open(TEMPLATES_DIR / "283_extra1_gt.json", "r", encoding="utf-8") as f:
+        data = json.load(f)
+    record = FormRecord.from_dict(data)
+
+    print(f"orjson: {'yes' if orjson else 'no'}, msgpack: {'yes' if msgpack else 'no'}")
+    print(f"{'operation':<28}{'dict us':>10}{'record us':>12}")
+    rows = [
+        ("flatten", lambda: flatten_dict(data), record.flatten),
+        ("pretty JSON (per rerun)", lambda: json.dumps(data, ensure_ascii=False, indent=2), record.to_json),
+        ("pickle size (bytes)", None, None),
+    ]
+    for name, dict_call, record_call in rows:
+        if dict_call is None:
+            print(f"{name:<28}{len(pickle.dumps(data)):>10}{len(pickle.dumps(record)):>12}")
+            continue
+        print(f"{name:<28}{time_call(dict_call):>10.2f}{time_call(record_call):>12.2f}")
+
+    if msgpack is not None:
+        print(f"{'msgpack size (bytes)':<28}{len(msgpack.packb(data)):>10}{len(record.to_msgpack()):>12}")
+
+if __name__ == "__main__":
+    main()
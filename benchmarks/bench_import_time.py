@@ -0,0 +1,68 @@
+"""Benchmark cold-start import time of the Streamlit app, the HTTP API and the job workers.
+
+Imports each entry module in a fresh interpreter with `python -X importtime` and reports
+the total time and the slowest top-level packages, so heavy SDKs that creep back into
+module-level imports show up. Run from the repository root:
+    python benchmarks/bench_import_time.py [runs]
+"""
+import sys
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+CODE_DIR = Path(__file__).parent.parent / "code"
+
+ENTRY_MODULES = {
+    "streamlit app": "ui.streamlit_app",
+    "http api": "api.server",
+    "job worker": "services.document_processing_service",
+}
+
+# Packages that should only be imported on first use, not by any entry module
+LAZY_PACKAGES = ("openai", "azure", "tiktoken", "pyarrow")
+
+def profile_import(module_name: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every module imported by module_name"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=CODE_DIR, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+def top_level_packages(cumulative: Dict[str, int]) -> List[Tuple[str, int]]:
+    packages = {name: us for name, us in cumulative.items() if "." not in name}
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for label, module_name in ENTRY_MODULES.items():
+        # Best of several runs, as the first one also pays for cold disk caches
+        profiles = []
+        for _ in range(runs):
+            try:
+                profiles.append(profile_import(module_name))
+            except RuntimeError as e:
+                print(f"{label}: import failed ({e})")
+                break
+        if not profiles:
+            continue
+        best = min(profiles, key=lambda profile: profile.get(module_name, 0))
+
+        print(f"{label} ({module_name}): {best.get(module_name, 0) / 1000:.0f} ms")
+        for name, us in top_level_packages(best)[:5]:
+            print(f"    {name:<30} {us / 1000:8.1f} ms")
+        eager = sorted(name for name in best if name.split(".")[0] in LAZY_PACKAGES and "." not in name)
+        if eager:
+            print(f"    imported eagerly: {', '.join(eager)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark language detection on synthetic multi-page OCR output.
+
+Run from the repository root:
+    python benchmarks/bench_language_detection.py
+"""
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+
+from utils.language_detector import LanguageDetector
+
+HEBREW_LABELS = (
+    "שם משפחה", "שם פרטי", "מספר זהות", "תאריך לידה", "כתובת", "רחוב", "מספר בית",
+    "כניסה", "דירה", "ישוב", "מיקוד", "טלפון קווי", "טלפון נייד", "סוג העבודה",
+    "תאריך הפגיעה", "שעת הפגיעה", "מקום התאונה", "תיאור התאונה", "האיבר שנפגע", "חתימה"
+)
+ENGLISH_VALUES = (
+    "Samira", "Daniel", "Herzel 7", "Rehovot", "Gym",
+    "I got into a minor car accident on my way to the gym", "Right arm"
+)
+HEBREW_VALUES = ("טננהוים", "יהודה", "הורדים 8", "תל אביב", "מלצרות", "יד שמאל")
+
+def build_page(values) -> str:
+    key_values = [f"{label}: {values[i % len(values)]}" for i, label in enumerate(HEBREW_LABELS)]
+    raw_lines = []
+    for i, label in enumerate(HEBREW_LABELS):
+        raw_lines.append(label)
+        raw_lines.append(":selected: זכר :unselected: נקבה" if i % 5 == 0 else values[i % len(values)])
+    return "--- Key-Value Pairs: ---\n" + "\n".join(key_values) + "\n\n--- Raw Lines: ---\n" + "\n".join(raw_lines)
+
+def legacy_detect_language(ocr_text: str) -> str:
+    """The original regex-based detector, kept here as the baseline"""
+    ignore_words = {'Key', 'Value', 'Pairs', 'unselected', 'selected', 'Raw', 'Lines'}
+    english_words = re.findall(r'\b[a-zA-Z]{2,}\b', ocr_text)
+    meaningful_words = [word for word in english_words if word not in ignore_words and len(word) >= 2]
+    hebrew_chars = len(re.findall(r'[\u0590-\u05FF]', ocr_text))
+    if len(meaningful_words) > 0:
+        return "en"
+    elif hebrew_chars > 0:
+        return "he"
+    return "en"
+
+def time_call(func, text: str, number: int) -> float:
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number
+
+def main():
+    detector = LanguageDetector()
+    full_scan_detector = LanguageDetector(early_exit_letters=None)
+
+    print(f"{'document':<10}{'pages':>7}{'chars':>11}{'legacy ms':>12}{'full ms':>10}{'early ms':>10}  result")
+    for name, values in (("english", ENGLISH_VALUES), ("hebrew", HEBREW_VALUES)):
+        page = build_page(values)
+        for pages in (1, 10, 100, 1000):
+            text = "\n".join([page] * pages)
+            number = max(1, 200 // pages)
+
+            legacy = time_call(legacy_detect_language, text, number)
+            full = time_call(full_scan_detector.detect, text, number)
+            early = time_call(detector.detect, text, number)
+            language, confidence = detector.detect(text)
+
+            print(f"{name:<10}{pages:>7}{len(text):>11,}{legacy * 1000:>12.3f}{full * 1000:>10.3f}{early * 1000:>10.3f}"
+                  f"  {language} ({confidence:.2f}), legacy {legacy_detect_language(text)}")
+
+if __name__ == "__main__":
+    main()
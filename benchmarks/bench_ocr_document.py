@@ -0,0 +1,114 @@
+"""Benchmark memory held per document by the SDK AnalyzeResult versus the compact OcrDocument.
+
+Builds a synthetic multi-page layout result shaped like a scanned form 283 and measures
+the memory allocated to keep each representation alive. Run from the repository root:
+    python benchmarks/bench_ocr_document.py [pages]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+
+from azure.ai.documentintelligence.models import AnalyzeResult
+from utils.ocr_document import OcrDocument
+
+LINES_PER_PAGE = 120
+WORDS_PER_LINE = 6
+MARKS_PER_PAGE = 20
+
+def polygon(x: float, y: float, width: float, height: float):
+    return [x, y, x + width, y, x + width, y + height, x, y + height]
+
+def build_payload(pages: int) -> dict:
+    content_parts, page_payloads, paragraphs, key_value_pairs = [], [], [], []
+    offset = 0
+    for page_number in range(1, pages + 1):
+        lines, words, marks = [], [], []
+        for line_index in range(LINES_PER_PAGE):
+            y = 0.5 + line_index * 0.08
+            line_words = [f"מילה{line_index}_{word_index}" for word_index in range(WORDS_PER_LINE)]
+            line_text = " ".join(line_words)
+            word_offset = offset
+            for word_index, word in enumerate(line_words):
+                words.append({
+                    "content": word,
+                    "polygon": polygon(0.5 + word_index * 1.1, y, 1.0, 0.07),
+                    "span": {"offset": word_offset, "length": len(word)},
+                    "confidence": 0.95
+                })
+                word_offset += len(word) + 1
+            lines.append({
+                "content": line_text,
+                "polygon": polygon(0.5, y, 7.0, 0.07),
+                "spans": [{"offset": offset, "length": len(line_text)}]
+            })
+            paragraphs.append({
+                "content": line_text,
+                "boundingRegions": [{"pageNumber": page_number, "polygon": polygon(0.5, y, 7.0, 0.07)}],
+                "spans": [{"offset": offset, "length": len(line_text)}]
+            })
+            content_parts.append(line_text)
+            offset += len(line_text) + 1
+        for mark_index in range(MARKS_PER_PAGE):
+            marks.append({
+                "state": "selected" if mark_index % 4 == 0 else "unselected",
+                "polygon": polygon(7.8, 0.5 + mark_index * 0.4, 0.1, 0.1),
+                "span": {"offset": 0, "length": 1},
+                "confidence": 0.9
+            })
+        for kv_index in range(25):
+            key_value_pairs.append({
+                "key": {
+                    "content": f"שדה {kv_index}",
+                    "boundingRegions": [{"pageNumber": page_number, "polygon": polygon(5.0, 0.5 + kv_index * 0.3, 1.0, 0.07)}],
+                    "spans": [{"offset": 0, "length": 4}]
+                },
+                "value": {
+                    "content": f"ערך {kv_index}",
+                    "boundingRegions": [{"pageNumber": page_number, "polygon": polygon(3.0, 0.5 + kv_index * 0.3, 1.0, 0.07)}],
+                    "spans": [{"offset": 0, "length": 4}]
+                },
+                "confidence": 0.8
+            })
+        page_payloads.append({
+            "pageNumber": page_number, "width": 8.27, "height": 11.69, "unit": "inch",
+            "spans": [{"offset": 0, "length": offset}],
+            "words": words, "lines": lines, "selectionMarks": marks
+        })
+    return {
+        "apiVersion": "2024-11-30", "modelId": "prebuilt-layout", "content": "\n".join(content_parts),
+        "pages": page_payloads, "paragraphs": paragraphs, "keyValuePairs": key_value_pairs
+    }
+
+def allocated_by(factory):
+    """Bytes still allocated after building an object, and the object itself"""
+    gc.collect()
+    tracemalloc.start()
+    obj = factory()
+    # Touch every page, as the pipeline does, so lazily built SDK models are materialized
+    if isinstance(obj, AnalyzeResult):
+        for page in obj.pages:
+            _ = page.lines, page.words, page.selection_marks
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, obj
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    result_bytes, result = allocated_by(lambda: AnalyzeResult(build_payload(pages)))
+    start = time.perf_counter()
+    document = OcrDocument.from_analyze_result(result)
+    convert_ms = (time.perf_counter() - start) * 1000
+    del result, document
+    document_bytes, document = allocated_by(lambda: OcrDocument.from_analyze_result(AnalyzeResult(build_payload(pages))))
+
+    print(f"pages: {pages}, lines: {len(document.lines)}, selection marks: {len(document.selection_marks)}")
+    print(f"AnalyzeResult: {result_bytes / 1024:10.1f} KiB")
+    print(f"OcrDocument:   {document_bytes / 1024:10.1f} KiB ({result_bytes / max(document_bytes, 1):.1f}x smaller)")
+    print(f"conversion:    {convert_ms:10.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "code"))
+
+from services.document_intelligence_service import DocumentIntelligenceService
+from utils.config import Config
+from utils.zonal_extractor import LAYOUT_PATH, build_layout, save_layout
+
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR the blank form 283 once and save its field layout for zonal extraction")
+    parser.add_argument("--pdf", default=str(Path(__file__).parent / "phase1_data" / "283_raw.pdf"), help="Blank form to calibrate on")
+    parser.add_argument("--output", default=str(LAYOUT_PATH), help="Layout JSON to write")
+    parser.add_argument("--zone-height", type=float, default=3.0, help="Height of each value zone, in label heights")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    config = Config()
+    if not config.is_azure_document_intelligence_configured():
+        sys.exit("Azure Document Intelligence is not configured")
+
+    ocr_service = DocumentIntelligenceService(
+        config.azure_document_intelligence_endpoint,
+        config.azure_document_intelligence_key
+    )
+    layout = build_layout(ocr_service.analyze_to_ocr_document(args.pdf), zone_height_ratio=args.zone_height)
+    save_layout(layout, Path(args.output))
+
+    anchors = sum(1 for field in layout["fields"].values() if field["anchor"])
+    logger.info(f"Saved {len(layout['fields'])} field zones ({anchors} anchors) to {args.output}")
+
+if __name__ == "__main__":
+    main()
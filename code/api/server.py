@@ -0,0 +1,195 @@
+import os
+import logging
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from jobs import JobManager
+from services.document_processing_service import DocumentProcessingService
+from services.validation_service import ValidationService
+from utils.circuit_breaker import CircuitOpenError, get_circuit_breaker_report
+from utils.config import Config
+from utils.file_validator import FileCheck
+from utils.prewarm import prewarm
+
+logger = logging.getLogger(__name__)
+
+class ValidationRequest(BaseModel):
+    expected: Dict[str, Any]
+    extracted: Dict[str, Any]
+    include_llm_evaluation: bool = False
+    language: str = "en"
+    document_hash: Optional[str] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One set of service objects per worker process, shared by all requests
+    config = Config()
+    processing_service = DocumentProcessingService(config)
+    app.state.config = config
+    app.state.processing_service = processing_service
+    app.state.validation_service = (
+        ValidationService(processing_service.openai_service)
+        if processing_service.openai_service else None
+    )
+    app.state.job_manager = JobManager(config)
+    if config.prewarm:
+        # Finish cold start before the worker reports ready, so its first request is not the slow one
+        await run_in_threadpool(prewarm, processing_service)
+    yield
+    app.state.job_manager.shutdown(wait=False)
+
+app = FastAPI(title="Document Processing System API", lifespan=lifespan)
+
+@app.get("/health")
+async def health():
+    config = app.state.config
+    return {
+        "status": "ok",
+        "document_intelligence_configured": config.is_azure_document_intelligence_configured(),
+        "openai_configured": config.is_azure_openai_configured(),
+        "circuits": {name: report["state"] for name, report in get_circuit_breaker_report().items()}
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """LLM token usage, prompt cache hit ratio per deployment, cascade tier stats and circuit breakers, for this worker process"""
+    openai_service = app.state.processing_service.openai_service
+    if openai_service is None:
+        raise HTTPException(status_code=503, detail="Azure OpenAI is not configured")
+    report = openai_service.get_usage_report()
+    report["circuit_breakers"] = get_circuit_breaker_report()
+    return report
+
+async def _check_upload(file: UploadFile) -> FileCheck:
+    """Reject a bad upload from its bytes, before it is written to disk or sent to OCR.
+
+    The accepted file's hash is taken in the same read, so the pipeline does not read it again.
+    """
+    check = await run_in_threadpool(
+        app.state.processing_service.file_validator.check_stream, file.file, file.filename or "", file.size, True
+    )
+    if not check.ok:
+        raise HTTPException(status_code=400, detail={
+            "reason": check.reason.value,
+            "message": app.state.processing_service.file_validator.get_message(check),
+            "content_type": check.content_type,
+            "page_count": check.page_count,
+            "width": check.width,
+            "height": check.height
+        })
+    await file.seek(0)
+    return check
+
+@app.post("/extract")
+async def extract(file: UploadFile = File(...)):
+    processing_service = app.state.processing_service
+    if not processing_service.is_configured():
+        raise HTTPException(status_code=503, detail="Azure services are not configured")
+    file_check = await _check_upload(file)
+
+    # The validator checks the extension, so keep the original suffix on the temp file
+    suffix = Path(file.filename or "").suffix.lower()
+    fd, temp_file_path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := await file.read(1024 * 1024):
+                f.write(chunk)
+
+        result = await run_in_threadpool(processing_service.process_document, temp_file_path, None, file.filename,
+                                    file_check)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CircuitOpenError as e:
+        # Fail fast while a dependency is down; the client can resubmit or use /jobs, which waits for it
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
+    except Exception as e:
+        logger.error(f"Error processing {file.filename}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
+    finally:
+        os.unlink(temp_file_path)
+
+    if result.extracted_data is None:
+        raise HTTPException(status_code=502, detail="Failed to extract fields from document")
+
+    return asdict(result)
+
+@app.post("/validate")
+async def validate(request: ValidationRequest):
+    validation_service = app.state.validation_service
+    if validation_service is None:
+        raise HTTPException(status_code=503, detail="Azure OpenAI is not configured")
+
+    is_valid, error_message = validation_service.validate_structure(request.expected)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=f"Structure validation failed: {error_message}")
+
+    metrics = validation_service.calculate_metrics(request.expected, request.extracted)
+    response = {"metrics": asdict(metrics)}
+
+    result_store = app.state.processing_service.result_store
+    if request.document_hash and result_store is not None:
+        await run_in_threadpool(result_store.update_metrics, request.document_hash, response["metrics"])
+
+    if request.include_llm_evaluation:
+        response["llm_evaluation"] = await run_in_threadpool(
+            validation_service.get_llm_evaluation,
+            request.expected,
+            request.extracted,
+            metrics,
+            request.language
+        )
+
+    return response
+
+@app.post("/jobs", status_code=202)
+async def submit_job(file: UploadFile = File(...)):
+    if not app.state.processing_service.is_configured():
+        raise HTTPException(status_code=503, detail="Azure services are not configured")
+    file_check = await _check_upload(file)
+
+    content = await file.read()
+    job_id = await run_in_threadpool(app.state.job_manager.submit, content, file.filename or "document", file_check)
+    return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = app.state.job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    response = job.to_dict()
+    response.pop("file_path")
+    response.pop("file_check")
+    response["elapsed"] = job.elapsed
+    return response
+
+def _get_result_store():
+    result_store = app.state.processing_service.result_store
+    if result_store is None:
+        raise HTTPException(status_code=503, detail="Result store is disabled")
+    return result_store
+
+@app.get("/results")
+async def find_results(id_number: Optional[str] = None, date_from: Optional[str] = None,
+                       date_to: Optional[str] = None, limit: int = 100):
+    """Look up stored results by ID number or by date of injury range (YYYY-MM-DD)"""
+    result_store = _get_result_store()
+    if id_number:
+        results = await run_in_threadpool(result_store.find_by_id_number, id_number, limit)
+    elif date_from:
+        results = await run_in_threadpool(result_store.find_by_date_of_injury, date_from, date_to, limit)
+    else:
+        raise HTTPException(status_code=400, detail="Provide id_number or date_from")
+    return [asdict(result) for result in results]
+
+@app.get("/results/{document_hash}")
+async def get_result(document_hash: str):
+    result = await run_in_threadpool(_get_result_store().get_by_hash, document_hash)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Result not found")
+    return asdict(result)
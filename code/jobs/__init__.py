@@ -0,0 +1,4 @@
+from .models import Job, JobStatus
+from .backends import JobBackend, InMemoryJobBackend, RedisJobBackend, create_job_backend
+from .manager import JobManager
+from .watcher import FolderWatcher
@@ -0,0 +1,217 @@
+import json
+import heapq
+import queue
+import threading
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+class JobBackend(ABC):
+    """Queue of pending job IDs, jobs deferred until a due time, plus a store of job records"""
+
+    @abstractmethod
+    def enqueue(self, job_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def dequeue(self, timeout: float = 1.0) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def defer(self, job_id: str, due_at: float) -> None:
+        """Hold a job back until due_at (epoch seconds), when requeue_due puts it back in the queue"""
+
+    @abstractmethod
+    def requeue_due(self, now: float) -> List[str]:
+        """Move deferred jobs that are due back to the queue, returning their IDs"""
+
+    @abstractmethod
+    def save_job(self, job: Job) -> None:
+        ...
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Job]:
+        ...
+
+    def update_job(self, job_id: str, **fields) -> Optional[Job]:
+        """Set some fields of a job and return it, or None if it does not exist.
+
+        This fallback rewrites the whole record and is not atomic; backends shared
+        between threads or processes override it.
+        """
+        job = self.get_job(job_id)
+        if job is None:
+            return None
+        for name, value in fields.items():
+            setattr(job, name, value)
+        self.save_job(job)
+        return job
+
+    def set_stage(self, job_id: str, stage: str) -> None:
+        """Record a job's progress stage, unless the job has already finished"""
+        job = self.get_job(job_id)
+        if job is not None and not job.is_finished:
+            self.update_job(job_id, stage=stage)
+
+class InMemoryJobBackend(JobBackend):
+    """In-process stand-in for a shared queue, for single-process deployments and development"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._jobs = {}
+        # (due time, job ID) heap
+        self._deferred = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, job_id: str) -> None:
+        self._queue.put(job_id)
+
+    def dequeue(self, timeout: float = 1.0) -> Optional[str]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def defer(self, job_id: str, due_at: float) -> None:
+        with self._lock:
+            heapq.heappush(self._deferred, (due_at, job_id))
+
+    def requeue_due(self, now: float) -> List[str]:
+        due = []
+        with self._lock:
+            while self._deferred and self._deferred[0][0] <= now:
+                due.append(heapq.heappop(self._deferred)[1])
+        for job_id in due:
+            self._queue.put(job_id)
+        return due
+
+    def save_job(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def update_job(self, job_id: str, **fields) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                for name, value in fields.items():
+                    setattr(job, name, value)
+            return job
+
+    def set_stage(self, job_id: str, stage: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.is_finished:
+                job.stage = stage
+
+class RedisJobBackend(JobBackend):
+    """Redis list as the queue, a sorted set of deferred jobs by due time and one hash per job, shared by every replica.
+
+    Deferred jobs survive a restart of the replica that deferred them, and any replica
+    can put them back in the queue once they are due.
+
+    Each job field is a JSON-encoded hash field, so an update writes only the fields it
+    changes: a late progress update can never put back the status of a job that has
+    finished meanwhile. Updates run as Lua scripts, which Redis executes atomically.
+    """
+
+    QUEUE_KEY = "document_jobs:queue"
+    DEFERRED_KEY = "document_jobs:deferred"
+    JOB_KEY_PREFIX = "document_jobs:record:"
+
+    # Sets fields (ARGV: name, value, ...) of an existing job and returns all its fields
+    UPDATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+redis.call('HSET', KEYS[1], unpack(ARGV))
+return redis.call('HGETALL', KEYS[1])
+"""
+    # Moves jobs due by ARGV[1] from the deferred set (KEYS[1]) to the queue (KEYS[2]), so that
+    # replicas polling at the same time never queue a job twice
+    REQUEUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+for _, job_id in ipairs(due) do
+    redis.call('ZREM', KEYS[1], job_id)
+    redis.call('LPUSH', KEYS[2], job_id)
+end
+return due
+"""
+    # Sets the stage (ARGV[1]) of a job that is still queued or running
+    STAGE_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if status == '"queued"' or status == '"running"' then
+    redis.call('HSET', KEYS[1], 'stage', ARGV[1])
+end
+return 0
+"""
+
+    def __init__(self, url: str, job_ttl_seconds: int = 24 * 60 * 60):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.job_ttl_seconds = job_ttl_seconds
+        self._update_script = self.client.register_script(self.UPDATE_SCRIPT)
+        self._requeue_script = self.client.register_script(self.REQUEUE_SCRIPT)
+        self._stage_script = self.client.register_script(self.STAGE_SCRIPT)
+
+    def enqueue(self, job_id: str) -> None:
+        self.client.lpush(self.QUEUE_KEY, job_id)
+
+    def dequeue(self, timeout: float = 1.0) -> Optional[str]:
+        item = self.client.brpop(self.QUEUE_KEY, timeout=max(1, int(timeout)))
+        return item[1].decode("utf-8") if item else None
+
+    def defer(self, job_id: str, due_at: float) -> None:
+        self.client.zadd(self.DEFERRED_KEY, {job_id: due_at})
+
+    def requeue_due(self, now: float) -> List[str]:
+        due = self._requeue_script(keys=[self.DEFERRED_KEY, self.QUEUE_KEY], args=[now])
+        return [job_id.decode("utf-8") for job_id in due]
+
+    def save_job(self, job: Job) -> None:
+        key = self.JOB_KEY_PREFIX + job.job_id
+        pipeline = self.client.pipeline()
+        pipeline.delete(key)
+        pipeline.hset(key, mapping=self._encode(job.to_dict()))
+        pipeline.expire(key, self.job_ttl_seconds)
+        pipeline.execute()
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        return self._decode(self.client.hgetall(self.JOB_KEY_PREFIX + job_id))
+
+    def update_job(self, job_id: str, **fields) -> Optional[Job]:
+        if "status" in fields:
+            fields["status"] = fields["status"].value
+        args = [item for pair in self._encode(fields).items() for item in pair]
+        raw = self._update_script(keys=[self.JOB_KEY_PREFIX + job_id], args=args)
+        if not raw:
+            return None
+        # HGETALL comes back from a script as a flat [name, value, ...] list
+        return self._decode(dict(zip(raw[::2], raw[1::2])))
+
+    def set_stage(self, job_id: str, stage: str) -> None:
+        self._stage_script(keys=[self.JOB_KEY_PREFIX + job_id], args=[json.dumps(stage, ensure_ascii=False)])
+
+    @staticmethod
+    def _encode(fields) -> dict:
+        return {name: json.dumps(value, ensure_ascii=False) for name, value in fields.items()}
+
+    @staticmethod
+    def _decode(raw) -> Optional[Job]:
+        if not raw:
+            return None
+        return Job.from_dict({name.decode("utf-8"): json.loads(value) for name, value in raw.items()})
+
+def create_job_backend(config) -> JobBackend:
+    if config.job_backend == "redis":
+        return RedisJobBackend(config.redis_url)
+    if config.job_backend != "memory":
+        logger.warning(f"Unknown job backend '{config.job_backend}', using in-memory backend")
+    return InMemoryJobBackend()
@@ -0,0 +1,216 @@
+import os
+import queue
+import time
+import uuid
+import logging
+import threading
+import multiprocessing
+from dataclasses import asdict
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any
+from .models import Job, JobStatus
+from .backends import JobBackend, create_job_backend
+from utils.circuit_breaker import CircuitOpenError
+from utils.file_validator import FileCheck
+from utils.llm_usage import get_usage_stats
+from utils.result_exporter import JsonlResultWriter, build_export_row
+
+logger = logging.getLogger(__name__)
+
+# Per-process pipeline and progress channel, created once by the pool initializer
+_worker_processing_service = None
+_worker_progress_queue = None
+
+def _init_worker(progress_queue):
+    global _worker_processing_service, _worker_progress_queue
+    from services.document_processing_service import DocumentProcessingService
+    from utils.config import Config
+
+    config = Config()
+    _worker_processing_service = DocumentProcessingService(config)
+    _worker_progress_queue = progress_queue
+    if config.prewarm:
+        from utils.prewarm import prewarm
+
+        prewarm(_worker_processing_service)
+
+def _run_job(job_id: str, file_path: str, file_name: str, file_check: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def report_stage(stage):
+        _worker_progress_queue.put((job_id, stage))
+
+    try:
+        result = _worker_processing_service.process_document(
+            file_path, report_stage, file_name, FileCheck(**file_check) if file_check else None
+        )
+    except CircuitOpenError:
+        # Picklable, and tells the parent to queue the job again later
+        raise
+    except Exception as e:
+        # SDK exceptions may hold unpicklable state, so only the message crosses the process boundary
+        raise RuntimeError(str(e)) from None
+    if result.extracted_data is None:
+        raise ValueError("Failed to extract fields from document")
+
+    # Hand the worker's LLM usage (including that of earlier failed jobs) to the parent process
+    payload = asdict(result)
+    payload["llm_usage"] = get_usage_stats().drain()
+    return payload
+
+class JobManager:
+    """Accepts documents, hands them to a worker pool and tracks their status by job ID"""
+
+    def __init__(self, config, backend: Optional[JobBackend] = None):
+        self.config = config
+        self.backend = backend or create_job_backend(config)
+        self.storage_dir = Path(config.job_storage_dir)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+        # Spawn rather than fork: the parent (Streamlit/uvicorn) runs its own threads
+        mp_context = multiprocessing.get_context("spawn")
+        self._progress_queue = mp_context.Queue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=config.job_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(self._progress_queue,)
+        )
+
+        # Only take as many jobs off the queue as there are free workers,
+        # so the rest stay in the (possibly shared) queue
+        self._slots = threading.BoundedSemaphore(config.job_workers)
+        self.export_writer = JsonlResultWriter(config.export_jsonl_path) if config.export_jsonl_path else None
+        self._stop_event = threading.Event()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="job-dispatcher", daemon=True)
+        self._dispatcher.start()
+        self._progress_listener = threading.Thread(target=self._progress_loop, name="job-progress", daemon=True)
+        self._progress_listener.start()
+
+    def submit(self, file_content: bytes, file_name: str, file_check: Optional[FileCheck] = None) -> str:
+        """Store the document and queue it for processing, returning the job ID immediately.
+
+        file_check is the submitter's hashed check of file_content; the worker then skips
+        validating and hashing the file again.
+        """
+        job_id = uuid.uuid4().hex
+        file_path = self.storage_dir / f"{job_id}{Path(file_name).suffix.lower()}"
+
+        with open(file_path, "wb") as f:
+            f.write(file_content)
+
+        self.backend.save_job(Job(
+            job_id=job_id,
+            file_name=file_name,
+            file_path=str(file_path),
+            # Only accepted checks are kept, whose reason is None, so the record stays plain JSON
+            file_check=asdict(file_check) if file_check is not None and file_check.ok else None
+        ))
+        self.backend.enqueue(job_id)
+        logger.info(f"Queued job {job_id} for {file_name}")
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        return self.backend.get_job(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stop_event.set()
+        self._dispatcher.join(timeout=5)
+        self._progress_listener.join(timeout=5)
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+        if self.export_writer is not None:
+            self.export_writer.close()
+
+    def _dispatch_loop(self):
+        while not self._stop_event.is_set():
+            # Jobs waiting for an open circuit are held by the backend, so they outlive this process
+            self.backend.requeue_due(time.time())
+            if not self._slots.acquire(timeout=1.0):
+                continue
+
+            job_id = self.backend.dequeue(timeout=1.0)
+            if job_id is None:
+                self._slots.release()
+                continue
+
+            job = self.backend.update_job(job_id, status=JobStatus.RUNNING, started_at=time.time())
+            if job is None:
+                logger.warning(f"Dequeued unknown job {job_id}")
+                self._slots.release()
+                continue
+
+            if not os.path.exists(job.file_path):
+                # Queued by a replica whose JOB_STORAGE_DIR is not shared with this one
+                self._finish_job(job, error=f"Document file {job.file_path} is not available on this host; "
+                                            "replicas sharing a job queue must share JOB_STORAGE_DIR")
+                continue
+
+            try:
+                future = self.executor.submit(_run_job, job.job_id, job.file_path, job.file_name, job.file_check)
+            except Exception as e:
+                self._finish_job(job, error=str(e))
+                continue
+
+            future.add_done_callback(lambda f, job=job: self._on_job_done(job, f))
+
+    def _progress_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                job_id, stage = self._progress_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            # Stage updates can arrive after the job already finished, so the backend checks the status
+            self.backend.set_stage(job_id, stage)
+
+    def _defer_job(self, job: Job, error: CircuitOpenError):
+        """Put the job back in the queue once the dependency's circuit may have closed, keeping its file"""
+        logger.warning(f"Job {job.job_id} deferred: {str(error)}")
+        self.backend.update_job(job.job_id, status=JobStatus.QUEUED, stage="deferred", started_at=None,
+                                deferrals=job.deferrals + 1)
+        self.backend.defer(job.job_id, time.time() + max(error.retry_after, 1.0))
+        self._slots.release()
+
+    def _on_job_done(self, job: Job, future):
+        result, error = None, None
+        try:
+            result = future.result()
+            get_usage_stats().merge(result.pop("llm_usage", None))
+        except CircuitOpenError as e:
+            if job.deferrals < self.config.job_max_deferrals:
+                self._defer_job(job, e)
+                return
+            logger.error(f"Job {job.job_id} failed after {job.deferrals} deferrals: {str(e)}")
+            error = str(e)
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {str(e)}")
+            error = str(e)
+        self._finish_job(job, result=result, error=error)
+        if result is not None and self.export_writer is not None:
+            self._export_result(job, result)
+
+    def _export_result(self, job: Job, result: Dict[str, Any]):
+        try:
+            self.export_writer.write(build_export_row(
+                result["extracted_data"],
+                result["detected_language"],
+                job.file_name,
+                result.get("timings"),
+                result.get("ocr_confidence"),
+                result.get("elapsed")
+            ))
+        except Exception as e:
+            logger.error(f"Error exporting job {job.job_id}: {str(e)}")
+
+    def _finish_job(self, job: Job, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        try:
+            self.backend.update_job(
+                job.job_id,
+                status=JobStatus.FAILED if error else JobStatus.COMPLETED,
+                finished_at=time.time(),
+                result=result,
+                error=error
+            )
+        finally:
+            if os.path.exists(job.file_path):
+                os.unlink(job.file_path)
+            self._slots.release()
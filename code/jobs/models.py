@@ -0,0 +1,47 @@
+import time
+from enum import Enum
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Dict, Any
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+@dataclass
+class Job:
+    job_id: str
+    file_name: str
+    file_path: str
+    status: JobStatus = JobStatus.QUEUED
+    stage: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    deferrals: int = 0  # Times the job went back to the queue because a dependency was unavailable
+    file_check: Optional[Dict[str, Any]] = None  # Submitter's FileCheck of the file, so the worker does not re-check it
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds spent processing so far (or in total once finished)"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["status"] = self.status.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        data = dict(data)
+        data["status"] = JobStatus(data["status"])
+        return cls(**data)
@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator
+from utils.circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+PROCESSING_DIR = ".processing"
+DONE_DIR = "done"
+FAILED_DIR = "failed"
+
+def _file_key(path: Path) -> str:
+    """Identifies one drop of a file; a later file with the same name gets a different key"""
+    stat = path.stat()
+    return f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+def _unique_path(directory: Path, name: str) -> Path:
+    path = directory / name
+    counter = 1
+    while path.exists():
+        path = directory / f"{Path(name).stem}_{counter}{Path(name).suffix}"
+        counter += 1
+    return path
+
+def _write_atomic(path: Path, text: str) -> None:
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+class WatchCheckpoint:
+    """Append-only log of files whose outcome is known but that may not have been moved yet.
+
+    A file is recorded after its result is written and before it leaves the processing
+    folder, so after a crash it is moved to done/failed instead of being extracted again.
+    It is emptied on startup, once those files have been moved, and whenever no file is
+    being processed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, str]:
+        outcomes = {}
+        if not self.path.exists():
+            return outcomes
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    outcomes[entry["key"]] = entry["status"]
+                except (ValueError, KeyError):
+                    # A line cut short by a crash
+                    continue
+        return outcomes
+
+    def truncate(self) -> None:
+        with self._lock:
+            _write_atomic(self.path, "")
+            self.records = 0
+
+    def record(self, key: str, status: str) -> None:
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "status": status, "at": time.time()}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.records += 1
+
+class FolderWatcher:
+    """Extracts documents dropped into a folder, e.g. by network scanners.
+
+    New files are claimed by an atomic rename into a processing folder, extracted with
+    the shared pipeline (which validates them first) and moved to done, next to a JSON
+    file with the result, or to failed, next to a .error.txt file. At most in_flight
+    files are claimed at a time; the folder is read lazily, so a backlog of thousands of
+    files is never listed into memory. inotify events (through the optional watchdog
+    package) trigger a scan right away; the folder is also polled every poll_interval
+    seconds, since network shares often deliver no events. Files modified within the
+    last settle_seconds are left alone, as the scanner may still be writing them. Files
+    that hit an open circuit breaker go back to the folder, and claiming pauses until
+    the circuit may have closed.
+    """
+
+    def __init__(self, processing_service, watch_dir: str, workers: int = 4, in_flight: int = 8,
+                 poll_interval: float = 5.0, settle_seconds: float = 2.0, checkpoint_path: str = ""):
+        self.processing_service = processing_service
+        self.watch_dir = Path(watch_dir)
+        self.processing_dir = self.watch_dir / PROCESSING_DIR
+        self.done_dir = self.watch_dir / DONE_DIR
+        self.failed_dir = self.watch_dir / FAILED_DIR
+        for directory in (self.watch_dir, self.processing_dir, self.done_dir, self.failed_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.checkpoint = WatchCheckpoint(Path(checkpoint_path) if checkpoint_path else self.watch_dir / ".checkpoint.jsonl")
+        self.allowed_extensions = processing_service.file_validator.ALLOWED_EXTENSIONS
+
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="watcher")
+        self._slots = threading.BoundedSemaphore(max(in_flight, workers))
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._observer = None
+        self.processed = 0
+        self.failed = 0
+        self._in_flight = 0
+        # While a dependency's circuit is open, no new files are claimed
+        self._paused_until = 0.0
+        self._count_lock = threading.Lock()
+
+    def run(self, once: bool = False) -> None:
+        """Process files until stop() is called; with once, only those present at startup"""
+        self._recover()
+        if not once:
+            self._start_observer()
+        logger.info(f"Watching {self.watch_dir}")
+        try:
+            while not self._stop_event.is_set():
+                claimed = self._scan()
+                if once and not claimed:
+                    break
+                with self._count_lock:
+                    if self._in_flight == 0 and self.checkpoint.records:
+                        self.checkpoint.truncate()
+                if not once:
+                    self._wake_event.wait(self.poll_interval)
+                    self._wake_event.clear()
+        finally:
+            self._stop_observer()
+            self.executor.shutdown(wait=True)
+            logger.info(f"Stopped watching {self.watch_dir}: {self.processed} processed, {self.failed} failed")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def _recover(self) -> None:
+        """Finish files a previous run left in the processing folder"""
+        outcomes = self.checkpoint.load()
+        finished, requeued = 0, 0
+        for path in self._iter_files(self.processing_dir):
+            status = outcomes.get(_file_key(path))
+            if status is not None:
+                os.replace(path, _unique_path(self.done_dir if status == "done" else self.failed_dir, path.name))
+                finished += 1
+            else:
+                # Interrupted mid-extraction: back to the inbox, to be claimed again
+                os.replace(path, _unique_path(self.watch_dir, path.name))
+                requeued += 1
+        self.checkpoint.truncate()
+        if finished or requeued:
+            logger.info(f"Recovered {finished} finished and {requeued} interrupted files from the last run")
+
+    def _scan(self) -> int:
+        """Claim settled files while there are free slots; returns how many were claimed"""
+        claimed = 0
+        if time.monotonic() < self._paused_until:
+            return claimed
+        for path in self._iter_files(self.watch_dir):
+            if self._stop_event.is_set() or time.monotonic() < self._paused_until:
+                break
+            # Partial uploads (.part, .tmp) and other non-documents stay where they are
+            if path.suffix.lower() not in self.allowed_extensions:
+                continue
+            try:
+                if time.time() - path.stat().st_mtime < self.settle_seconds:
+                    continue
+            except OSError:
+                continue
+
+            # Blocks until a file finishes when the window is full, which pauses the scan
+            while not self._slots.acquire(timeout=1.0):
+                if self._stop_event.is_set():
+                    return claimed
+            if time.monotonic() < self._paused_until:
+                # A file deferred while this scan waited for the slot
+                self._slots.release()
+                break
+            claimed_path = _unique_path(self.processing_dir, path.name)
+            try:
+                os.replace(path, claimed_path)
+            except OSError:
+                # Removed or claimed by another watcher in the meantime
+                self._slots.release()
+                continue
+
+            claimed += 1
+            with self._count_lock:
+                self._in_flight += 1
+            future = self.executor.submit(self._process, claimed_path)
+            future.add_done_callback(self._on_done)
+        return claimed
+
+    def _on_done(self, future) -> None:
+        with self._count_lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    @staticmethod
+    def _iter_files(directory: Path) -> Iterator[Path]:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith("."):
+                    yield Path(entry.path)
+
+    def _process(self, path: Path) -> None:
+        key = _file_key(path)
+        start = time.perf_counter()
+        try:
+            result = self.processing_service.process_document(str(path), None, path.name)
+            if result.extracted_data is None:
+                raise ValueError("Failed to extract fields from document")
+        except CircuitOpenError as e:
+            # Not the file's fault: back to the folder, to be claimed again once the circuit may have closed
+            logger.warning(f"Deferring {path.name}: {str(e)}")
+            self._paused_until = max(self._paused_until, time.monotonic() + max(e.retry_after, 1.0))
+            os.replace(path, _unique_path(self.watch_dir, path.name))
+            return
+        except Exception as e:
+            logger.error(f"Failed to process {path.name}: {str(e)}")
+            self._fail(path, key, str(e))
+            return
+
+        try:
+            target = _unique_path(self.done_dir, path.name)
+            _write_atomic(target.with_name(f"{target.name}.json"), json.dumps({
+                "file_name": path.name,
+                "document_hash": result.document_hash,
+                "detected_language": result.detected_language,
+                "extraction_method": result.extraction_method,
+                "ocr_confidence": result.ocr_confidence,
+                "timings": result.timings,
+                "elapsed": result.elapsed,
+                "extracted_data": result.extracted_data
+            }, ensure_ascii=False, indent=2))
+            self.checkpoint.record(key, "done")
+            os.replace(path, target)
+        except OSError as e:
+            logger.error(f"Could not move {path.name} to {self.done_dir}: {str(e)}")
+            return
+        with self._count_lock:
+            self.processed += 1
+        logger.info(f"Processed {path.name} in {time.perf_counter() - start:.2f}s")
+
+    def _fail(self, path: Path, key: str, error: str) -> None:
+        try:
+            target = _unique_path(self.failed_dir, path.name)
+            _write_atomic(target.with_name(f"{target.name}.error.txt"), error + "\n")
+            self.checkpoint.record(key, "failed")
+            os.replace(path, target)
+        except OSError as e:
+            logger.error(f"Could not move {path.name} to {self.failed_dir}: {str(e)}")
+            return
+        with self._count_lock:
+            self.failed += 1
+
+    def _start_observer(self) -> None:
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logger.info(f"watchdog is not installed, polling {self.watch_dir} every {self.poll_interval:g}s")
+            return
+
+        wake_event = self._wake_event
+
+        class _WakeHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake_event.set()
+
+        try:
+            observer = Observer()
+            observer.schedule(_WakeHandler(), str(self.watch_dir), recursive=False)
+            observer.start()
+        except Exception as e:
+            logger.warning(f"Could not watch {self.watch_dir} for events, polling instead: {str(e)}")
+            return
+        self._observer = observer
+
+    def _stop_observer(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
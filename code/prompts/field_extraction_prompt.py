@@ -1,27 +1,42 @@
 import json
-import os
-from pathlib import Path
+from functools import lru_cache
+from typing import Optional, Dict, List
+from utils.assets import get_asset_registry, get_template
+from utils.form_schema import get_form_schema
+
+# Azure OpenAI caches prompt prefixes only from this length, in 128-token increments
+MIN_CACHEABLE_PREFIX_TOKENS = 1024
+
+EXTRACTION_INSTRUCTION = "Extract the form fields from this OCR content:"
 
 def load_schema(language: str) -> str:
-    """Load the appropriate empty schema from templates"""
-    try:
-        # Get the project root directory
-        project_root = Path(__file__).parent.parent.parent
-        schema_file = project_root / "templates" / f"empty_json_{language}.json"
-        
-        with open(schema_file, 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return ""
+    """The empty template of a language as written in templates/, or "" when it is unavailable"""
+    template = get_template(language)
+    return template.text if template is not None else ""
 
-# Load schemas
-ENGLISH_SCHEMA = load_schema("en")
-HEBREW_SCHEMA = load_schema("he")
+def get_field_reference() -> str:
+    """Bilingual list of the form fields, mapping each English key to its Hebrew label"""
+    schema = get_form_schema()
+    if "he" not in schema.dotted_paths:
+        return ""
+    return "\n".join(
+        f"- {english_path} - {hebrew_path}"
+        for english_path, hebrew_path in zip(schema.dotted_paths["en"], schema.dotted_paths["he"])
+    )
 
 def get_system_prompt(language: str) -> str:
-    """Get the system prompt with the appropriate schema"""
-    
-    schema = ENGLISH_SCHEMA if language == "en" else HEBREW_SCHEMA
+    """Get the system prompt with the appropriate schema.
+
+    The result is the cacheable prompt prefix: it is byte-identical for every document
+    of a language, so nothing document-specific may be added here. It is built once and
+    rebuilt only when a template file is reloaded.
+    """
+    return get_asset_registry().derive(
+        f"system_prompt_{language}", ("template_en", "template_he"), lambda: _build_system_prompt(language)
+    )
+
+def _build_system_prompt(language: str) -> str:
+    schema = load_schema("en" if language == "en" else "he")
     
     return f"""You are an AI assistant specialized in extracting data from Israeli National Insurance Institute (ביטוח לאומי) forms.
 
@@ -59,7 +74,51 @@ The input has two sections:
 - "Key-Value Pairs": Fields automatically detected by Azure OCR
 - "Raw Lines": All extracted text lines (backup in case key-value pairs missed something)
 
+FIELD REFERENCE (English key - Hebrew form label):
+{get_field_reference()}
+
 EXPECTED JSON OUTPUT STRUCTURE:
 {schema}
 
-Extract the information carefully and return only the JSON object."""
\ No newline at end of file
+Extract the information carefully and return only the JSON object."""
+
+def get_missing_fields_prompt(missing_fields_template: dict) -> str:
+    """Follow-up user prompt asking only for the fields that were missing from a previous response"""
+    
+    return f"""Extract ONLY the following fields from the OCR content above, using this JSON structure:
+{json.dumps(missing_fields_template, ensure_ascii=False, indent=2)}"""
+
+def build_extraction_messages(language: str, ocr_text: str, missing_fields_template: Optional[dict] = None) -> List[Dict[str, str]]:
+    """Chat messages ordered as cacheable prefix + variable suffix.
+
+    The system prompt and the instruction line are the same for every document of a
+    language, and the OCR text comes after them. A missing-fields request repeats the
+    original messages and appends its question, so it also reuses the first request's prefix.
+    """
+    messages = [
+        {"role": "system", "content": get_system_prompt(language)},
+        {"role": "user", "content": f"{EXTRACTION_INSTRUCTION}\n\n{ocr_text}"}
+    ]
+    if missing_fields_template is not None:
+        messages.append({"role": "user", "content": get_missing_fields_prompt(missing_fields_template)})
+    return messages
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """The o200k_base tokenizer, imported on first use; None when tiktoken is not installed"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("o200k_base")
+
+def estimate_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, otherwise a rough estimate from the UTF-8 size"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text.encode("utf-8")) // 4
+
+def get_prefix_token_estimate(language: str) -> int:
+    """Estimated tokens of the shared prefix (system prompt and instruction line) of extraction requests"""
+    return estimate_tokens(get_system_prompt(language) + EXTRACTION_INSTRUCTION)
@@ -1,80 +1,104 @@
-from azure.ai.documentintelligence import DocumentIntelligenceClient
-from azure.ai.documentintelligence.models import AnalyzeResult
-from azure.core.credentials import AzureKeyCredential
 import logging
+import threading
+from typing import TYPE_CHECKING, Optional, Union
+from utils.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from utils.ocr_document import OcrDocument
+
+if TYPE_CHECKING:
+    from azure.ai.documentintelligence.models import AnalyzeResult
 
 logger = logging.getLogger(__name__)
 
 class DocumentIntelligenceService:
-    def __init__(self, endpoint: str, key: str):
+    def __init__(self, endpoint: str, key: str, timeout: float = 120.0, max_retries: int = 1,
+                 breaker: Optional[CircuitBreaker] = None):
         self.endpoint = endpoint
         self.key = key
-        self.client = DocumentIntelligenceClient(
-            endpoint=endpoint,
-            credential=AzureKeyCredential(key)
-        )
+        # timeout bounds a whole analysis, including polling for its result
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker = breaker or get_circuit_breaker("document_intelligence")
+        # The Azure SDK is imported with the client on first use, keeping it out of cold start
+        self._client = None
+        self._client_lock = threading.Lock()
 
-    def analyze_document(self, document_path: str) -> AnalyzeResult:
-        """
-        
-        """
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from azure.ai.documentintelligence import DocumentIntelligenceClient
+                    from azure.core.credentials import AzureKeyCredential
+
+                    self._client = DocumentIntelligenceClient(
+                        endpoint=self.endpoint,
+                        credential=AzureKeyCredential(self.key),
+                        connection_timeout=min(self.timeout, 10.0),
+                        read_timeout=self.timeout,
+                        retry_total=self.max_retries
+                    )
+        return self._client
+
+    def warm_up(self) -> None:
+        """Create the client ahead of the first request"""
+        _ = self.client
+
+    def analyze_document(self, document_path: str) -> "AnalyzeResult":
+        """Run the prebuilt layout model with key-value pairs, through the service's circuit breaker"""
         try:
             with open(document_path, "rb") as f:
                 document_content = f.read()
 
-            # Analyze document with key-value pairs feature
-            poller = self.client.begin_analyze_document(
-                model_id="prebuilt-layout",
-                body=document_content,
-                content_type="application/octet-stream",
-                features=["keyValuePairs"]
-            )
-
-            result = poller.result()
-            return result
+            return self.breaker.call(self._analyze, document_content)
 
         except Exception as e:
             logger.error(f"Error analyzing document: {str(e)}")
             raise e
 
-    def convert_result_to_text(self, ocr_result: AnalyzeResult) -> str:
+    def _analyze(self, document_content: bytes) -> "AnalyzeResult":
+        poller = self.client.begin_analyze_document(
+            model_id="prebuilt-layout",
+            body=document_content,
+            content_type="application/octet-stream",
+            features=["keyValuePairs"]
+        )
+        poller.wait(self.timeout)
+        if not poller.done():
+            raise TimeoutError(f"Document analysis did not finish within {self.timeout:g}s")
+        return poller.result()
+
+    def analyze_to_ocr_document(self, document_path: str) -> OcrDocument:
+        """Analyze a document and keep only the compact representation, releasing the SDK result"""
+        result = self.analyze_document(document_path)
+        ocr_document = OcrDocument.from_analyze_result(result)
+        del result
+        return ocr_document
+
+    def convert_result_to_text(self, ocr_result: Union[OcrDocument, "AnalyzeResult"]) -> str:
         """
         Converts the OCR result into a structured text format containing key-value pairs and raw lines.
         """
         try:
-            if not ocr_result.pages:
-                return None
-
-            first_page = ocr_result.pages[0]
-
-            key_value_lines = ["--- Key-Value Pairs: ---"]
-            # Collect key-value pairs
-            key_value_pairs = getattr(ocr_result, "key_value_pairs", [])
-            if key_value_pairs:
-                for kv in key_value_pairs:
-                    if kv.key:
-                        key_text = kv.key.content.strip()
-                        value_text = kv.value.content.strip() if kv.value else ""
-                        key_value_lines.append(f"{key_text}: {value_text}")
-            else:
-                key_value_lines.append("No key-value pairs detected.")
-
-            # Collect raw lines
-            raw_lines = ["--- Raw Lines: ---"]
-            if first_page.lines:
-                for line in first_page.lines:
-                    raw_lines.append(f"{line.content.strip()}")
-            else:
-                raw_lines.append("No lines detected.")
-
-            # Concatenate both sections
-            full_text = "\n".join(key_value_lines) + "\n\n" + "\n".join(raw_lines)
-            return full_text.strip()
+            if not isinstance(ocr_result, OcrDocument):
+                ocr_result = OcrDocument.from_analyze_result(ocr_result)
+            return ocr_result.to_text()
 
         except Exception as e:
             logger.error(f"Error converting OCR result to text: {str(e)}")
             raise e
 
+    def get_mean_confidence(self, ocr_result: Union[OcrDocument, "AnalyzeResult"]) -> Optional[float]:
+        """Average word confidence across all pages, or None when no words were detected"""
+        if isinstance(ocr_result, OcrDocument):
+            return ocr_result.mean_confidence
+        confidences = [
+            word.confidence
+            for page in (ocr_result.pages or [])
+            for word in (page.words or [])
+            if word.confidence is not None
+        ]
+        return sum(confidences) / len(confidences) if confidences else None
+
     def save_ocr_output(self, ocr_text_result: str, output_path: str) -> None:
         try:
             with open(output_path, 'w', encoding='utf-8') as f:
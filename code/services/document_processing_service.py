@@ -0,0 +1,417 @@
+import time
+import logging
+import threading
+from array import array
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Callable
+from services.document_intelligence_service import DocumentIntelligenceService
+from services.local_ocr_service import create_local_ocr_service
+from services.openai_service import OpenAIService
+from services.result_store import ResultStore, create_result_store
+from utils.circuit_breaker import is_dependency_failure
+from utils.checkbox_resolver import CHECKBOX_FIELDS, CheckboxResolver, apply_checkbox_resolutions, format_checkbox_hints
+from utils.extraction_scorer import ExtractionScorer
+from utils.file_validator import FileCheck, FileValidator
+from utils.near_duplicate import MinHasher, NearDuplicateIndex, numeric_tokens
+from utils.form_record import FormRecord
+from utils.ocr_document import OcrCache, OcrDocument
+from utils.pipeline import Pipeline, PipelineExecutor, ShortCircuit, Step
+from utils.zonal_extractor import LAYOUT_PATH, ZonalExtractor, load_layout
+from utils.text_preprocessor import TextPreprocessor
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ProcessingResult:
+    extracted_data: Optional[Dict[str, Any]]
+    detected_language: str
+    timings: Dict[str, float] = field(default_factory=dict)  # Per step; overlapping when steps ran concurrently
+    elapsed: Optional[float] = None  # Wall-clock seconds of the whole run
+    ocr_confidence: Optional[float] = None
+    document_hash: str = ""
+    from_cache: bool = False
+    duplicate_of: str = ""  # Hash of the near-duplicate document whose result was reused
+    extraction_method: str = "llm"  # llm, zonal, cache or near_duplicate
+    ocr_engine: str = "azure"  # azure, or local while Document Intelligence is unavailable
+
+class DocumentProcessingService:
+    """UI-independent extraction pipeline shared by the Streamlit app and the HTTP API"""
+
+    def __init__(self, config, result_store: Optional[ResultStore] = None):
+        self.config = config
+        self.file_validator = FileValidator(config)
+        self.text_preprocessor = TextPreprocessor()
+        self.checkbox_resolver = CheckboxResolver() if config.checkbox_resolver else None
+        self.zonal_extractor = self._create_zonal_extractor(config)
+        self.result_store = result_store or create_result_store(config)
+        self.ocr_cache = self._create_ocr_cache(config)
+        self.pipeline = self._build_pipeline()
+        self.pipeline_executor = PipelineExecutor(config.pipeline_max_workers)
+
+        # Near-duplicate index over OCR text, loaded lazily from the result store
+        self.min_hasher = None
+        self.near_duplicate_index = None
+        self._last_signature_id = 0
+        self._index_lock = threading.Lock()
+        if config.near_duplicate_detection and self.result_store is not None:
+            self.min_hasher = MinHasher()
+            self.near_duplicate_index = NearDuplicateIndex(self.min_hasher.num_perm, threshold=config.near_duplicate_threshold)
+
+        self.ocr_service = None
+        self.openai_service = None
+
+        if config.is_azure_document_intelligence_configured():
+            self.ocr_service = DocumentIntelligenceService(
+                config.azure_document_intelligence_endpoint,
+                config.azure_document_intelligence_key,
+                timeout=config.document_intelligence_timeout_seconds,
+                max_retries=config.azure_max_retries
+            )
+        # Tesseract, used only while Document Intelligence fails or its circuit is open
+        self.local_ocr_service = create_local_ocr_service(config)
+
+        if config.is_azure_openai_configured():
+            self.openai_service = OpenAIService(
+                config.azure_openai_endpoint,
+                config.azure_openai_key,
+                config.azure_openai_deployment_name,
+                config.azure_openai_api_version,
+                config.azure_openai_max_tokens,
+                config.azure_openai_temperature,
+                config.speculative_extraction,
+                config.language_confidence_threshold,
+                config.structured_outputs,
+                small_deployment_name=config.azure_openai_small_deployment_name,
+                escalation_threshold=config.cascade_escalation_threshold,
+                timeout=config.openai_timeout_seconds,
+                max_retries=config.azure_max_retries
+            )
+
+    def is_configured(self) -> bool:
+        return self.ocr_service is not None and self.openai_service is not None
+
+    def warm_up(self) -> Dict[str, float]:
+        """Create the SDK clients, build prompts and load the near-duplicate index before the first document.
+
+        Returns the seconds spent per step; failures are logged, since a cold service still works.
+        """
+        steps = {
+            "ocr_client": self.ocr_service.warm_up if self.ocr_service else None,
+            "openai_client": self.openai_service.warm_up if self.openai_service else None,
+            "near_duplicate_index": self._refresh_near_duplicate_index if self.near_duplicate_index is not None else None
+        }
+        timings = {}
+        for name, step in steps.items():
+            if step is None:
+                continue
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.warning(f"Prewarm step {name} failed: {str(e)}")
+            timings[name] = time.perf_counter() - start
+        return timings
+
+    def _build_pipeline(self) -> Pipeline:
+        """validate and hash -> lookup -> OCR -> preprocess and checkboxes -> near duplicate -> extract"""
+        return Pipeline([
+            Step("validate", self._validate_step, inputs=("file_path", "file_check"), outputs=("document_hash",),
+                 stage="validate"),
+            # Skip everything else for documents that were already extracted
+            Step("lookup", self._lookup_step, inputs=("document_hash",)),
+            Step("ocr", self._ocr_step, inputs=("file_path", "document_hash"),
+                 outputs=("ocr_document", "ocr_text", "ocr_engine"), after=("lookup",), stage="ocr"),
+            Step("preprocess", self._preprocess_step, inputs=("ocr_text",), outputs=("clean_text",), stage="preprocess"),
+            # On the document's own text, before hints are appended to it
+            Step("language", self._language_step, inputs=("clean_text",), outputs=("language",)),
+            Step("checkboxes", self._checkbox_step, inputs=("ocr_document",), outputs=("checkbox_resolutions",)),
+            Step("prompt_text", self._prompt_text_step, inputs=("clean_text", "checkbox_resolutions", "language"),
+                 outputs=("prompt_text",)),
+            # Re-scans of an already extracted form reuse its result instead of calling the LLM
+            Step("near_duplicate", self._near_duplicate_step, inputs=("prompt_text",), outputs=("signature", "numbers")),
+            Step("extract", self._extract_step, inputs=("ocr_document", "prompt_text", "checkbox_resolutions", "language"),
+                 outputs=("extracted_data", "detected_language", "extraction_method"), after=("near_duplicate",),
+                 stage="extract"),
+        ], initial_inputs=("file_path", "file_check"))
+
+    def process_document(self, file_path: str, progress_callback: Optional[Callable[[str], None]] = None,
+                         file_name: Optional[str] = None, file_check: Optional[FileCheck] = None) -> ProcessingResult:
+        """Run the extraction pipeline on one file, reporting each stage as it starts.
+
+        file_check is the caller's check of the same bytes, hashed (compute_hash=True); the
+        file is then not read again to validate and hash it. Without one, e.g. for files
+        picked up by the folder watcher, the file is checked and hashed on disk in one read.
+        """
+        if not self.is_configured():
+            raise RuntimeError("Azure Document Intelligence and Azure OpenAI must both be configured")
+
+        start = time.perf_counter()
+        run = self.pipeline_executor.run(self.pipeline, {"file_path": file_path, "file_check": file_check},
+                                         progress_callback)
+        # Step timings overlap when steps run concurrently, so their sum would overstate the time taken
+        elapsed = time.perf_counter() - start
+        values = run.values
+        ocr_document = values.get("ocr_document")
+        ocr_confidence = ocr_document.mean_confidence if ocr_document is not None else None
+
+        if run.stopped_at == "lookup":
+            stored = run.short_circuit.value
+            logger.info(f"Document {values['document_hash'][:12]} was already processed, returning the stored result")
+            return ProcessingResult(
+                extracted_data=stored.extracted_data,
+                detected_language=stored.detected_language,
+                timings=run.timings,
+                elapsed=elapsed,
+                ocr_confidence=stored.ocr_confidence,
+                document_hash=values["document_hash"],
+                from_cache=True,
+                extraction_method="cache",
+                # Only results from Document Intelligence are stored
+                ocr_engine="azure"
+            )
+
+        if run.stopped_at == "near_duplicate":
+            stored, signature, numbers = run.short_circuit.value
+            logger.info(f"Document {values['document_hash'][:12]} is a near duplicate of {stored.document_hash[:12]}, returning its result")
+            result = ProcessingResult(
+                extracted_data=stored.extracted_data,
+                detected_language=stored.detected_language,
+                timings=run.timings,
+                elapsed=elapsed,
+                ocr_confidence=ocr_confidence,
+                document_hash=values["document_hash"],
+                from_cache=True,
+                duplicate_of=stored.document_hash,
+                extraction_method="near_duplicate",
+                ocr_engine=values["ocr_engine"]
+            )
+            # Under this document's own hash too, so resubmitting the same bytes is a plain lookup
+            if result.ocr_engine != "local":
+                self._store_result(result, file_name or file_path, signature, numbers)
+            return result
+
+        result = ProcessingResult(
+            extracted_data=values["extracted_data"],
+            detected_language=values["detected_language"],
+            timings=run.timings,
+            elapsed=elapsed,
+            ocr_confidence=ocr_confidence,
+            document_hash=values["document_hash"],
+            extraction_method=values["extraction_method"],
+            ocr_engine=values["ocr_engine"]
+        )
+        # Results from the local OCR fallback are not kept, so a resubmission gets the full-quality path
+        if result.ocr_engine != "local":
+            self._store_result(result, file_name or file_path, values["signature"], values["numbers"])
+
+        logger.info(f"Processed {file_path} in {elapsed:.2f}s")
+        return result
+
+    def _validate_step(self, file_path: str, file_check: Optional[FileCheck]):
+        check = file_check
+        if check is None or (check.ok and check.sha256 is None):
+            check = self.file_validator.check_file(file_path, compute_hash=True)
+        if not check.ok:
+            logger.error(f"Rejected {file_path}: {check.reason.value}")
+            raise ValueError(self.file_validator.get_message(check))
+        return {"document_hash": check.sha256}
+
+    def _lookup_step(self, document_hash: str):
+        cached = self._get_stored_result(document_hash)
+        return ShortCircuit(cached) if cached is not None else None
+
+    def _ocr_step(self, file_path: str, document_hash: str):
+        # Without the LLM the document cannot be finished, so fail before paying for OCR
+        self.openai_service.breaker.check()
+        ocr_document, ocr_engine = self._get_ocr_document(file_path, document_hash)
+        ocr_text = ocr_document.to_text()
+        if not ocr_text:
+            raise ValueError("No text was detected in the document")
+        return {"ocr_document": ocr_document, "ocr_text": ocr_text, "ocr_engine": ocr_engine}
+
+    def _preprocess_step(self, ocr_text: str):
+        return {"clean_text": self.text_preprocessor.preprocess_text(ocr_text)}
+
+    def _checkbox_step(self, ocr_document: OcrDocument):
+        return {"checkbox_resolutions": self._resolve_checkboxes(ocr_document)}
+
+    def _language_step(self, clean_text: str):
+        """(language, confidence) of the fill language"""
+        return {"language": self.openai_service.detect_language_with_confidence(clean_text)}
+
+    @staticmethod
+    def _prompt_text_step(clean_text: str, checkbox_resolutions, language):
+        if checkbox_resolutions:
+            clean_text = f"{clean_text}\n\n{format_checkbox_hints(checkbox_resolutions, language[0])}"
+        return {"prompt_text": clean_text}
+
+    def _near_duplicate_step(self, prompt_text: str):
+        signature, numbers = self._compute_signature(prompt_text)
+        duplicate = self._find_near_duplicate(signature, numbers)
+        if duplicate is not None:
+            return ShortCircuit((duplicate, signature, numbers))
+        return {"signature": signature, "numbers": numbers}
+
+    def _extract_step(self, ocr_document: OcrDocument, prompt_text: str, checkbox_resolutions, language):
+        zonal_result = self._extract_zonal(ocr_document, language[0], checkbox_resolutions)
+        if zonal_result is not None:
+            return {"extracted_data": zonal_result, "detected_language": language[0], "extraction_method": "zonal"}
+        extracted_data, detected_language = self.openai_service.extract_fields_with_language(prompt_text, language)
+        extracted_data = apply_checkbox_resolutions(extracted_data, detected_language, checkbox_resolutions)
+        return {"extracted_data": extracted_data, "detected_language": detected_language, "extraction_method": "llm"}
+
+    def _get_stored_result(self, document_hash: str):
+        if self.result_store is None or not self.config.skip_duplicate_documents:
+            return None
+        try:
+            return self.result_store.get_by_hash(document_hash)
+        except Exception as e:
+            logger.error(f"Error reading result store: {str(e)}")
+            return None
+
+    @staticmethod
+    def _create_ocr_cache(config) -> Optional[OcrCache]:
+        if not config.ocr_cache_dir:
+            return None
+        try:
+            return OcrCache(config.ocr_cache_dir)
+        except Exception as e:
+            logger.error(f"Error opening OCR cache: {str(e)}")
+            return None
+
+    def _get_ocr_document(self, file_path: str, document_hash: str):
+        """OCR the document, or reuse its cached OCR output (e.g. when retrying a failed extraction).
+
+        Falls back to local OCR when Document Intelligence is unavailable; returns the
+        document and the engine that produced it.
+        """
+        if self.ocr_cache is not None:
+            cached = self.ocr_cache.get(document_hash)
+            if cached is not None:
+                logger.info(f"Using cached OCR output for {document_hash[:12]}")
+                return cached, "azure"
+
+        try:
+            ocr_document = self.ocr_service.analyze_to_ocr_document(file_path)
+        except Exception as e:
+            if not is_dependency_failure(e) or self.local_ocr_service is None or not self.local_ocr_service.can_process(file_path):
+                raise
+            logger.warning(f"Document Intelligence is unavailable ({str(e)}), using local OCR for {document_hash[:12]}")
+            return self.local_ocr_service.analyze_to_ocr_document(file_path), "local"
+
+        if self.ocr_cache is not None:
+            try:
+                self.ocr_cache.put(document_hash, ocr_document)
+            except Exception as e:
+                logger.error(f"Error caching OCR output: {str(e)}")
+        return ocr_document, "azure"
+
+    @staticmethod
+    def _create_zonal_extractor(config) -> Optional[ZonalExtractor]:
+        if not config.zonal_extraction:
+            return None
+        layout = load_layout(config.zonal_layout_path or LAYOUT_PATH)
+        if layout is None:
+            logger.info("No form layout found, zonal extraction is disabled (run calibrate_template.py)")
+            return None
+        return ZonalExtractor(layout)
+
+    def _extract_zonal(self, ocr_document: OcrDocument, language: str, checkbox_resolutions):
+        """Extract by position on the aligned form, without the LLM, when the result is confident enough"""
+        # Zones hold no checkbox values, so every checkbox field must have been resolved from the marks
+        if self.zonal_extractor is None or len(checkbox_resolutions) < len(CHECKBOX_FIELDS):
+            return None
+        try:
+            extraction = self.zonal_extractor.extract(ocr_document)
+            if extraction is None:
+                return None
+
+            # The cascade score does not apply: its OCR agreement is 1.0 by construction here.
+            # A misaligned zone shows in the alignment fit, an empty or garbled one in the required fields.
+            quality = self.zonal_extractor.alignment_quality(extraction.alignment)
+            if quality < self.config.zonal_accept_threshold:
+                logger.info(f"Zonal alignment quality {quality:.2f} is too low, using the LLM")
+                return None
+
+            record = FormRecord.empty(language)
+            for field, value in extraction.values.items():
+                record.set_field(field, value)
+            record = apply_checkbox_resolutions(record, language, checkbox_resolutions)
+
+            scorer = self.openai_service.extraction_scorer
+            missing = [field for field in scorer.REQUIRED_FIELDS if not self._has_value(record, field)]
+            if missing:
+                logger.info(f"Zonal extraction left {', '.join(missing)} empty, using the LLM")
+                return None
+            if scorer.rule_check_ratio(record) < 1.0:
+                logger.info("Zonal extraction has values failing their format rules, using the LLM")
+                return None
+            logger.info(f"Extracted fields from the form layout ({extraction.alignment.anchors} anchors, "
+                        f"quality {quality:.2f}, {extraction.coverage:.0%} of the fields)")
+            return record.to_dict()
+        except Exception as e:
+            logger.error(f"Error in zonal extraction: {str(e)}")
+            return None
+
+    @staticmethod
+    def _has_value(record: FormRecord, english_path: str) -> bool:
+        """Whether a field, or every part of a date group, has a value"""
+        if english_path in ExtractionScorer.DATE_FIELDS:
+            return all(str(record.get_field(f"{english_path}.{part}") or "").strip() for part in ("day", "month", "year"))
+        return bool(str(record.get_field(english_path) or "").strip())
+
+    def _resolve_checkboxes(self, ocr_document: OcrDocument):
+        if self.checkbox_resolver is None:
+            return {}
+        try:
+            return self.checkbox_resolver.resolve(ocr_document)
+        except Exception as e:
+            logger.error(f"Error resolving checkboxes: {str(e)}")
+            return {}
+
+    def _compute_signature(self, text: str):
+        if self.near_duplicate_index is None:
+            return None, set()
+        return self.min_hasher.signature(text), numeric_tokens(text)
+
+    def _refresh_near_duplicate_index(self):
+        """Add signatures stored since the last refresh, including those written by other workers"""
+        with self._index_lock:
+            for result_id, document_hash, signature, numbers in self.result_store.get_signatures(self._last_signature_id):
+                self.near_duplicate_index.add(document_hash, array("I", signature), numbers)
+                self._last_signature_id = result_id
+
+    def _find_near_duplicate(self, signature, numbers):
+        if signature is None:
+            return None
+        try:
+            self._refresh_near_duplicate_index()
+            match = self.near_duplicate_index.query(signature, numbers)
+            if match is None:
+                return None
+            return self.result_store.get_by_hash(match[0])
+        except Exception as e:
+            logger.error(f"Error looking up near duplicates: {str(e)}")
+            return None
+
+    def _store_result(self, result: ProcessingResult, file_name: str, signature=None, numbers=None):
+        """Persist the result together with its near-duplicate signature (None when detection is off)"""
+        if self.result_store is None or result.extracted_data is None:
+            return
+        try:
+            self.result_store.save(
+                result.document_hash,
+                file_name,
+                result.extracted_data,
+                result.detected_language,
+                result.timings,
+                result.ocr_confidence,
+                signature.tobytes() if signature is not None else None,
+                sorted(numbers) if signature is not None else None
+            )
+        except Exception as e:
+            # Persisting is best effort; the extraction itself succeeded
+            logger.error(f"Error saving result: {str(e)}")
+            return
+        if signature is not None:
+            self.near_duplicate_index.add(result.document_hash, signature, numbers)
@@ -0,0 +1,125 @@
+import shutil
+import logging
+import threading
+import importlib.util
+from pathlib import Path
+from typing import Optional, Iterator
+from utils.pdf_backend import find_pdf_backend
+from utils.ocr_document import OcrDocument, OcrLine, OcrPage
+
+logger = logging.getLogger(__name__)
+
+class LocalOcrService:
+    """Tesseract OCR, used while Azure Document Intelligence is unavailable.
+
+    Produces lines only (no key-value pairs or selection marks), so checkbox resolution
+    and zonal extraction step aside and the LLM extracts from the text. Needs the
+    pytesseract package and the tesseract binary, with the Hebrew language data for
+    Hebrew forms; PDFs also need pypdfium2 or PyMuPDF to be rasterized.
+    """
+
+    def __init__(self, dpi: int = 200):
+        self.dpi = dpi
+        self.pdf_backend = find_pdf_backend()
+        self._languages = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_available() -> bool:
+        """Whether pytesseract and the tesseract binary are installed, checked without importing anything"""
+        return importlib.util.find_spec("pytesseract") is not None and shutil.which("tesseract") is not None
+
+    def can_process(self, document_path: str) -> bool:
+        return Path(document_path).suffix.lower() != ".pdf" or self.pdf_backend is not None
+
+    @property
+    def languages(self) -> str:
+        """Tesseract language string of the installed Hebrew and English data, e.g. heb+eng"""
+        if self._languages is None:
+            import pytesseract
+
+            with self._lock:
+                installed = set(pytesseract.get_languages(config=""))
+                wanted = [language for language in ("heb", "eng") if language in installed]
+                if "heb" not in installed:
+                    logger.warning("Tesseract has no Hebrew language data, Hebrew forms will not be recognized")
+                self._languages = "+".join(wanted) or "eng"
+        return self._languages
+
+    def analyze_to_ocr_document(self, document_path: str) -> OcrDocument:
+        import pytesseract
+
+        document = OcrDocument()
+        confidences = []
+        for page_number, image in enumerate(self._page_images(document_path), start=1):
+            document.pages.append(OcrPage(page_number, float(image.width), float(image.height), "pixel"))
+            data = pytesseract.image_to_data(image, lang=self.languages, output_type=pytesseract.Output.DICT)
+
+            # Group words into lines by their block, paragraph and line numbers
+            lines = {}
+            for index, text in enumerate(data["text"]):
+                if not text.strip():
+                    continue
+                key = (data["block_num"][index], data["par_num"][index], data["line_num"][index])
+                left, top = data["left"][index], data["top"][index]
+                box = (left, top, left + data["width"][index], top + data["height"][index])
+                confidence = float(data["conf"][index])
+                confidence = confidence / 100 if confidence >= 0 else None
+                lines.setdefault(key, []).append((text, box, confidence))
+
+            for words in lines.values():
+                word_confidences = [confidence for _, _, confidence in words if confidence is not None]
+                confidences.extend(word_confidences)
+                document.lines.append(OcrLine(
+                    page_number,
+                    " ".join(text for text, _, _ in words),
+                    (
+                        float(min(box[0] for _, box, _ in words)), float(min(box[1] for _, box, _ in words)),
+                        float(max(box[2] for _, box, _ in words)), float(max(box[3] for _, box, _ in words))
+                    ),
+                    sum(word_confidences) / len(word_confidences) if word_confidences else None
+                ))
+
+        document.mean_confidence = sum(confidences) / len(confidences) if confidences else None
+        logger.info(f"Recognized {len(document.lines)} lines locally in {document_path}")
+        return document
+
+    def _page_images(self, document_path: str) -> Iterator:
+        """Yield the document's pages as images one at a time, so only one page is held in memory"""
+        from PIL import Image
+
+        if Path(document_path).suffix.lower() != ".pdf":
+            with Image.open(document_path) as image:
+                yield image.convert("RGB")
+            return
+
+        scale = self.dpi / 72
+        if self.pdf_backend == "pypdfium2":
+            import pypdfium2 as pdfium
+
+            pdf = pdfium.PdfDocument(document_path)
+            try:
+                for index in range(len(pdf)):
+                    page = pdf[index]
+                    try:
+                        yield page.render(scale=scale).to_pil()
+                    finally:
+                        page.close()
+            finally:
+                pdf.close()
+            return
+
+        import fitz
+
+        with fitz.open(document_path) as pdf:
+            for page in pdf:
+                pixmap = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+                yield Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+def create_local_ocr_service(config) -> Optional[LocalOcrService]:
+    if not config.local_ocr_fallback:
+        return None
+    if not LocalOcrService.is_available():
+        logger.info("Tesseract is not installed, there is no local OCR fallback")
+        return None
+    return LocalOcrService()
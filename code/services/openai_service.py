@@ -1,77 +1,140 @@
-import json
+import time
 import logging
-import re
-from typing import Optional, Dict, Any
-from openai import AzureOpenAI
-from prompts.field_extraction_prompt import get_system_prompt
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+from prompts.field_extraction_prompt import (
+    MIN_CACHEABLE_PREFIX_TOKENS, build_extraction_messages, get_prefix_token_estimate
+)
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker
+from utils.extraction_scorer import ExtractionScorer
+from utils.form_record import FormRecord, as_dict, dumps, loads
+from utils.form_schema import build_json_schema, build_template, get_form_schema
+from utils.json_repair import repair_json
+from utils.language_detector import LanguageDetector
+from utils.llm_usage import LLMUsageStats, get_usage_stats
 
 logger = logging.getLogger(__name__)
 
 class OpenAIService:
-    def __init__(self, endpoint: str, key: str, deployment_name: str, api_version: str, max_tokens: int = 2000, temperature: float = 0.1):
-        self.client = AzureOpenAI(
-            azure_endpoint=endpoint,
-            api_key=key,
-            api_version=api_version
-        )
+    def __init__(self, endpoint: str, key: str, deployment_name: str, api_version: str, max_tokens: int = 2000, temperature: float = 0.1,
+                 speculative_extraction: bool = False, language_confidence_threshold: float = 0.5,
+                 structured_outputs: bool = True, usage_stats: Optional[LLMUsageStats] = None,
+                 small_deployment_name: Optional[str] = None, escalation_threshold: float = 0.75,
+                 timeout: float = 60.0, max_retries: int = 1, breaker: Optional[CircuitBreaker] = None):
+        self.endpoint = endpoint
+        self.key = key
+        self.api_version = api_version
+        # Bounded waits per request, and a breaker that stops calling a failing endpoint altogether
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker = breaker or get_circuit_breaker("openai")
+        # The openai package takes most of a second to import, so the client is created on first use
+        self._client = None
+        self._client_lock = threading.Lock()
         self.deployment_name = deployment_name
         self.max_tokens = max_tokens
         self.temperature = temperature
+        
+        # Below this detection confidence, speculative mode extracts in both languages
+        self.speculative_extraction = speculative_extraction
+        self.language_confidence_threshold = language_confidence_threshold
+        self.language_detector = LanguageDetector()
+        self.extraction_scorer = ExtractionScorer()
+        
+        # Constrain responses to the form's JSON Schema; turned off for deployments that reject it
+        self.structured_outputs = structured_outputs
+        self._json_mode_deployments = set()
+        
+        # Cascade: try the small deployment first and escalate below this confidence
+        self.small_deployment_name = small_deployment_name or None
+        self.escalation_threshold = escalation_threshold
+        
+        # Token usage and prompt cache hits per deployment
+        self.usage_stats = usage_stats or get_usage_stats()
+    
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import AzureOpenAI
+
+                    self._client = AzureOpenAI(
+                        azure_endpoint=self.endpoint,
+                        api_key=self.key,
+                        api_version=self.api_version,
+                        timeout=self.timeout,
+                        max_retries=self.max_retries
+                    )
+        return self._client
+    
+    def warm_up(self) -> None:
+        """Create the client and build the extraction prompts ahead of the first request"""
+        _ = self.client
+        for language in ("en", "he"):
+            prefix_tokens = get_prefix_token_estimate(language)
+            if prefix_tokens < MIN_CACHEABLE_PREFIX_TOKENS:
+                logger.warning(f"The {language} extraction prompt prefix (~{prefix_tokens} tokens) is too short for prompt caching")
     
     def detect_language(self, ocr_text: str) -> str:
         """Detect if the document is filled in Hebrew or English based on meaningful content"""
+        return self.detect_language_with_confidence(ocr_text)[0]
+    
+    def detect_language_with_confidence(self, ocr_text: str) -> Tuple[str, float]:
+        """Detect the fill language together with a confidence between 0 and 1"""
         try:
-            # Words to ignore (system-generated from our OCR processing)
-            ignore_words = {'Key', 'Value', 'Pairs', 'unselected', 'selected', 'Raw', 'Lines'}
-            
-            # Look for meaningful English words (not just single letters or whitespace)
-            english_words = re.findall(r'\b[a-zA-Z]{2,}\b', ocr_text)
-            # Filter out ignored words (case-insensitive)
-            meaningful_words = [word for word in english_words if word not in ignore_words and len(word) >= 2]
-            meaningful_english = len(meaningful_words)
-            
-            # Look for Hebrew characters in meaningful context
-            hebrew_chars = len(re.findall(r'[\u0590-\u05FF]', ocr_text))
-            
-            # If we find meaningful English words, it's likely an English-filled form
-            if meaningful_english > 0:
-                return "en"
-            # If no meaningful English but Hebrew characters exist, it's Hebrew-filled
-            elif hebrew_chars > 0:
-                return "he"
-            else:
-                # Default to English if unclear
-                return "en"
-                
+            return self.language_detector.detect(ocr_text)
         except Exception as e:
             logger.warning(f"Error detecting language: {str(e)}, defaulting to English")
-            return "en"
+            return "en", 0.0
     
-    def call_openai_api(self, system_prompt: str, user_prompt: str, response_format: str = "json_object") -> Optional[str]:
+    def call_openai_api(self, system_prompt: str, user_prompt: str, response_format: str = "json_object",
+                        json_schema: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """Generic function to call Azure OpenAI API"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        return self.call_openai_messages(messages, response_format, json_schema)
+    
+    def call_openai_messages(self, messages: List[Dict[str, str]], response_format: str = "json_object",
+                             json_schema: Optional[Dict[str, Any]] = None, deployment_name: Optional[str] = None) -> Optional[str]:
+        """Call Azure OpenAI with prepared messages, recording token usage and cached prompt tokens"""
         try:
             # Prepare response format
-            format_param = {"type": response_format} if response_format == "json_object" else None
+            if response_format == "json_schema" and json_schema is not None:
+                format_param = {
+                    "type": "json_schema",
+                    "json_schema": {"name": "form_283", "strict": True, "schema": json_schema}
+                }
+            elif response_format == "json_object":
+                format_param = {"type": response_format}
+            else:
+                format_param = None
             
             # Call Azure OpenAI
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+            deployment_name = deployment_name or self.deployment_name
+            start = time.perf_counter()
+            response = self.breaker.call(
+                self.client.chat.completions.create,
+                model=deployment_name,
+                messages=messages,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
                 response_format=format_param
             )
             
+            if response.usage is not None:
+                self.usage_stats.record(deployment_name, response.usage, time.perf_counter() - start)
+            
             return response.choices[0].message.content
             
         except Exception as e:
             logger.error(f"Error calling OpenAI API: {str(e)}")
             raise e
     
-    def extract_fields(self, ocr_text: str, language: str = None) -> Optional[Dict[str, Any]]:
+    def extract_fields(self, ocr_text: str, language: str = None, deployment_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Extract form fields from OCR text using Azure OpenAI"""
         try:
             # Auto-detect language if not provided
@@ -80,34 +143,173 @@ class OpenAIService:
             
             logger.info(f"Processing document in language: {language}")
             
-            # Get the appropriate system prompt with schema
-            system_prompt = get_system_prompt(language)
+            # Shared system prompt first and OCR content last, so the prefix is served from the prompt cache
+            messages = build_extraction_messages(language, ocr_text)
             
-            # Create user prompt with OCR content
-            user_prompt = f"Extract the form fields from this OCR content:\n\n{ocr_text}"
+            json_schema = get_form_schema().json_schema(language)
+            result_json = self._parse_response(self.request_json(messages, json_schema, deployment_name))
             
-            # Call API using generic function
-            result_text = self.call_openai_api(system_prompt, user_prompt, "json_object")
+            # Ask again only for the fields the response is missing, instead of re-running the document
+            record = FormRecord.from_dict(result_json or {}, language)
+            key_paths = get_form_schema().key_paths[language]
+            missing_paths = [path for path, value in zip(key_paths, record.values) if value is None]
+            if missing_paths:
+                if not self._complete_missing_fields(record, ocr_text, missing_paths, deployment_name) and result_json is None:
+                    logger.error("Failed to extract fields from the OpenAI response")
+                    return None
+                result_json = record.to_dict()
             
-            # Parse the JSON response
-            try:
-                result_json = json.loads(result_text)
-                logger.info("Successfully extracted fields from document")
-                return result_json
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON from OpenAI response: {str(e)}")
-                logger.error(f"Raw response: {result_text}")
-                return None
+            logger.info("Successfully extracted fields from document")
+            return result_json
                 
         except Exception as e:
             logger.error(f"Error extracting fields: {str(e)}")
             raise e
     
-    def save_extracted_data(self, extracted_data: Dict[str, Any], output_path: str) -> None:
-        """Save extracted JSON data to file"""
+    def request_json(self, messages: List[Dict[str, str]], json_schema: Dict[str, Any],
+                     deployment_name: Optional[str] = None) -> Optional[str]:
+        """Call the API with structured outputs, falling back to JSON mode if the deployment does not support it"""
+        from openai import BadRequestError
+
+        deployment_name = deployment_name or self.deployment_name
+        if self.structured_outputs and deployment_name not in self._json_mode_deployments:
+            try:
+                return self.call_openai_messages(messages, "json_schema", json_schema, deployment_name)
+            except BadRequestError as e:
+                logger.warning(f"Structured outputs are not supported by {deployment_name}, using JSON mode: {str(e)}")
+                self._json_mode_deployments.add(deployment_name)
+        
+        return self.call_openai_messages(messages, "json_object", deployment_name=deployment_name)
+    
+    def _parse_response(self, result_text: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Parse a JSON response, repairing it locally when it is malformed"""
+        try:
+            result_json = loads(result_text)
+            if isinstance(result_json, dict):
+                return result_json
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Failed to parse JSON from OpenAI response: {str(e)}")
+        
+        result_json = repair_json(result_text)
+        if result_json is None:
+            logger.error(f"Raw response: {result_text}")
+        return result_json
+    
+    def _complete_missing_fields(self, record: FormRecord, ocr_text: str, missing_paths,
+                                 deployment_name: Optional[str] = None) -> bool:
+        """Fill the record's missing fields with one re-prompt for just those keys; unresolved ones become empty"""
+        logger.info(f"Response is missing {len(missing_paths)} fields, requesting only those")
+        template = build_template(missing_paths)
+        
+        try:
+            partial_json = self._parse_response(self.request_json(
+                build_extraction_messages(record.language, ocr_text, template),
+                build_json_schema(template),
+                deployment_name
+            ))
+        except Exception as e:
+            logger.error(f"Error requesting missing fields: {str(e)}")
+            partial_json = None
+        
+        partial = FormRecord.from_dict(partial_json or {}, record.language)
+        for path in missing_paths:
+            dotted_path = ".".join(path)
+            value = partial[dotted_path]
+            record[dotted_path] = value if value is not None else ""
+        return partial_json is not None
+    
+    def extract_fields_cascade(self, ocr_text: str, language: str) -> Optional[Dict[str, Any]]:
+        """Extract with the small deployment and escalate to the main one when the result's confidence is low"""
+        if not self.small_deployment_name:
+            return self.extract_fields(ocr_text, language)
+        
+        start = time.perf_counter()
+        try:
+            extracted_data = self.extract_fields(ocr_text, language, self.small_deployment_name)
+        except Exception as e:
+            logger.warning(f"Small model extraction failed, escalating: {str(e)}")
+            extracted_data = None
+        
+        score = self.extraction_scorer.confidence(extracted_data, language, ocr_text) if extracted_data else 0.0
+        if extracted_data is not None and score >= self.escalation_threshold:
+            self.usage_stats.record_tier("small", "accepted", score, time.perf_counter() - start)
+            return extracted_data
+        
+        self.usage_stats.record_tier("small", "escalated", score, time.perf_counter() - start)
+        logger.info(f"Small model confidence {score:.2f} is below {self.escalation_threshold}, escalating to {self.deployment_name}")
+        
+        start = time.perf_counter()
+        try:
+            extracted_data = self.extract_fields(ocr_text, language)
+        except Exception:
+            self.usage_stats.record_tier("large", "failed", 0.0, time.perf_counter() - start)
+            raise
+        
+        score = self.extraction_scorer.confidence(extracted_data, language, ocr_text) if extracted_data else 0.0
+        self.usage_stats.record_tier("large", "accepted" if extracted_data is not None else "failed", score, time.perf_counter() - start)
+        return extracted_data
+    
+    def extract_fields_with_language(self, ocr_text: str, detected: Optional[Tuple[str, float]] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Detect the language and extract fields, running both languages concurrently when detection is uncertain.
+
+        detected is a (language, confidence) pair found earlier, e.g. on the OCR text before
+        hints in other scripts were appended to it.
+        """
+        language, confidence = detected or self.detect_language_with_confidence(ocr_text)
+        
+        if not self.speculative_extraction or confidence >= self.language_confidence_threshold:
+            return self.extract_fields_cascade(ocr_text, language), language
+        
+        logger.info(f"Language detection confidence {confidence:.2f} is low, extracting in both languages")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {lang: executor.submit(self.extract_fields_cascade, ocr_text, lang) for lang in ("he", "en")}
+        
+        candidates, unavailable = {}, None
+        for lang, future in futures.items():
+            try:
+                candidates[lang] = future.result()
+            except CircuitOpenError as e:
+                unavailable = e
+                candidates[lang] = None
+            except Exception as e:
+                logger.error(f"Speculative {lang} extraction failed: {str(e)}")
+                candidates[lang] = None
+        if unavailable is not None and all(data is None for data in candidates.values()):
+            raise unavailable
+        
+        scores = {lang: self.extraction_scorer.score(data, lang) for lang, data in candidates.items()}
+        
+        # Prefer the detector's guess on a tie
+        best_language = max(scores, key=lambda lang: (scores[lang], lang == language))
+        logger.info(f"Speculative extraction scores: {scores}, selected {best_language}")
+        
+        if candidates[best_language] is None:
+            if all(data is None for data in candidates.values()):
+                return None, language
+            best_language = next(lang for lang, data in candidates.items() if data is not None)
+        
+        return candidates[best_language], best_language
+    
+    def extract_record(self, ocr_text: str, language: str = None) -> Optional[FormRecord]:
+        """Extract form fields into a compact FormRecord"""
+        if language is None:
+            language = self.detect_language(ocr_text)
+        
+        extracted_data = self.extract_fields(ocr_text, language)
+        return FormRecord.from_dict(extracted_data, language) if extracted_data is not None else None
+    
+    def get_usage_report(self) -> Dict[str, Any]:
+        """Usage and cache hit ratio per deployment, cascade tier stats and the estimated shared prefix length per language"""
+        report = self.usage_stats.report()
+        report["prefix_tokens"] = {language: get_prefix_token_estimate(language) for language in ("en", "he")}
+        report["min_cacheable_prefix_tokens"] = MIN_CACHEABLE_PREFIX_TOKENS
+        return report
+    
+    def save_extracted_data(self, extracted_data, output_path: str) -> None:
+        """Save extracted JSON data (dict or FormRecord) to file"""
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(extracted_data, f, ensure_ascii=False, indent=2)
+            with open(output_path, 'wb') as f:
+                f.write(dumps(as_dict(extracted_data), indent=True))
             logger.info(f"Extracted data saved to {output_path}")
         except Exception as e:
             logger.error(f"Error saving extracted data: {str(e)}")
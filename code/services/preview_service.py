@@ -0,0 +1,137 @@
+import io
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from utils.pdf_backend import PDF_LOCK, count_pdf_pages, find_pdf_backend
+
+logger = logging.getLogger(__name__)
+
+IMAGE_TYPES = ("image/jpeg", "image/jpg", "image/png")
+
+class PreviewService:
+    """Low-resolution page thumbnails rendered server-side, cached per document hash.
+
+    The browser receives one small JPEG for the page being viewed instead of the whole
+    document. Thumbnails and page counts are kept in an LRU bounded by total bytes.
+    PDFs need pypdfium2 or PyMuPDF; without them, or above max_file_size, the UI
+    offers the file as a download instead.
+    """
+
+    def __init__(self, thumbnail_width: int = 800, max_cache_bytes: int = 64 * 1024 * 1024,
+                 max_file_size: int = 50 * 1024 * 1024, jpeg_quality: int = 80):
+        self.thumbnail_width = thumbnail_width
+        self.max_cache_bytes = max_cache_bytes
+        self.max_file_size = max_file_size
+        self.jpeg_quality = jpeg_quality
+        self.pdf_backend = find_pdf_backend()
+
+        self._thumbnails: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+        self._page_counts = {}
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        # PDFium is not thread-safe, and rendering is bounded by CPU anyway
+        self._render_lock = PDF_LOCK
+
+    def can_preview(self, content_type: str, file_size: int) -> bool:
+        if file_size > self.max_file_size:
+            return False
+        if content_type == "application/pdf":
+            return self.pdf_backend is not None
+        return content_type in IMAGE_TYPES
+
+    def page_count(self, document_hash: str, data, content_type: str) -> int:
+        if content_type != "application/pdf":
+            return 1
+        with self._lock:
+            if document_hash in self._page_counts:
+                return self._page_counts[document_hash]
+        data = self._load(data)
+        with self._render_lock:
+            count = self._count_pages(bytes(data))
+        with self._lock:
+            self._page_counts[document_hash] = count
+        return count
+
+    def thumbnail(self, document_hash: str, data, content_type: str, page_index: int = 0) -> Optional[bytes]:
+        """JPEG of one page, rendered on the first request for that document and page.
+
+        data may be any bytes-like object, or a callable returning one so that a file kept on
+        disk is only read when the page is not cached.
+        """
+        key = (document_hash, page_index)
+        with self._lock:
+            cached = self._thumbnails.get(key)
+            if cached is not None:
+                self._thumbnails.move_to_end(key)
+                return cached
+
+        try:
+            data = self._load(data)
+            with self._render_lock:
+                if content_type == "application/pdf":
+                    image = self._render_pdf_page(bytes(data), page_index)
+                else:
+                    image = self._open_image(bytes(data))
+                thumbnail = self._encode(image)
+        except Exception as e:
+            logger.error(f"Error rendering preview of {document_hash[:12]} page {page_index + 1}: {str(e)}")
+            return None
+
+        self._store(key, thumbnail)
+        return thumbnail
+
+    @staticmethod
+    def _load(data):
+        return data() if callable(data) else data
+
+    def _store(self, key: Tuple[str, int], thumbnail: bytes) -> None:
+        with self._lock:
+            if key in self._thumbnails:
+                return
+            self._thumbnails[key] = thumbnail
+            self._cache_bytes += len(thumbnail)
+            while self._cache_bytes > self.max_cache_bytes and len(self._thumbnails) > 1:
+                (evicted_hash, _), evicted = self._thumbnails.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+                if not any(document_hash == evicted_hash for document_hash, _ in self._thumbnails):
+                    self._page_counts.pop(evicted_hash, None)
+
+    def _count_pages(self, data: bytes) -> int:
+        return count_pdf_pages(data, self.pdf_backend)
+
+    def _render_pdf_page(self, data: bytes, page_index: int):
+        """PIL image of one page, scaled to the thumbnail width"""
+        if self.pdf_backend == "pypdfium2":
+            import pypdfium2 as pdfium
+
+            pdf = pdfium.PdfDocument(data)
+            try:
+                page = pdf[page_index]
+                bitmap = page.render(scale=self.thumbnail_width / page.get_width())
+                return bitmap.to_pil()
+            finally:
+                pdf.close()
+
+        import fitz
+        from PIL import Image
+
+        with fitz.open(stream=data, filetype="pdf") as pdf:
+            page = pdf[page_index]
+            zoom = self.thumbnail_width / page.rect.width
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+    def _open_image(self, data: bytes):
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(data))
+        # Decode at reduced size where the format allows it (JPEG), instead of at full resolution
+        image.draft("RGB", (self.thumbnail_width, self.thumbnail_width * 2))
+        image.thumbnail((self.thumbnail_width, self.thumbnail_width * 2))
+        return image
+
+    def _encode(self, image) -> bytes:
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, format="JPEG", quality=self.jpeg_quality, optimize=True)
+        return buffer.getvalue()
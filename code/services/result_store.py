@@ -0,0 +1,231 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
+from utils.form_record import FormRecord
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StoredResult:
+    result_id: int
+    document_hash: str
+    file_name: str
+    detected_language: str
+    id_number: str
+    date_of_injury: str
+    extracted_data: Dict[str, Any]
+    timings: Dict[str, float]
+    ocr_confidence: Optional[float]
+    metrics: Optional[Dict[str, Any]]
+    created_at: float
+
+def extract_index_fields(extracted_data, detected_language: str):
+    """ID number and ISO date of injury (YYYY-MM-DD, empty if incomplete) used as index keys"""
+    record = extracted_data if isinstance(extracted_data, FormRecord) else FormRecord.from_dict(extracted_data, detected_language)
+
+    id_number = str(record.get_field("idNumber") or "").strip()
+
+    day = str(record.get_field("dateOfInjury.day") or "").strip()
+    month = str(record.get_field("dateOfInjury.month") or "").strip()
+    year = str(record.get_field("dateOfInjury.year") or "").strip()
+    if day.isdigit() and month.isdigit() and year.isdigit() and len(year) == 4:
+        date_of_injury = f"{year}-{int(month):02d}-{int(day):02d}"
+    else:
+        date_of_injury = ""
+
+    return id_number, date_of_injury
+
+class ResultStore(ABC):
+    """Persistent store of extraction results, keyed by the hash of the document bytes"""
+
+    @abstractmethod
+    def save(self, document_hash: str, file_name: str, extracted_data, detected_language: str,
+             timings: Optional[Dict[str, float]] = None, ocr_confidence: Optional[float] = None,
+             signature: Optional[bytes] = None, numbers: Optional[List[str]] = None) -> int:
+        """Insert or replace the result of a document, with its near-duplicate signature in the same write"""
+
+    @abstractmethod
+    def get_by_hash(self, document_hash: str) -> Optional[StoredResult]:
+        ...
+
+    @abstractmethod
+    def find_by_id_number(self, id_number: str, limit: int = 100) -> List[StoredResult]:
+        ...
+
+    @abstractmethod
+    def find_by_date_of_injury(self, date_from: str, date_to: Optional[str] = None, limit: int = 100) -> List[StoredResult]:
+        ...
+
+    @abstractmethod
+    def update_metrics(self, document_hash: str, metrics: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def get_signatures(self, after_id: int = 0) -> List[Tuple[int, str, bytes, List[str]]]:
+        """(result id, document hash, MinHash signature, numeric tokens) of results newer than after_id"""
+
+    def close(self) -> None:
+        pass
+
+class SQLiteResultStore(ResultStore):
+    """SQLite in WAL mode, so API workers and job processes can read while one of them writes"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            document_hash TEXT NOT NULL,
+            file_name TEXT,
+            detected_language TEXT,
+            id_number TEXT,
+            date_of_injury TEXT,
+            extracted_json TEXT NOT NULL,
+            timings_json TEXT,
+            ocr_confidence REAL,
+            metrics_json TEXT,
+            minhash BLOB,
+            numeric_tokens TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_results_document_hash ON results(document_hash);
+        CREATE INDEX IF NOT EXISTS idx_results_id_number ON results(id_number);
+        CREATE INDEX IF NOT EXISTS idx_results_date_of_injury ON results(date_of_injury);
+    """
+
+    COLUMNS = (
+        "id, document_hash, file_name, detected_language, id_number, date_of_injury, "
+        "extracted_json, timings_json, ocr_confidence, metrics_json, created_at"
+    )
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(self.SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add columns introduced after the database was created"""
+        existing = {row[1] for row in self._connection.execute("PRAGMA table_info(results)")}
+        with self._connection:
+            for column, column_type in (("minhash", "BLOB"), ("numeric_tokens", "TEXT")):
+                if column not in existing:
+                    self._connection.execute(f"ALTER TABLE results ADD COLUMN {column} {column_type}")
+
+    def save(self, document_hash: str, file_name: str, extracted_data, detected_language: str,
+             timings: Optional[Dict[str, float]] = None, ocr_confidence: Optional[float] = None,
+             signature: Optional[bytes] = None, numbers: Optional[List[str]] = None) -> int:
+        id_number, date_of_injury = extract_index_fields(extracted_data, detected_language)
+        extracted_dict = extracted_data.to_dict() if isinstance(extracted_data, FormRecord) else extracted_data
+        now = time.time()
+
+        with self._lock, self._connection:
+            # A resubmitted document replaces its earlier extraction. The signature is written in
+            # the same statement, so get_signatures never sees the row without it
+            self._connection.execute(
+                """
+                INSERT INTO results (document_hash, file_name, detected_language, id_number, date_of_injury,
+                                     extracted_json, timings_json, ocr_confidence, minhash, numeric_tokens,
+                                     created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(document_hash) DO UPDATE SET
+                    file_name = excluded.file_name,
+                    detected_language = excluded.detected_language,
+                    id_number = excluded.id_number,
+                    date_of_injury = excluded.date_of_injury,
+                    extracted_json = excluded.extracted_json,
+                    timings_json = excluded.timings_json,
+                    ocr_confidence = excluded.ocr_confidence,
+                    metrics_json = NULL,
+                    minhash = excluded.minhash,
+                    numeric_tokens = excluded.numeric_tokens,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    document_hash, file_name, detected_language, id_number, date_of_injury,
+                    json.dumps(extracted_dict, ensure_ascii=False), json.dumps(timings or {}), ocr_confidence,
+                    signature, json.dumps(sorted(numbers)) if signature is not None else None, now, now
+                )
+            )
+            return self._connection.execute(
+                "SELECT id FROM results WHERE document_hash = ?", (document_hash,)
+            ).fetchone()[0]
+
+    def get_by_hash(self, document_hash: str) -> Optional[StoredResult]:
+        rows = self._query(f"SELECT {self.COLUMNS} FROM results WHERE document_hash = ?", (document_hash,))
+        return rows[0] if rows else None
+
+    def find_by_id_number(self, id_number: str, limit: int = 100) -> List[StoredResult]:
+        return self._query(
+            f"SELECT {self.COLUMNS} FROM results WHERE id_number = ? ORDER BY created_at DESC LIMIT ?",
+            (id_number, limit)
+        )
+
+    def find_by_date_of_injury(self, date_from: str, date_to: Optional[str] = None, limit: int = 100) -> List[StoredResult]:
+        """Results with an injury date in [date_from, date_to], both ISO YYYY-MM-DD"""
+        return self._query(
+            f"SELECT {self.COLUMNS} FROM results WHERE date_of_injury BETWEEN ? AND ? "
+            "ORDER BY date_of_injury, created_at LIMIT ?",
+            (date_from, date_to or date_from, limit)
+        )
+
+    def update_metrics(self, document_hash: str, metrics: Dict[str, Any]) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE results SET metrics_json = ?, updated_at = ? WHERE document_hash = ?",
+                (json.dumps(metrics), time.time(), document_hash)
+            )
+
+    def get_signatures(self, after_id: int = 0) -> List[Tuple[int, str, bytes, List[str]]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, document_hash, minhash, numeric_tokens FROM results "
+                "WHERE id > ? AND minhash IS NOT NULL ORDER BY id",
+                (after_id,)
+            ).fetchall()
+        return [(row[0], row[1], row[2], json.loads(row[3] or "[]")) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _query(self, sql: str, params: tuple) -> List[StoredResult]:
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        return [self._to_result(row) for row in rows]
+
+    @staticmethod
+    def _to_result(row) -> StoredResult:
+        return StoredResult(
+            result_id=row[0],
+            document_hash=row[1],
+            file_name=row[2],
+            detected_language=row[3],
+            id_number=row[4],
+            date_of_injury=row[5],
+            extracted_data=json.loads(row[6]),
+            timings=json.loads(row[7]) if row[7] else {},
+            ocr_confidence=row[8],
+            metrics=json.loads(row[9]) if row[9] else None,
+            created_at=row[10]
+        )
+
+def create_result_store(config) -> Optional[ResultStore]:
+    if config.result_store_backend == "none" or not config.result_store_path:
+        return None
+    if config.result_store_backend != "sqlite":
+        logger.warning(f"Unknown result store backend '{config.result_store_backend}', using SQLite")
+    try:
+        return SQLiteResultStore(config.result_store_path)
+    except Exception as e:
+        logger.error(f"Error opening result store: {str(e)}")
+        return None
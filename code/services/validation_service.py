@@ -6,6 +6,8 @@ from dataclasses import dataclass
 from .openai_service import OpenAIService
 from prompts.validation_judge_prompt import VALIDATION_JUDGE_PROMPT
 from utils.message_types import MessageType
+from utils.form_record import FormRecord, as_dict
+from utils.form_schema import load_templates
 
 logger = logging.getLogger(__name__)
 
@@ -25,9 +27,6 @@ class ValidationService:
     def __init__(self, openai_service: OpenAIService):
         self.openai_service = openai_service
         
-        # Load template schemas
-        self.templates = self._load_templates()
-        
         # Define field categories
         self.date_fields = [
             "dateOfBirth", "dateOfInjury", "formFillingDate", "formReceiptDateAtClinic",
@@ -43,23 +42,10 @@ class ValidationService:
             "מין", "מקום התאונה", "חבר בקופת חולים"
         ]
     
-    def _load_templates(self) -> Dict[str, Dict[str, Any]]:
-        """Load template schemas for validation"""
-        templates = {}
-        try:
-            # Load English template
-            with open("templates/empty_json_en.json", "r", encoding="utf-8") as f:
-                templates["en"] = json.load(f)
-            
-            # Load Hebrew template
-            with open("templates/empty_json_he.json", "r", encoding="utf-8") as f:
-                templates["he"] = json.load(f)
-                
-        except Exception as e:
-            logger.error(f"Error loading templates: {str(e)}")
-            templates = {"en": {}, "he": {}}
-            
-        return templates
+    @property
+    def templates(self) -> Dict[str, Dict[str, Any]]:
+        """Template schemas for validation, from the process-wide asset registry"""
+        return load_templates()
     
     def validate_json_file(self, json_content: str, get_text_func, expected_extraction_language: str = None) -> Tuple[Dict[str, Any], str, MessageType]:
         """Validate uploaded JSON file against template schema"""
@@ -103,6 +89,17 @@ class ValidationService:
         except Exception as e:
             return None, f"{get_text('validation_error')}: {str(e)}", MessageType.ERROR
     
+    def validate_structure(self, data: Dict[str, Any]) -> Tuple[bool, str]:
+        """Validate a parsed JSON object against the template of its detected language"""
+        if not isinstance(data, dict):
+            return False, "JSON must be an object/dictionary"
+        
+        template = self.templates.get(self.detect_json_language(data), {})
+        if not template:
+            return False, "No template available for detected language"
+        
+        return self._validate_structure(data, template)
+    
     def _validate_structure(self, data: Dict[str, Any], template: Dict[str, Any]) -> Tuple[bool, str]:
         """Validate JSON structure against template schema"""
         def check_structure(actual, expected, path=""):
@@ -140,6 +137,9 @@ class ValidationService:
     
     def detect_json_language(self, json_data: Dict[str, Any]) -> str:
         """Detect if JSON uses Hebrew or English field names"""
+        if isinstance(json_data, FormRecord):
+            return json_data.language
+        
         hebrew_keys = ["שם משפחה", "שם פרטי", "מספר זהות", "מין"]
         english_keys = ["firstName", "lastName", "idNumber", "gender"]
         
@@ -197,6 +197,10 @@ class ValidationService:
     
     def _flatten_json(self, json_data: Dict[str, Any], parent_key: str = "") -> Dict[str, Any]:
         """Flatten nested JSON structure"""
+        if isinstance(json_data, FormRecord):
+            # Records are already flat, in schema order
+            return json_data.flatten()
+        
         items = []
         for key, value in json_data.items():
             new_key = f"{parent_key}.{key}" if parent_key else key
@@ -251,6 +255,8 @@ class ValidationService:
         """Calculate structure compliance percentage accounting for both missing and extra fields"""
         def get_structure_keys(data, path=""):
             """Get all structural keys (field names) from nested dict"""
+            if isinstance(data, FormRecord):
+                return data.structure_keys()
             keys = set()
             for key, value in data.items():
                 current_path = f"{path}.{key}" if path else key
@@ -294,10 +300,10 @@ class ValidationService:
             # Prepare the evaluation prompt
             user_prompt = f"""
 EXPECTED_JSON:
-{json.dumps(expected, ensure_ascii=False, indent=2)}
+{json.dumps(as_dict(expected), ensure_ascii=False, indent=2)}
 
 EXTRACTED_JSON:
-{json.dumps(extracted, ensure_ascii=False, indent=2)}
+{json.dumps(as_dict(extracted), ensure_ascii=False, indent=2)}
 
 CALCULATED_METRICS:
 - Overall Accuracy: {metrics.overall_accuracy:.1f}%
@@ -34,5 +34,37 @@ COMMON_TEXTS = {
     "he": {
         "en": "Hebrew", 
         "he": "עברית"
+    },
+    "session_memory_title": {
+        "en": "Session memory",
+        "he": "זיכרון הפעלות"
+    },
+    "session_memory_total": {
+        "en": "In memory",
+        "he": "בזיכרון"
+    },
+    "session_disk_total": {
+        "en": "Spilled to disk",
+        "he": "הועבר לדיסק"
+    },
+    "column_session": {
+        "en": "Session",
+        "he": "הפעלה"
+    },
+    "column_entries": {
+        "en": "Entries",
+        "he": "פריטים"
+    },
+    "column_memory": {
+        "en": "Memory",
+        "he": "זיכרון"
+    },
+    "column_disk": {
+        "en": "Disk",
+        "he": "דיסק"
+    },
+    "column_idle": {
+        "en": "Idle",
+        "he": "לא פעיל"
     }
-}
\ No newline at end of file
+}
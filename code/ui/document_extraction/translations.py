@@ -3,6 +3,10 @@ DOCUMENT_EXTRACTION_TEXTS = {
         "en": "Choose a file",
         "he": "בחר קובץ"
     },
+    "remove_file": {
+        "en": "Remove this file",
+        "he": "הסר קובץ זה"
+    },
     "process_button": {
         "en": "Start Processing",
         "he": "התחל עיבוד"
@@ -58,5 +62,97 @@ DOCUMENT_EXTRACTION_TEXTS = {
     "image_preview_not_available": {
         "en": "Image preview not available, but file can still be processed.",
         "he": "תצוגה מקדימה של תמונה אינה זמינה, אך הקובץ עדיין יכול להיות מעובד."
+    },
+    "select_preview_file": {
+        "en": "File to preview",
+        "he": "קובץ לתצוגה מקדימה"
+    },
+    "select_result": {
+        "en": "Show results for",
+        "he": "הצג תוצאות עבור"
+    },
+    "batch_progress": {
+        "en": "Processing Progress",
+        "he": "התקדמות העיבוד"
+    },
+    "column_file": {
+        "en": "File",
+        "he": "קובץ"
+    },
+    "column_status": {
+        "en": "Status",
+        "he": "סטטוס"
+    },
+    "column_stage": {
+        "en": "Stage",
+        "he": "שלב"
+    },
+    "column_language": {
+        "en": "Language",
+        "he": "שפה"
+    },
+    "column_elapsed": {
+        "en": "Elapsed",
+        "he": "זמן"
+    },
+    "status_queued": {
+        "en": "Queued",
+        "he": "בתור"
+    },
+    "status_running": {
+        "en": "Running",
+        "he": "בעיבוד"
+    },
+    "status_completed": {
+        "en": "Completed",
+        "he": "הושלם"
+    },
+    "status_failed": {
+        "en": "Failed",
+        "he": "נכשל"
+    },
+    "stage_validate": {
+        "en": "Validating file",
+        "he": "בדיקת קובץ"
+    },
+    "stage_ocr": {
+        "en": "OCR",
+        "he": "זיהוי טקסט"
+    },
+    "stage_preprocess": {
+        "en": "Preprocessing",
+        "he": "עיבוד מקדים"
+    },
+    "stage_extract": {
+        "en": "Extracting fields",
+        "he": "חילוץ שדות"
+    },
+    "stage_deferred": {
+        "en": "Waiting for Azure service",
+        "he": "ממתין לשירות Azure"
+    },
+    "download_zip": {
+        "en": "Download all (ZIP)",
+        "he": "הורד הכל (ZIP)"
+    },
+    "download_jsonl": {
+        "en": "Download all (JSONL)",
+        "he": "הורד הכל (JSONL)"
+    },
+    "download_parquet": {
+        "en": "Download all (Parquet)",
+        "he": "הורד הכל (Parquet)"
+    },
+    "preview_page": {
+        "en": "Page",
+        "he": "עמוד"
+    },
+    "preview_download_only": {
+        "en": "Preview is not available for this file; it can still be downloaded and processed.",
+        "he": "תצוגה מקדימה אינה זמינה עבור קובץ זה; עדיין ניתן להוריד ולעבד אותו."
+    },
+    "download_original": {
+        "en": "Download file",
+        "he": "הורד קובץ"
     }
-}
\ No newline at end of file
+}
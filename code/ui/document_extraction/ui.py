@@ -1,75 +1,105 @@
 import streamlit as st
-import os
-import json
+import io
+import zipfile
+import functools
 from pathlib import Path
-from services.document_intelligence_service import DocumentIntelligenceService
-from services.openai_service import OpenAIService
-from utils.file_validator import FileValidator
-from utils.text_preprocessor import TextPreprocessor
-from .translations import DOCUMENT_EXTRACTION_TEXTS
+from jobs import JobManager, JobStatus
+from services.document_processing_service import DocumentProcessingService
+from services.preview_service import IMAGE_TYPES, PreviewService
+from utils.form_record import FormRecord, dumps
+from utils.result_exporter import build_export_row, rows_to_parquet_bytes
+from ui.session import (
+    RESULTS_KEY, VALIDATION_KEY, current_session_id, get_batch_results, get_selected_result,
+    get_session_store, remove_upload, store_uploads
+)
+
+
+@st.cache_resource
+def get_job_manager(_config):
+    """One job manager per server process, shared by all sessions and surviving reruns"""
+    return JobManager(_config)
+
+
+@st.cache_resource
+def get_processing_service(_config):
+    """One processing service per server process, so its result store connection and layout are opened once"""
+    return DocumentProcessingService(_config)
+
+
+@st.cache_resource
+def get_preview_service(_config):
+    """One thumbnail cache per server process, shared by all sessions"""
+    return PreviewService(
+        thumbnail_width=_config.preview_thumbnail_width,
+        max_cache_bytes=_config.preview_cache_mb * 1024 * 1024,
+        max_file_size=_config.preview_max_file_mb * 1024 * 1024
+    )
 
 
 class DocumentExtractorUI:
     """UI component for document data extraction"""
     
-    def __init__(self, config, get_common_text_func):
+    def __init__(self, config, get_text):
         self.config = config
-        self.get_common_text = get_common_text_func
-        self.file_validator = FileValidator(self.config)
-        self.text_preprocessor = TextPreprocessor()
-        
-        # Initialize services
-        self.ocr_service = None
-        self.openai_service = None
-        
-        if self.config.azure_document_intelligence_endpoint and self.config.azure_document_intelligence_key:
-            self.ocr_service = DocumentIntelligenceService(
-                self.config.azure_document_intelligence_endpoint,
-                self.config.azure_document_intelligence_key
-            )
+        # Resolver over this component's and the common texts, bound to the session's language
+        self.get_text = get_text
         
-        if self.config.azure_openai_endpoint and self.config.azure_openai_key:
-            self.openai_service = OpenAIService(
-                self.config.azure_openai_endpoint,
-                self.config.azure_openai_key,
-                self.config.azure_openai_deployment_name,
-                self.config.azure_openai_api_version,
-                self.config.azure_openai_max_tokens,
-                self.config.azure_openai_temperature
-            )
-    
-    def get_text(self, key):
-        """Get text for this component, with fallback to common texts"""
-        language = st.session_state.get('language', 'en')
+        # Services are shared with the HTTP API through the processing service
+        self.processing_service = get_processing_service(self.config)
+        self.file_validator = self.processing_service.file_validator
+        self.text_preprocessor = self.processing_service.text_preprocessor
+        self.ocr_service = self.processing_service.ocr_service
+        self.openai_service = self.processing_service.openai_service
         
-        # First try component-specific texts
-        if key in DOCUMENT_EXTRACTION_TEXTS:
-            return DOCUMENT_EXTRACTION_TEXTS[key].get(language, DOCUMENT_EXTRACTION_TEXTS[key].get("en", ""))
-        
-        # Fallback to common texts
-        return self.get_common_text(key)
+        # Documents are processed in the background so the script thread is never blocked
+        self.job_manager = get_job_manager(self.config)
+        self.preview_service = get_preview_service(self.config)
+        # Uploads, results and exports live in the process-wide session store, not in st.session_state
+        self.session_store = get_session_store(self.config)
     
-    def render_extraction_interface(self):
+    def render_extraction_interface(self, poll_interval_seconds: float = 1.0):
         """Render the document extraction interface"""
+        self._render_upload_and_preview()
+        
+        # While jobs run, only the progress table reruns, on a timer, instead of the whole page
+        batch_jobs = st.session_state.get('batch_jobs')
+        if batch_jobs is None:
+            batch_jobs = self._restore_batch_jobs()
+        if batch_jobs:
+            run_every = poll_interval_seconds if self._has_pending_jobs(batch_jobs) else None
+            st.fragment(self._render_batch_progress, run_every=run_every)()
+    
+    @st.fragment
+    def _render_upload_and_preview(self):
+        """Uploader, process button and preview; choosing files or a preview page reruns only this section"""
         # Create two columns layout
         controls_col, preview_col = st.columns([1, 1])
         
         with controls_col:
             st.subheader(self.get_text("file_upload_controls"))
             
-            uploaded_file = st.file_uploader(
+            uploader_key = f"file_uploader_{st.session_state.get('uploader_generation', 0)}"
+            st.file_uploader(
                 self.get_text("upload_label"),
                 type=['pdf', 'jpg', 'jpeg', 'png'],
-                key="file_uploader",
-                accept_multiple_files=False
+                key=uploader_key,
+                accept_multiple_files=True,
+                on_change=self._store_uploads,
+                args=(uploader_key,)
             )
             
-            # Store uploaded file in session state to persist across language changes
-            if uploaded_file is not None:
-                st.session_state['uploaded_file'] = uploaded_file
-            
-            # Use file from session state if available
-            current_file = st.session_state.get('uploaded_file', uploaded_file)
+            # Use stored files if available; they are gone once an idle session was evicted
+            current_files = [f for f in st.session_state.get('uploaded_files', []) if f.available]
+            for f in current_files:
+                name_col, remove_col = st.columns([0.9, 0.1])
+                name_col.caption(f"{f.name} ({f.size:,} bytes)")
+                remove_col.button(
+                    "✕",
+                    key=f"remove_upload_{f.file_hash}",
+                    help=self.get_text("remove_file"),
+                    on_click=self._remove_upload,
+                    args=(f,)
+                )
             
             # Create columns for button and spinner (always visible)
             btn_col, spinner_col = st.columns([0.2, 0.8])
@@ -79,152 +109,362 @@ class DocumentExtractorUI:
             
             if process_clicked:
                 with spinner_col:
-                    self._process_document(current_file)
+                    if self._process_documents(current_files):
+                        # The progress table lives outside this fragment
+                        st.rerun(scope="app")
+            
+            for message in st.session_state.get('rejected_files', []):
+                st.error(message)
         
         with preview_col:
             st.subheader(self.get_text("file_preview"))
             
-            # Use the same current_file logic for preview
-            current_file = st.session_state.get('uploaded_file', uploaded_file)
-            
-            if current_file is not None:
-                self._display_file_preview(current_file)
+            if current_files:
+                if len(current_files) > 1:
+                    preview_index = st.selectbox(
+                        self.get_text("select_preview_file"),
+                        options=range(len(current_files)),
+                        format_func=lambda i: current_files[i].name,
+                        key="preview_file_selector"
+                    )
+                else:
+                    preview_index = 0
+                self._display_file_preview(current_files[preview_index])
             else:
                 st.info(self.get_text("upload_file_preview"))
     
-    def _process_document(self, current_file):
-        """Process the uploaded document"""
-        if current_file is None:
-            st.warning(self.get_common_text("error_file"))
+    def _store_uploads(self, uploader_key):
+        """Keep new uploads in the session store, so they persist across language changes.
+
+        The uploader then gets a new key, which makes the widget drop its own copy of the files.
+        """
+        uploaded_files = st.session_state.get(uploader_key)
+        if not uploaded_files:
+            return
+        st.session_state['uploaded_files'] = store_uploads(
+            self.session_store, uploaded_files, st.session_state.get('uploaded_files', [])
+        )
+        st.session_state['uploader_generation'] = st.session_state.get('uploader_generation', 0) + 1
+    
+    def _remove_upload(self, session_file):
+        st.session_state['uploaded_files'] = remove_upload(st.session_state.get('uploaded_files', []), session_file)
+    
+    def _process_documents(self, current_files) -> bool:
+        """Submit every uploaded document as a background job, returning whether a batch was queued"""
+        if not current_files:
+            st.warning(self.get_text("error_file"))
         elif not self.ocr_service:
-            st.error(self.get_common_text("error_config"))
+            st.error(self.get_text("error_config"))
         elif not self.openai_service:
-            st.error(self.get_common_text("error_openai_config"))
+            st.error(self.get_text("error_openai_config"))
         else:
+            # Rejected files never reach a worker or the OCR service
+            language = st.session_state.get("language", self.config.default_language)
+            batch_jobs, rejected = [], []
             try:
-                with st.spinner(self.get_text("processing")):
-                    temp_file_path = self._save_uploaded_file(current_file)
-                    
-                    if self.file_validator.validate_file(temp_file_path):
-                        # Step 1: OCR Processing
-                        ocr_result = self.ocr_service.analyze_document(temp_file_path)
-                        ocr_text_result = self.ocr_service.convert_result_to_text(ocr_result)
-                        
-                        # Save OCR output - optional for debugging
-                        # ocr_output_filename = f"{Path(current_file.name).stem}_ocr_output.txt"
-                        # ocr_output_path = os.path.join("outputs", ocr_output_filename)
-                        # os.makedirs("outputs", exist_ok=True)
-                        # self.ocr_service.save_ocr_output(ocr_text_result, ocr_output_path)
+                for f in current_files:
+                    # One read of the stored upload for the check, its hash and the job's file;
+                    # the worker reuses the check instead of validating and hashing again
+                    data = f.getvalue()
+                    check = self.file_validator.check_bytes(data, f.name, compute_hash=True)
+                    if check.ok:
+                        batch_jobs.append({"job_id": self.job_manager.submit(data, f.name, check), "file_name": f.name})
+                    else:
+                        rejected.append(f"{f.name}: {self.file_validator.get_message(check, language)}")
+                # Shown by the upload fragment, so the messages outlive the rerun that starts the batch
+                st.session_state['rejected_files'] = rejected
+                if not batch_jobs:
+                    return False
                 
-                # Step 2: Text Preprocessing
-                preprocessed_text = self.text_preprocessor.preprocess_text(ocr_text_result)
+                # A new batch replaces the previous results and their validation
+                self._reset_batch_results()
+                st.session_state['batch_jobs'] = batch_jobs
                 
-                # Step 3: LLM Field Extraction
-                with st.spinner(self.get_text("llm_processing")):
-                    detected_language = self.openai_service.detect_language(preprocessed_text)
-                    extracted_data = self.openai_service.extract_fields(preprocessed_text, detected_language)
-                    
-                    if extracted_data:
-                        # Store in session state for validation
-                        st.session_state['extracted_data'] = extracted_data
-                        st.session_state['detected_language'] = detected_language
-                        
-                        # Save extracted JSON - optional for debugging
-                        # json_output_filename = f"{Path(current_file.name).stem}_extracted.json"
-                        # json_output_path = os.path.join("outputs", json_output_filename)
-                        # self.openai_service.save_extracted_data(extracted_data, json_output_path)
-                        
-                        st.success(self.get_text("llm_success"))
-                        st.info(f"{self.get_text('language_detected')}: {self.get_common_text(detected_language)}")
-                        
-                    else:
-                        st.error("Failed to extract fields from document")
-                    
-                    os.unlink(temp_file_path)
+                # Keep the job IDs in the URL too, so a browser refresh can resume polling
+                st.query_params['jobs'] = ",".join(entry["job_id"] for entry in batch_jobs)
+                return True
                 
             except Exception as e:
                 st.error(f"Error: {str(e)}")
+        return False
     
-    def _display_file_preview(self, uploaded_file):
-        """Display preview of uploaded file (PDF or image)"""
-        file_type = uploaded_file.type
+    def _restore_batch_jobs(self):
+        """Rebuild the batch from the job IDs in the URL after a browser refresh"""
+        job_ids = [job_id for job_id in st.query_params.get('jobs', "").split(",") if job_id]
+        batch_jobs = []
+        for job_id in job_ids:
+            job = self.job_manager.get_job(job_id)
+            if job is not None:
+                batch_jobs.append({"job_id": job_id, "file_name": job.file_name})
         
-        if file_type == "application/pdf":
-            self._display_pdf_preview(uploaded_file)
-        elif file_type in ["image/jpeg", "image/jpg", "image/png"]:
-            self._display_image_preview(uploaded_file)
-        else:
-            st.warning("Preview not available for this file type")
+        st.session_state['batch_jobs'] = batch_jobs
+        self._reset_batch_results()
+        return batch_jobs
     
-    def _display_pdf_preview(self, uploaded_file):
-        """Display PDF preview using base64 embedding"""
-        try:
-            import base64
-            
-            # Read PDF bytes
-            pdf_bytes = uploaded_file.getvalue()
-            base64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
+    def _reset_batch_results(self):
+        session_id = current_session_id()
+        self.session_store.pop(session_id, RESULTS_KEY)
+        self.session_store.pop(session_id, VALIDATION_KEY)
+        st.session_state.pop('selected_result', None)
+    
+    def _has_pending_jobs(self, batch_jobs) -> bool:
+        batch_results = get_batch_results(self.session_store)
+        for entry in batch_jobs:
+            if entry["job_id"] in batch_results:
+                continue
+            job = self.job_manager.get_job(entry["job_id"])
+            if job is not None and not job.is_finished:
+                return True
+        return False
+    
+    def _render_batch_progress(self):
+        """Show a live progress table for the current batch, collecting results as jobs finish"""
+        batch_jobs = st.session_state['batch_jobs']
+        # Copied, so the store re-accounts the size of the results when new ones are added
+        batch_results = dict(get_batch_results(self.session_store))
+        collected = len(batch_results)
+        rows = []
+        finished_count = 0
+        
+        for entry in batch_jobs:
+            job_id = entry["job_id"]
+            job = self.job_manager.get_job(job_id)
             
-            # Display PDF in embedded viewer
-            pdf_display = f"""
-            <iframe
-                src="data:application/pdf;base64,{base64_pdf}"
-                width="100%"
-                height="500"
-                type="application/pdf"
-                style="border: 1px solid #e1e5e9; border-radius: 0.5rem;">
-            </iframe>
-            """
+            if job is None:
+                # Job records can expire; results already collected are kept
+                status = JobStatus.COMPLETED if job_id in batch_results else JobStatus.FAILED
+                stage, elapsed = "", 0.0
+            else:
+                status, elapsed = job.status, job.elapsed
+                stage = self.get_text(f"stage_{job.stage}") if job.stage else ""
+                if job.status == JobStatus.COMPLETED and job_id not in batch_results:
+                    batch_results[job_id] = {
+                        "file_name": job.file_name,
+                        "extracted_data": FormRecord.from_dict(
+                            job.result["extracted_data"], job.result["detected_language"]
+                        ),
+                        "detected_language": job.result["detected_language"],
+                        "timings": job.result.get("timings"),
+                        "elapsed": job.result.get("elapsed"),
+                        "ocr_confidence": job.result.get("ocr_confidence"),
+                        "document_hash": job.result.get("document_hash", "")
+                    }
             
-            st.markdown(pdf_display, unsafe_allow_html=True)
+            if status in (JobStatus.COMPLETED, JobStatus.FAILED):
+                finished_count += 1
+                # Once finished, the stage column shows the failure reason instead
+                stage = job.error if job is not None and job.error else ""
             
-            # Show file info
-            st.caption(f"📄 {uploaded_file.name} ({uploaded_file.size:,} bytes)")
+            language = self.get_text(batch_results[job_id]["detected_language"]) if job_id in batch_results else ""
             
-        except Exception as e:
-            st.error(f"{self.get_text('error_displaying_pdf')}: {str(e)}")
-            st.info(self.get_text("pdf_preview_not_available"))
+            rows.append({
+                self.get_text("column_file"): entry["file_name"],
+                self.get_text("column_status"): self.get_text(f"status_{status.value}"),
+                self.get_text("column_stage"): stage,
+                self.get_text("column_language"): language,
+                self.get_text("column_elapsed"): f"{elapsed:.1f}s"
+            })
+        
+        if len(batch_results) > collected:
+            self.session_store.put(current_session_id(), RESULTS_KEY, batch_results)
+        
+        st.subheader(self.get_text("batch_progress"))
+        st.progress(finished_count / len(batch_jobs), text=f"{finished_count}/{len(batch_jobs)}")
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        
+        if finished_count == len(batch_jobs) and 'jobs' in st.query_params:
+            del st.query_params['jobs']
+            if batch_results:
+                st.session_state['batch_finished'] = True
+            # Render the results and stop the progress timer
+            st.rerun(scope="app")
+        if st.session_state.pop('batch_finished', False):
+            st.success(self.get_text("llm_success"))
     
-    def _display_image_preview(self, uploaded_file):
-        """Display image preview"""
+    def _display_file_preview(self, uploaded_file):
+        """Display a server-rendered thumbnail of one page of the uploaded file (PDF or image)"""
+        file_type = uploaded_file.type
+        is_pdf = file_type == "application/pdf"
+        
+        if not is_pdf and file_type not in IMAGE_TYPES:
+            st.warning("Preview not available for this file type")
+            return
+        
+        icon = "📄" if is_pdf else "🖼️"
+        if not self.preview_service.can_preview(file_type, uploaded_file.size):
+            # Huge files, or PDFs without a renderer installed, are offered as a download instead
+            st.info(self.get_text("preview_download_only"))
+            st.download_button(
+                label=self.get_text("download_original"),
+                data=uploaded_file.getvalue(),
+                file_name=uploaded_file.name,
+                mime=file_type,
+                key=f"download_original_{uploaded_file.name}"
+            )
+            st.caption(f"{icon} {uploaded_file.name} ({uploaded_file.size:,} bytes)")
+            return
+        
         try:
-            # Display image
-            st.image(uploaded_file, caption=uploaded_file.name, use_container_width=True)
+            document_hash = uploaded_file.file_hash
+            # Read from the store only when the page count or thumbnail is not cached, at most once per rerun
+            data = functools.lru_cache(maxsize=1)(uploaded_file.getvalue)
+            page_count = self.preview_service.page_count(document_hash, data, file_type)
+            
+            # Only the visible page is rendered and sent to the browser
+            page_index = 0
+            if page_count > 1:
+                page_index = st.number_input(
+                    self.get_text("preview_page"),
+                    min_value=1,
+                    max_value=page_count,
+                    value=1,
+                    key=f"preview_page_{document_hash}"
+                ) - 1
+            
+            thumbnail = self.preview_service.thumbnail(document_hash, data, file_type, page_index)
+            if thumbnail is None:
+                raise ValueError("the page could not be rendered")
+            st.image(thumbnail, use_container_width=True)
             
             # Show file info
-            st.caption(f"🖼️ {uploaded_file.name} ({uploaded_file.size:,} bytes)")
+            pages = f", {page_index + 1}/{page_count}" if page_count > 1 else ""
+            st.caption(f"{icon} {uploaded_file.name} ({uploaded_file.size:,} bytes{pages})")
             
         except Exception as e:
-            st.error(f"{self.get_text('error_displaying_image')}: {str(e)}")
-            st.info(self.get_text("image_preview_not_available"))
+            error_key, fallback_key = (
+                ("error_displaying_pdf", "pdf_preview_not_available") if is_pdf
+                else ("error_displaying_image", "image_preview_not_available")
+            )
+            st.error(f"{self.get_text(error_key)}: {str(e)}")
+            st.info(self.get_text(fallback_key))
     
-    def _save_uploaded_file(self, uploaded_file):
-        """Save uploaded file to temporary location"""
-        temp_dir = "temp"
-        os.makedirs(temp_dir, exist_ok=True)
-        temp_file_path = os.path.join(temp_dir, uploaded_file.name)
-        
-        with open(temp_file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        return temp_file_path
-
     def render_results_display(self):
         """Render extracted results display"""
-        if 'extracted_data' in st.session_state and st.session_state.extracted_data:
-            # Display JSON result section
-            with st.expander(self.get_text("extracted_fields_json"), expanded=True):
-                st.json(st.session_state.extracted_data)
-            
+        batch_results = get_batch_results(self.session_store)
+        
+        if len(batch_results) > 1:
+            job_ids = list(batch_results.keys())
+            selected_job_id = st.selectbox(
+                self.get_text("select_result"),
+                options=job_ids,
+                format_func=lambda job_id: batch_results[job_id]["file_name"],
+                key="result_selector"
+            )
+            if selected_job_id != st.session_state.get('selected_result'):
+                st.session_state['selected_result'] = selected_job_id
+                self.session_store.pop(current_session_id(), VALIDATION_KEY)
+        
+        selected_result = get_selected_result(self.session_store)
+        if selected_result and selected_result["extracted_data"]:
+            self._render_result()
+            return True  # Indicate that results are available
+        return False
+    
+    @st.fragment
+    def _render_result(self):
+        """Result JSON and downloads; a download click reruns only this section"""
+        batch_results = get_batch_results(self.session_store)
+        selected_result = get_selected_result(self.session_store)
+        if selected_result is None:
+            return
+        if selected_result["detected_language"]:
+            st.info(f"{self.get_text('language_detected')}: {self.get_text(selected_result['detected_language'])}")
+        
+        # Display JSON result section
+        # Records cache their JSON, so reruns don't re-serialize the result
+        extracted_json = selected_result["extracted_data"].to_json()
+        with st.expander(self.get_text("extracted_fields_json"), expanded=True):
+            st.json(extracted_json)
+        
+        download_cols = st.columns([1, 1, 1, 1, 2])
+        
+        with download_cols[0]:
             # Download button for JSON
-            json_str = json.dumps(st.session_state.extracted_data, ensure_ascii=False, indent=2)
             st.download_button(
                 label=self.get_text("download_json"),
-                data=json_str,
+                data=extracted_json,
                 file_name="extracted_results.json",
                 mime="application/json",
                 key="persistent_download_json"
             )
-            
-            return True  # Indicate that results are available
-        return False
\ No newline at end of file
+        
+        if len(batch_results) > 1:
+            exports = self._get_batch_exports(batch_results)
+            with download_cols[1]:
+                st.download_button(
+                    label=self.get_text("download_zip"),
+                    data=exports["zip"],
+                    file_name="extracted_results.zip",
+                    mime="application/zip",
+                    key="download_results_zip"
+                )
+            with download_cols[2]:
+                st.download_button(
+                    label=self.get_text("download_jsonl"),
+                    data=exports["jsonl"],
+                    file_name="extracted_results.jsonl",
+                    mime="application/jsonl",
+                    key="download_results_jsonl"
+                )
+            with download_cols[3]:
+                st.download_button(
+                    label=self.get_text("download_parquet"),
+                    data=exports["parquet"],
+                    file_name="extracted_results.parquet",
+                    mime="application/vnd.apache.parquet",
+                    key="download_results_parquet"
+                )
+    
+    def _get_batch_exports(self, batch_results):
+        """ZIP, JSONL and Parquet exports of the batch, rebuilt only when its set of results changes"""
+        session_id = current_session_id()
+        batch_key = tuple(batch_results)
+        builders = {
+            "zip": self._build_results_zip,
+            "jsonl": self._build_results_jsonl,
+            "parquet": self._build_results_parquet
+        }
+        if st.session_state.get('batch_exports_key') != batch_key:
+            for export_format in builders:
+                self.session_store.pop(session_id, f"export:{export_format}")
+            st.session_state['batch_exports_key'] = batch_key
+        
+        exports = {}
+        for export_format, build in builders.items():
+            data = self.session_store.get(session_id, f"export:{export_format}")
+            if data is None:
+                data = build(batch_results)
+                self.session_store.put(session_id, f"export:{export_format}", data)
+            exports[export_format] = data
+        return exports
+    
+    def _build_results_zip(self, batch_results) -> bytes:
+        """Bundle every result as its own JSON file"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for index, result in enumerate(batch_results.values(), 1):
+                # Prefix with the position so resubmitted files with the same name don't collide
+                archive_name = f"{index:03d}_{Path(result['file_name']).stem}_extracted.json"
+                archive.writestr(archive_name, result["extracted_data"].to_json())
+        return buffer.getvalue()
+    
+    def _build_results_jsonl(self, batch_results) -> bytes:
+        """One JSON object per line, with the source file name and detected language"""
+        return b"".join(
+            dumps({**result, "extracted_data": result["extracted_data"].to_dict()}) + b"\n"
+            for result in batch_results.values()
+        )
+    
+    def _build_results_parquet(self, batch_results) -> bytes:
+        """Columnar export of the batch, one flattened row per document"""
+        return rows_to_parquet_bytes(
+            build_export_row(
+                result["extracted_data"],
+                result["detected_language"],
+                result["file_name"],
+                result.get("timings"),
+                result.get("ocr_confidence"),
+                result.get("elapsed")
+            )
+            for result in batch_results.values()
+        )
\ No newline at end of file
@@ -0,0 +1,110 @@
+import hashlib
+import streamlit as st
+from typing import Any, Dict, List, Optional
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.session_store import SessionStore
+
+UPLOAD_KEY_PREFIX = "upload:"
+RESULTS_KEY = "results"
+VALIDATION_KEY = "validation"
+
+
+@st.cache_resource
+def get_session_store(_config) -> SessionStore:
+    """One store per server process; sessions hold only small references to their values in it"""
+    return SessionStore(
+        _config.session_spill_dir,
+        ttl_seconds=_config.session_ttl_minutes * 60,
+        max_memory_bytes=_config.session_max_memory_mb * 1024 * 1024,
+        spill_threshold=_config.session_spill_threshold_mb * 1024 * 1024
+    )
+
+
+def current_session_id() -> str:
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "default"
+
+
+class SessionFile:
+    """An upload kept in the session store, with the part of the UploadedFile interface the UI uses"""
+
+    def __init__(self, store: SessionStore, session_id: str, name: str, type: str, size: int, file_hash: str):
+        self.store = store
+        self.session_id = session_id
+        self.name = name
+        self.type = type
+        self.size = size
+        self.file_hash = file_hash
+
+    @property
+    def key(self) -> str:
+        return f"{UPLOAD_KEY_PREFIX}{self.file_hash}"
+
+    @property
+    def available(self) -> bool:
+        """False once the session was evicted for being idle"""
+        return self.store.contains(self.session_id, self.key)
+
+    def getvalue(self) -> Optional[bytes]:
+        return self.store.get(self.session_id, self.key)
+
+
+def store_uploads(store: SessionStore, uploaded_files, session_files: List[SessionFile]) -> List[SessionFile]:
+    """Move new uploads into the session store, after the files already kept there.
+
+    The caller then rotates the uploader's key, so the widget releases its own copy.
+    """
+    session_id = current_session_id()
+    session_files = [session_file for session_file in session_files if session_file.available]
+    stored = {session_file.file_hash for session_file in session_files}
+    for uploaded_file in uploaded_files:
+        file_hash = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+        if file_hash in stored:
+            continue
+        session_file = SessionFile(store, session_id, uploaded_file.name, uploaded_file.type, uploaded_file.size, file_hash)
+        store.put(session_id, session_file.key, uploaded_file.getvalue())
+        session_files.append(session_file)
+        stored.add(file_hash)
+    return session_files
+
+
+def remove_upload(session_files: List[SessionFile], removed: SessionFile) -> List[SessionFile]:
+    removed.store.pop(removed.session_id, removed.key)
+    return [session_file for session_file in session_files if session_file.file_hash != removed.file_hash]
+
+
+def get_batch_results(store: SessionStore) -> Dict[str, Dict[str, Any]]:
+    """Results of the current batch by job ID; empty once the session was evicted"""
+    return store.get(current_session_id(), RESULTS_KEY, {})
+
+
+def get_selected_result(store: SessionStore) -> Optional[Dict[str, Any]]:
+    """The result shown and validated, chosen by job ID in st.session_state"""
+    batch_results = get_batch_results(store)
+    job_id = st.session_state.get('selected_result')
+    if job_id not in batch_results:
+        job_id = next(iter(batch_results), None)
+    return batch_results.get(job_id)
+
+
+def render_session_admin(store: SessionStore, get_text):
+    """Memory held per session, for operators (shown with ?admin=<SESSION_ADMIN_TOKEN>)"""
+    store.sweep()
+    stats = store.stats()
+    with st.sidebar.expander(get_text("session_memory_title"), expanded=True):
+        st.metric(get_text("session_memory_total"), f"{store.memory_bytes / 1024 / 1024:.1f} MB")
+        st.metric(get_text("session_disk_total"), f"{store.disk_bytes / 1024 / 1024:.1f} MB")
+        st.dataframe(
+            [
+                {
+                    get_text("column_session"): stat.session_id[:8],
+                    get_text("column_entries"): stat.entries,
+                    get_text("column_memory"): f"{stat.memory_bytes / 1024 / 1024:.1f} MB",
+                    get_text("column_disk"): f"{stat.disk_bytes / 1024 / 1024:.1f} MB",
+                    get_text("column_idle"): f"{stat.idle_seconds / 60:.0f} min"
+                }
+                for stat in stats
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
@@ -1,39 +1,49 @@
 import streamlit as st
 import sys
+import hmac
+import threading
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
 from services.validation_service import ValidationService
-from services.openai_service import OpenAIService
+from utils.assets import get_styles
 from utils.config import Config
-from ui.common import COMMON_TEXTS
 from ui.document_extraction import DocumentExtractorUI
+from ui.session import get_session_store, render_session_admin
+from ui.texts import get_text_resolver
 from ui.validation import ValidationUI
+from utils.prewarm import prewarm
+
+@st.cache_resource
+def start_prewarm():
+    """Import the SDKs in the background once per server process, while the first page renders"""
+    thread = threading.Thread(target=prewarm, name="prewarm", daemon=True)
+    thread.start()
+    return thread
 
 class DocumentProcessorUI:
     def __init__(self):
         self.config = Config()
-        self.language = self.config.default_language
+        self.language = st.session_state.get("language", self.config.default_language)
+        if self.config.prewarm:
+            start_prewarm()
         
-        # Initialize OpenAI service for validation
-        if self.config.azure_openai_endpoint and self.config.azure_openai_key:
-            self.openai_service = OpenAIService(
-                self.config.azure_openai_endpoint,
-                self.config.azure_openai_key,
-                self.config.azure_openai_deployment_name,
-                self.config.azure_openai_api_version,
-                self.config.azure_openai_max_tokens,
-                self.config.azure_openai_temperature
-            )
-            self.validation_service = ValidationService(self.openai_service)
-        else:
-            self.openai_service = None
-            self.validation_service = None
+        # Texts are resolved from tables flattened once per process; changing the language reruns the script
+        self.get_text = get_text_resolver("app", self.language)
         
         # Initialize UI components
-        self.document_extractor = DocumentExtractorUI(self.config, self.get_text)
-        self.validation_ui = ValidationUI(self.validation_service, self.get_text)
+        self.document_extractor = DocumentExtractorUI(self.config, get_text_resolver("document_extraction", self.language))
+        
+        # Reuse the extractor's OpenAI service for validation
+        self.openai_service = self.document_extractor.openai_service
+        self.validation_service = ValidationService(self.openai_service) if self.openai_service else None
+        self.validation_ui = ValidationUI(
+            self.validation_service,
+            get_text_resolver("validation", self.language),
+            self.document_extractor.session_store,
+            self.document_extractor.processing_service.result_store
+        )
     
     def setup_page_config(self):
         st.set_page_config(
@@ -68,22 +78,15 @@ class DocumentProcessorUI:
 
         self.language = st.session_state.language
     
-    def get_text(self, key):
-        """Get text from common translations"""
-        return COMMON_TEXTS.get(key, {}).get(self.language, COMMON_TEXTS.get(key, {}).get("en", ""))
-    
-    
     def load_css(self):
-        """Load CSS from external file"""
+        """Apply the stylesheet, read once per process by the asset registry"""
         if self.language == "he":
-            try:
-                css_path = Path(__file__).parent / "styles.css"
-                with open(css_path, "r", encoding="utf-8") as f:
-                    css_content = f.read()
-                st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
-            except Exception as e:
+            css_content = get_styles()
+            if css_content is None:
                 # Fallback to no styling if CSS file is not found
-                st.error(f"Could not load CSS file: {str(e)}")
+                st.error("Could not load CSS file")
+                return
+            st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
 
     def render_main_interface(self):
         self.load_css()
@@ -100,13 +103,16 @@ class DocumentProcessorUI:
         self.render_language_selector()
         self.render_main_interface()
         
-        # Display extracted results if available
+        # Memory per session, for operators who know the admin token
+        admin_token = self.config.session_admin_token
+        if admin_token and hmac.compare_digest(st.query_params.get("admin", ""), admin_token):
+            render_session_admin(get_session_store(self.config), self.get_text)
+        
+        # Upload/preview, batch progress, results and validation are fragments,
+        # so an interaction within one of them reruns only that section
         if self.document_extractor.render_results_display():
-            # Show validation interface if we have extracted data
-            self.validation_ui.render_validation_interface()
-            
-            # Display validation results if available
-            self.validation_ui.render_validation_results()
+            # Show validation interface and results if we have extracted data
+            self.validation_ui.render_validation_section()
 
 if __name__ == "__main__":
     app = DocumentProcessorUI()
@@ -0,0 +1,89 @@
+import logging
+import threading
+from typing import Dict, List, Callable
+from ui.common import COMMON_TEXTS
+from ui.document_extraction.translations import DOCUMENT_EXTRACTION_TEXTS
+from ui.validation.translations import VALIDATION_TEXTS
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_LANGUAGE = "en"
+
+# Text tables of each UI component; every component also sees the common texts
+COMPONENT_TEXTS = {
+    "app": {},
+    "document_extraction": DOCUMENT_EXTRACTION_TEXTS,
+    "validation": VALIDATION_TEXTS,
+}
+
+_unknown_keys = set()
+_unknown_keys_lock = threading.Lock()
+
+class _TextMap(dict):
+    """Flat key -> text map of one language; unknown keys resolve to "" and are logged once"""
+
+    def __init__(self, texts: Dict[str, str], component: str):
+        super().__init__(texts)
+        self.component = component
+
+    def __missing__(self, key: str) -> str:
+        with _unknown_keys_lock:
+            if (self.component, key) not in _unknown_keys:
+                _unknown_keys.add((self.component, key))
+                logger.warning(f"Unknown UI text key {key!r} in {self.component}")
+        return ""
+
+class TextTable:
+    """Per-language flat lookup of one component's texts merged over the common texts.
+
+    Built once per process, so resolving a text is a single dict lookup instead of
+    nested lookups with fallbacks on every widget of every rerun. Texts missing in a
+    language fall back to English and are listed in `missing`.
+    """
+
+    def __init__(self, component: str, tables: List[Dict[str, Dict[str, str]]]):
+        self.component = component
+        languages = sorted({language for table in tables for texts in table.values() for language in texts})
+        self.missing: Dict[str, List[str]] = {language: [] for language in languages}
+
+        merged = {}
+        for table in tables:
+            merged.update(table)
+
+        self.texts: Dict[str, _TextMap] = {}
+        for language in languages:
+            flat = {}
+            for key, texts in merged.items():
+                if language not in texts:
+                    self.missing[language].append(key)
+                flat[key] = texts.get(language, texts.get(FALLBACK_LANGUAGE, ""))
+            self.texts[language] = _TextMap(flat, component)
+
+    def resolver(self, language: str) -> Callable[[str], str]:
+        """get_text(key) bound to one language"""
+        texts = self.texts.get(language) or self.texts[FALLBACK_LANGUAGE]
+        return texts.__getitem__
+
+def _compile_tables() -> Dict[str, TextTable]:
+    # Later tables win, so a component's own text overrides a common one with the same key
+    tables = {
+        component: TextTable(component, [COMMON_TEXTS, texts])
+        for component, texts in COMPONENT_TEXTS.items()
+    }
+    for component, table in tables.items():
+        for language, keys in table.missing.items():
+            if keys:
+                logger.warning(f"{len(keys)} {component} UI texts have no {language} translation: {', '.join(keys)}")
+    return tables
+
+TEXT_TABLES = _compile_tables()
+
+def get_text_resolver(component: str, language: str) -> Callable[[str], str]:
+    return TEXT_TABLES[component].resolver(language)
+
+def missing_key_report() -> Dict[str, Dict[str, List[str]]]:
+    """Keys without a translation, per component and language"""
+    return {
+        component: {language: keys for language, keys in table.missing.items() if keys}
+        for component, table in TEXT_TABLES.items()
+    }
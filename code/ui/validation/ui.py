@@ -1,27 +1,34 @@
 import streamlit as st
 import re
+import logging
+from dataclasses import asdict
 from services.validation_service import ValidationService
+from utils.assets import get_template
 from utils.message_types import MessageType
+from ui.session import VALIDATION_KEY, current_session_id, get_selected_result
 from .translations import VALIDATION_TEXTS
 
+logger = logging.getLogger(__name__)
+
+# LLM analysis category (e.g. dates_accuracy) -> its title-cased text key (Dates Accuracy)
+CATEGORY_TEXT_KEYS = {key.lower().replace(" ", "_"): key for key in VALIDATION_TEXTS if " " in key}
 
 class ValidationUI:
     """UI component for validation and evaluation"""
     
-    def __init__(self, validation_service, get_common_text_func):
+    def __init__(self, validation_service, get_text, session_store, result_store=None):
         self.validation_service = validation_service
-        self.get_common_text = get_common_text_func
+        # Resolver over this component's and the common texts, bound to the session's language
+        self.get_text = get_text
+        # The selected extraction and its validation are read from and kept in the session store
+        self.session_store = session_store
+        self.result_store = result_store
     
-    def get_text(self, key):
-        """Get text for this component, with fallback to common texts"""
-        language = st.session_state.get('language', 'en')
-        
-        # First try component-specific texts
-        if key in VALIDATION_TEXTS:
-            return VALIDATION_TEXTS[key].get(language, VALIDATION_TEXTS[key].get("en", ""))
-        
-        # Fallback to common texts
-        return self.get_common_text(key)
+    @st.fragment
+    def render_validation_section(self):
+        """Validation controls and results; uploading ground truth or validating reruns only this section"""
+        self.render_validation_interface()
+        self.render_validation_results()
     
     def render_validation_interface(self):
         """Render the validation and evaluation section"""
@@ -47,11 +54,11 @@ class ValidationUI:
             subcol1, subcol2, _ = st.columns([0.4, 0.4, 0.2])
             with subcol1:
                 # Download empty English template
-                with open("templates/empty_json_en.json", "r", encoding="utf-8") as f:
-                    en_template = f.read()
+                en_template = get_template("en")
                 st.download_button(
                     label=self.get_text("download_empty_en"),
-                    data=en_template,
+                    data=en_template.text if en_template else "",
+                    disabled=en_template is None,
                     file_name="empty_template_english.json",
                     mime="application/json",
                     use_container_width=True
@@ -59,11 +66,11 @@ class ValidationUI:
             
             with subcol2:
                 # Download empty Hebrew template
-                with open("templates/empty_json_he.json", "r", encoding="utf-8") as f:
-                    he_template = f.read()
+                he_template = get_template("he")
                 st.download_button(
                     label=self.get_text("download_empty_he"),
-                    data=he_template,
+                    data=he_template.text if he_template else "",
+                    disabled=he_template is None,
                     file_name="empty_template_hebrew.json",
                     mime="application/json",
                     use_container_width=True
@@ -83,17 +90,17 @@ class ValidationUI:
             return
         
         if not self.validation_service:
-            st.error(self.get_common_text("error_openai_config"))
+            st.error(self.get_text("error_openai_config"))
             return
         
-        if 'extracted_data' not in st.session_state:
+        selected_result = get_selected_result(self.session_store)
+        if selected_result is None:
             st.warning("No extracted data found. Please process a document first.")
             return
         
         try:
             with st.spinner(self.get_text("validation_processing")):
-                # Get extraction language from session state
-                extraction_language = st.session_state.get('detected_language', 'en')
+                extraction_language = selected_result["detected_language"] or 'en'
                 
                 # Validate uploaded JSON
                 expected_content = expected_file.read().decode('utf-8')
@@ -112,7 +119,7 @@ class ValidationUI:
                     st.warning(message)
                 
                 # Calculate metrics
-                extracted_data = st.session_state['extracted_data']
+                extracted_data = selected_result["extracted_data"]
                 metrics = self.validation_service.calculate_metrics(expected_data, extracted_data)
                 
                 # Get LLM evaluation with user's language
@@ -121,21 +128,29 @@ class ValidationUI:
                 
                 st.success(self.get_text("validation_complete"))
                 
-                # Store results in session state for display outside column constraint
-                st.session_state['validation_metrics'] = metrics
-                st.session_state['validation_evaluation'] = llm_evaluation
+                # Kept for display outside column constraint
+                self.session_store.put(current_session_id(), VALIDATION_KEY, (metrics, llm_evaluation))
+                
+                self._store_metrics(selected_result["document_hash"], metrics)
                 
         except Exception as e:
             st.error(f"Validation error: {str(e)}")
     
+    def _store_metrics(self, document_hash, metrics):
+        """Attach the metrics to the persisted extraction of this document"""
+        if self.result_store is None or not document_hash:
+            return
+        try:
+            self.result_store.update_metrics(document_hash, asdict(metrics))
+        except Exception as e:
+            logger.error(f"Error storing validation metrics: {str(e)}")
+    
     def render_validation_results(self):
         """Display validation results and metrics if available"""
-        if 'validation_metrics' in st.session_state and 'validation_evaluation' in st.session_state:
+        validation = self.session_store.get(current_session_id(), VALIDATION_KEY)
+        if validation is not None:
             st.divider()
-            self._display_validation_results(
-                st.session_state['validation_metrics'], 
-                st.session_state['validation_evaluation']
-            )
+            self._display_validation_results(*validation)
     
     def _display_validation_results(self, metrics, llm_evaluation):
         """Display validation results and metrics"""
@@ -210,7 +225,8 @@ class ValidationUI:
                 
                 for category, feedback in analysis.items():
                     # Try to get translation, fallback to formatted English
-                    translated_category = self.get_text(category.replace('_', ' ').title()) or category.replace('_', ' ').title()
+                    text_key = CATEGORY_TEXT_KEYS.get(category.strip().lower().replace(" ", "_"))
+                    translated_category = self.get_text(text_key) if text_key else category.replace('_', ' ').title()
                     st.write(f"**{translated_category}:** {feedback}")
             
             # Summary and recommendations
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Resolved from this file rather than the working directory, so workers can start anywhere
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+TEMPLATES_DIR = PROJECT_ROOT / "templates"
+STYLES_PATH = PROJECT_ROOT / "code" / "ui" / "styles.css"
+
+class TemplateAsset(NamedTuple):
+    text: str               # File contents as written, for downloads and the extraction prompt
+    data: Dict[str, Any]    # Parsed template
+
+class _Asset:
+    def __init__(self, name: str, path: Path, loader: Callable[[str], Any]):
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self.value = None
+        self.mtime = None
+        self.version = 0        # Incremented on every (re)load, so derived values know to rebuild
+        self.checked_at = 0.0
+
+class AssetRegistry:
+    """Static files (templates, CSS) read and validated once per process.
+
+    With hot_reload, a file's mtime is checked at most every check_interval seconds and
+    the asset is reloaded when it changed; a file that fails to reload keeps its last
+    good value, and one that never loaded reads as None. Values computed from assets are cached with derive() and rebuilt when
+    one of their sources is reloaded.
+    """
+
+    def __init__(self, hot_reload: bool = False, check_interval: float = 1.0):
+        self.hot_reload = hot_reload
+        self.check_interval = check_interval
+        self._assets: Dict[str, _Asset] = {}
+        self._derived: Dict[str, Tuple[Tuple[int, ...], Any]] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, path: Path, loader: Callable[[str], Any]) -> None:
+        """Register a file; loader turns its text into the asset value and raises ValueError if it is invalid"""
+        with self._lock:
+            self._assets[name] = _Asset(name, Path(path), loader)
+
+    def get(self, name: str) -> Any:
+        """The asset's value, or None when its file is missing or invalid"""
+        asset = self._assets[name]
+        if asset.version == 0 or (self.hot_reload and time.monotonic() - asset.checked_at >= self.check_interval):
+            self._refresh(asset)
+        return asset.value
+
+    def version(self, name: str) -> int:
+        self.get(name)
+        return self._assets[name].version
+
+    def derive(self, name: str, sources: Tuple[str, ...], builder: Callable[[], Any]) -> Any:
+        """Value built from the given assets, cached until one of them is reloaded"""
+        versions = tuple(self.version(source) for source in sources)
+        cached = self._derived.get(name)
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+        with self._lock:
+            cached = self._derived.get(name)
+            if cached is None or cached[0] != versions:
+                cached = (versions, builder())
+                self._derived[name] = cached
+            return cached[1]
+
+    def _refresh(self, asset: _Asset) -> None:
+        with self._lock:
+            asset.checked_at = time.monotonic()
+            try:
+                mtime = os.stat(asset.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if asset.version and mtime == asset.mtime:
+                return
+
+            asset.mtime = mtime
+            try:
+                with open(asset.path, "r", encoding="utf-8") as f:
+                    value = asset.loader(f.read())
+            except (OSError, ValueError) as e:
+                if asset.value is not None:
+                    logger.error(f"Could not reload asset {asset.name}, keeping the loaded version: {str(e)}")
+                    return
+                logger.error(f"Could not load asset {asset.name} from {asset.path}: {str(e)}")
+                value = None
+            else:
+                if asset.version:
+                    logger.info(f"Reloaded asset {asset.name} from {asset.path}")
+
+            asset.value = value
+            asset.version += 1
+
+def _string_leaves(data: Dict[str, Any]) -> bool:
+    return all(_string_leaves(value) if isinstance(value, dict) else isinstance(value, str) for value in data.values())
+
+def load_template_asset(text: str) -> TemplateAsset:
+    """Parse an empty form template; it must be a non-empty JSON object with string leaves"""
+    data = json.loads(text)
+    if not isinstance(data, dict) or not data:
+        raise ValueError("template must be a non-empty JSON object")
+    if not _string_leaves(data):
+        raise ValueError("template leaves must all be strings")
+    return TemplateAsset(text, data)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_asset_registry() -> AssetRegistry:
+    """Process-wide registry of the application's static files"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from utils.config import Config
+
+                registry = AssetRegistry(hot_reload=Config().asset_hot_reload)
+                for language in ("en", "he"):
+                    registry.register(f"template_{language}", TEMPLATES_DIR / f"empty_json_{language}.json", load_template_asset)
+                registry.register("styles", STYLES_PATH, str)
+                _registry = registry
+    return _registry
+
+def get_template(language: str) -> Optional[TemplateAsset]:
+    return get_asset_registry().get(f"template_{language}")
+
+def get_styles() -> Optional[str]:
+    return get_asset_registry().get("styles")
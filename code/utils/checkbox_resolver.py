@@ -0,0 +1,202 @@
+import re
+import math
+import logging
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Tuple
+from utils.form_record import FormRecord
+from utils.form_schema import get_form_schema
+from utils.ocr_document import BoundingBox, OcrDocument, OcrLine, OcrSelectionMark
+from utils.spatial_index import GridIndex
+
+logger = logging.getLogger(__name__)
+
+SELECTION_MARKER_PATTERN = re.compile(r":(?:un)?selected:")
+MARKER = "\u2610"
+HEBREW_LETTER_PATTERN = re.compile(r"[א-ת]")
+LATIN_LETTER_PATTERN = re.compile(r"[A-Za-z]")
+
+# Checkbox fields of form 283: printed option label -> value per output language.
+# Only gender is translated on English forms; the other options keep their Hebrew labels.
+CHECKBOX_FIELDS: Dict[str, Dict[str, Dict[str, str]]] = {
+    "gender": {
+        "זכר": {"he": "זכר", "en": "Male"},
+        "נקבה": {"he": "נקבה", "en": "Female"},
+    },
+    "accidentLocation": {
+        "במפעל": {"he": "במפעל", "en": "במפעל"},
+        "ת. דרכים בעבודה": {"he": "ת. דרכים בעבודה", "en": "ת. דרכים בעבודה"},
+        "ת. דרכים בדרך לעבודה/מהעבודה": {"he": "ת. דרכים בדרך לעבודה/מהעבודה", "en": "ת. דרכים בדרך לעבודה/מהעבודה"},
+        "תאונה בדרך ללא רכב": {"he": "תאונה בדרך ללא רכב", "en": "תאונה בדרך ללא רכב"},
+        "אחר": {"he": "אחר", "en": "אחר"},
+    },
+    "medicalInstitutionFields.healthFundMember": {
+        "כללית": {"he": "כללית", "en": "כללית"},
+        "מאוחדת": {"he": "מאוחדת", "en": "מאוחדת"},
+        "מכבי": {"he": "מכבי", "en": "מכבי"},
+        "לאומית": {"he": "לאומית", "en": "לאומית"},
+    },
+}
+
+@dataclass
+class CheckboxResolution:
+    field: str                 # English dotted path
+    option: str                # Printed label of the selected option, "" when none is selected
+    values: Dict[str, str]     # Output value per language
+    confidence: float
+
+def normalize_label(text: str) -> str:
+    """Collapse whitespace and shorten :selected: markers to one character, roughly their printed width"""
+    return " ".join(SELECTION_MARKER_PATTERN.sub(f" {MARKER} ", text).split())
+
+def box_center(bbox: BoundingBox) -> Tuple[float, float]:
+    return (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+
+def distance_to_box(point: Tuple[float, float], bbox: BoundingBox) -> float:
+    dx = max(bbox[0] - point[0], 0.0, point[0] - bbox[2])
+    dy = max(bbox[1] - point[1], 0.0, point[1] - bbox[3])
+    return math.hypot(dx, dy)
+
+def label_box(line: OcrLine, text: str, start: int, end: int) -> BoundingBox:
+    """Approximate box of text[start:end] within a line, by its share of the line's characters.
+
+    Hebrew lines run right to left, so their first characters are on the right.
+    """
+    left, top, right, bottom = line.bbox
+    length = max(len(text), 1)
+    width = right - left
+    if len(HEBREW_LETTER_PATTERN.findall(text)) >= len(LATIN_LETTER_PATTERN.findall(text)):
+        return (right - width * end / length, top, right - width * start / length, bottom)
+    return (left + width * start / length, top, left + width * end / length, bottom)
+
+class CheckboxResolver:
+    """Resolves checkbox fields from selection mark geometry instead of leaving it to the LLM.
+
+    Every printed option label is located in the OCR lines and paired with the nearest
+    selection mark (through a grid index of mark centers), each mark serving one label.
+    When the line text places a marker next to the label, the distance is measured from
+    that marker's position, which keeps inline options from taking their neighbour's mark.
+    A field is resolved when at least two of its options have a mark and at most one is selected.
+    """
+
+    def __init__(self, fields: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None,
+                 max_gap_ratio: float = 0.06, min_confidence: float = 0.5):
+        self.fields = fields or CHECKBOX_FIELDS
+        self.max_gap_ratio = max_gap_ratio  # Label-to-mark distance limit, as a share of page width
+        self.min_confidence = min_confidence
+
+    def resolve(self, document: OcrDocument) -> Dict[str, CheckboxResolution]:
+        resolutions = {}
+        for page in document.pages:
+            marks = [mark for mark in document.selection_marks if mark.page_number == page.page_number]
+            if not marks:
+                continue
+            page_width = page.width or max(mark.bbox[2] for mark in marks)
+            max_gap = page_width * self.max_gap_ratio
+            for field, resolution in self._resolve_page(document.page_lines(page.page_number), marks, max_gap).items():
+                resolutions.setdefault(field, resolution)
+        return resolutions
+
+    def _resolve_page(self, lines: List[OcrLine], marks: List[OcrSelectionMark], max_gap: float) -> Dict[str, CheckboxResolution]:
+        index = GridIndex(cell_size=max(max_gap, 1e-6))
+        for mark_index, mark in enumerate(marks):
+            index.insert(box_center(mark.bbox), mark_index)
+
+        # All (distance, field, option, mark) candidates, paired greedily nearest first
+        candidates = []
+        for field, options in self.fields.items():
+            for option in options:
+                for bbox in self._find_label(lines, option):
+                    center = box_center(bbox)
+                    radius = math.hypot(bbox[2] - bbox[0], bbox[3] - bbox[1]) / 2 + max_gap
+                    for _, mark_index in index.within(center, radius):
+                        distance = distance_to_box(box_center(marks[mark_index].bbox), bbox)
+                        if distance <= max_gap:
+                            candidates.append((distance, field, option, mark_index))
+
+        candidates.sort(key=lambda candidate: candidate[0])
+        used_marks, paired = set(), {}
+        for distance, field, option, mark_index in candidates:
+            if mark_index in used_marks or (field, option) in paired:
+                continue
+            used_marks.add(mark_index)
+            paired[(field, option)] = marks[mark_index]
+
+        resolutions = {}
+        for field, options in self.fields.items():
+            field_marks = {option: paired.get((field, option)) for option in options}
+            located = {option: mark for option, mark in field_marks.items() if mark is not None}
+            # Without marks for at least two options, an unselected result is not trustworthy
+            if len(located) < min(2, len(options)):
+                continue
+
+            selected = [(option, mark) for option, mark in located.items() if mark.selected]
+            confidences = [mark.confidence for mark in located.values() if mark.confidence is not None]
+            confidence = min(confidences) if confidences else 0.0
+            if len(selected) > 1 or confidence < self.min_confidence:
+                logger.info(f"Checkbox field {field} is ambiguous, leaving it to the LLM")
+                continue
+
+            if selected:
+                option = selected[0][0]
+                resolutions[field] = CheckboxResolution(field, option, dict(options[option]), confidence)
+            else:
+                resolutions[field] = CheckboxResolution(field, "", {"he": "", "en": ""}, confidence)
+        return resolutions
+
+    @staticmethod
+    def _find_label(lines: List[OcrLine], label: str) -> List[BoundingBox]:
+        """Where the label's mark is expected: the selection marker next to it in the line, else the label itself"""
+        boxes = []
+        for line in lines:
+            text = normalize_label(line.content)
+            for match in re.finditer(re.escape(label), text):
+                start, end = match.start(), match.end()
+                # Whole words only, so "אחר" does not match inside another word
+                before = text[start - 1] if start > 0 else " "
+                after = text[end] if end < len(text) else " "
+                if before.isalnum() or after.isalnum():
+                    continue
+
+                # The marker preceding the label in reading order belongs to it, then one right after it
+                if text[max(start - 2, 0):start] == f"{MARKER} ":
+                    boxes.append(label_box(line, text, start - 2, start - 1))
+                elif text[end:end + 2] == f" {MARKER}":
+                    boxes.append(label_box(line, text, end + 1, end + 2))
+                else:
+                    boxes.append(label_box(line, text, start, end))
+        return boxes
+
+CHECKBOX_HINTS_HEADERS = {
+    "en": "--- Resolved Checkboxes (from selection marks): ---",
+    "he": "--- תיבות סימון שזוהו (מסימני הבחירה): ---"
+}
+
+def format_checkbox_hints(resolutions: Dict[str, CheckboxResolution], language: str = "en") -> str:
+    """Resolved checkbox section appended to the OCR text, so the LLM can copy the values.
+
+    Written in the document's language, with the field names of that language's template,
+    so a Hebrew document's prompt text gains no Latin letters.
+    """
+    if not resolutions:
+        return ""
+    schema = get_form_schema()
+    labels = dict(zip(schema.dotted_paths["en"], schema.dotted_paths.get(language, schema.dotted_paths["en"])))
+    lines = [CHECKBOX_HINTS_HEADERS.get(language, CHECKBOX_HINTS_HEADERS["en"])]
+    lines.extend(
+        f"{labels.get(resolution.field, resolution.field)}: {resolution.values.get(language, resolution.option)}"
+        for resolution in resolutions.values()
+    )
+    return "\n".join(lines)
+
+def apply_checkbox_resolutions(extracted_data, language: str, resolutions: Dict[str, CheckboxResolution]):
+    """Overwrite the LLM's checkbox values with the resolved ones, keeping the input's type (dict or FormRecord)"""
+    if not resolutions or extracted_data is None:
+        return extracted_data
+
+    record = extracted_data if isinstance(extracted_data, FormRecord) else FormRecord.from_dict(extracted_data, language)
+    for field, resolution in resolutions.items():
+        value = resolution.values.get(record.language, resolution.option)
+        if record.get_field(field) != value:
+            logger.info(f"Checkbox field {field}: replacing {record.get_field(field)!r} with {value!r}")
+            record.set_field(field, value)
+    return record if isinstance(extracted_data, FormRecord) else record.to_dict()
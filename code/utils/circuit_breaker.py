@@ -0,0 +1,173 @@
+import sys
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(RuntimeError):
+    """A call was rejected without being made because its dependency is failing"""
+
+    def __init__(self, dependency: str, retry_after: float):
+        # Both arguments are kept in args, so the error survives pickling between processes
+        super().__init__(dependency, retry_after)
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+    def __str__(self) -> str:
+        return f"{self.dependency} is unavailable, retry in {self.retry_after:.0f}s"
+
+def _sdk_connection_errors() -> Tuple[type, ...]:
+    """Connection and timeout exception types of the Azure SDKs that are loaded.
+
+    An SDK that was never imported cannot have raised the error, so the SDKs are not
+    imported here and keep their lazy loading.
+    """
+    errors = []
+    openai = sys.modules.get("openai")
+    if openai is not None:
+        # APITimeoutError is a subclass
+        errors.append(openai.APIConnectionError)
+    azure_exceptions = sys.modules.get("azure.core.exceptions")
+    if azure_exceptions is not None:
+        # Including their ServiceRequestTimeoutError and ServiceResponseTimeoutError subclasses
+        errors.extend((azure_exceptions.ServiceRequestError, azure_exceptions.ServiceResponseError))
+    return tuple(errors)
+
+def is_dependency_failure(error: BaseException) -> bool:
+    """Timeouts, connection errors, throttling and 5xx responses.
+
+    Not requests the service rejected (4xx), and not errors without a status that are
+    not connection or timeout errors, such as a missing file or a bug in the caller.
+    """
+    if isinstance(error, (CircuitOpenError, TimeoutError, ConnectionError) + _sdk_connection_errors()):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and (status >= 500 or status in (408, 429))
+
+class CircuitBreaker:
+    """Stops calling a dependency after failure_threshold consecutive failures.
+
+    While open, calls fail at once with CircuitOpenError instead of waiting on a dead
+    connection. After reset_timeout seconds the breaker is half-open and lets one probe
+    call through: its success closes the breaker, its failure opens it again. Responses
+    that reject the request (4xx other than 408/429) show the service is up and count
+    as successes.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._last_error = ""
+        self._counters = {"calls": 0, "successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if a call would be rejected now, without making one"""
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN or (state == HALF_OPEN and self._probe_in_flight):
+                raise CircuitOpenError(self.name, self._retry_after())
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN or (state == HALF_OPEN and self._probe_in_flight):
+                self._counters["rejected"] += 1
+                raise CircuitOpenError(self.name, self._retry_after())
+            if state == HALF_OPEN:
+                self._probe_in_flight = True
+            self._counters["calls"] += 1
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            # Interruptions count as failures too, so a half-open probe slot is never left taken
+            if isinstance(e, Exception) and not is_dependency_failure(e):
+                self._record_success()
+            else:
+                self._record_failure(e)
+            raise
+        self._record_success()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_after": round(self._retry_after(), 1) if state == OPEN else 0.0,
+                "last_error": self._last_error,
+                **self._counters
+            }
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+            logger.info(f"Circuit {self.name} is half-open, probing")
+        return self._state
+
+    def _retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self._counters["successes"] += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            if self._state != CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+                self._state = CLOSED
+
+    def _record_failure(self, error: Exception) -> None:
+        with self._lock:
+            self._counters["failures"] += 1
+            self._consecutive_failures += 1
+            self._last_error = f"{type(error).__name__}: {str(error)}"[:200]
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"Circuit {self.name} opened after {self._consecutive_failures} failures: {self._last_error}")
+                    self._counters["opened"] += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(name: str, config: Optional[Any] = None) -> CircuitBreaker:
+    """Process-wide breaker of one dependency, shared by every service instance calling it"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            if config is None:
+                from utils.config import Config
+
+                config = Config()
+            breaker = _breakers[name] = CircuitBreaker(name, config.circuit_failure_threshold, config.circuit_reset_seconds)
+        return breaker
+
+def get_circuit_breaker_report() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
@@ -11,10 +11,30 @@ class Config:
         self.azure_openai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
         self.azure_openai_key = os.getenv("AZURE_OPENAI_KEY")
         self.azure_openai_deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
-        self.azure_openai_api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01")
+        self.azure_openai_api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-10-21")
         self.azure_openai_max_tokens = int(os.getenv("AZURE_OPENAI_MAX_TOKENS", "2000"))
         self.azure_openai_temperature = float(os.getenv("AZURE_OPENAI_TEMPERATURE", "0.1"))
         
+        # Extract in both languages concurrently when language detection is uncertain
+        self.speculative_extraction = os.getenv("SPECULATIVE_EXTRACTION", "false").lower() == "true"
+        self.language_confidence_threshold = float(os.getenv("LANGUAGE_CONFIDENCE_THRESHOLD", "0.5"))
+        
+        # Constrain extraction responses to the template's JSON Schema (needs API version 2024-08-01-preview or later)
+        self.structured_outputs = os.getenv("STRUCTURED_OUTPUTS", "true").lower() == "true"
+        
+        # Resolve gender / accident location / health fund checkboxes from selection mark geometry
+        self.checkbox_resolver = os.getenv("CHECKBOX_RESOLVER", "true").lower() == "true"
+        
+        # Position-based extraction against the calibrated blank form, skipping the LLM when confident
+        self.zonal_extraction = os.getenv("ZONAL_EXTRACTION", "true").lower() == "true"
+        self.zonal_layout_path = os.getenv("ZONAL_LAYOUT_PATH", "")  # Defaults to templates/form_283_layout.json
+        self.zonal_accept_threshold = float(os.getenv("ZONAL_ACCEPT_THRESHOLD", "0.8"))  # Alignment quality: anchors found and their fit
+        
+        # Model cascade: extract with this cheaper deployment first (disabled when empty) and
+        # escalate to AZURE_OPENAI_DEPLOYMENT_NAME when the result's confidence is below the threshold
+        self.azure_openai_small_deployment_name = os.getenv("AZURE_OPENAI_SMALL_DEPLOYMENT_NAME", "")
+        self.cascade_escalation_threshold = float(os.getenv("CASCADE_ESCALATION_THRESHOLD", "0.75"))
+        
         # All implemented languages with their display names
         self.implemented_languages = {
             "en": "English",
@@ -28,6 +48,75 @@ class Config:
         self.supported_languages = os.getenv("SUPPORTED_LANGUAGES", "en,he").split(",")
         self.max_file_size_mb = int(os.getenv("MAX_FILE_SIZE_MB", "200"))
         self.max_file_size = self.max_file_size_mb * 1024 * 1024  # Convert MB to bytes
+        self.max_pdf_pages = int(os.getenv("MAX_PDF_PAGES", "2000"))  # Azure Document Intelligence limit; 0 for no limit
+        
+        # Per-session uploads and exports: idle sessions are evicted, large blobs are kept on disk,
+        # and blobs are spilled once all sessions together hold more than SESSION_MAX_MEMORY_MB
+        self.session_ttl_minutes = int(os.getenv("SESSION_TTL_MINUTES", "60"))
+        self.session_max_memory_mb = int(os.getenv("SESSION_MAX_MEMORY_MB", "512"))
+        self.session_spill_threshold_mb = int(os.getenv("SESSION_SPILL_THRESHOLD_MB", "5"))
+        self.session_spill_dir = os.getenv("SESSION_SPILL_DIR", "temp/sessions")
+        self.session_admin_token = os.getenv("SESSION_ADMIN_TOKEN", "")  # Enables the memory view at ?admin=<token>
+        
+        # Server-rendered page thumbnails in the UI; larger files are offered as a download instead
+        self.preview_max_file_mb = int(os.getenv("PREVIEW_MAX_FILE_MB", "50"))
+        self.preview_thumbnail_width = int(os.getenv("PREVIEW_THUMBNAIL_WIDTH", "800"))
+        self.preview_cache_mb = int(os.getenv("PREVIEW_CACHE_MB", "64"))
+        
+        # Timeouts and circuit breakers of the Azure services; SDK retries multiply the timeouts
+        self.document_intelligence_timeout_seconds = float(os.getenv("DOCUMENT_INTELLIGENCE_TIMEOUT_SECONDS", "120"))
+        self.openai_timeout_seconds = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+        self.azure_max_retries = int(os.getenv("AZURE_MAX_RETRIES", "1"))
+        self.circuit_failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.circuit_reset_seconds = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+        # OCR with Tesseract while Document Intelligence is unavailable (when installed)
+        self.local_ocr_fallback = os.getenv("LOCAL_OCR_FALLBACK", "true").lower() == "true"
+        
+        # HTTP API configuration
+        self.api_host = os.getenv("API_HOST", "0.0.0.0")
+        self.api_port = int(os.getenv("API_PORT", "8000"))
+        # More than one worker needs JOB_BACKEND=redis, so a job is visible to the worker that gets its status request
+        self.api_workers = int(os.getenv("API_WORKERS", "1"))
+        
+        # Re-read templates and CSS when their files change (development); otherwise they are read once
+        self.asset_hot_reload = os.getenv("ASSET_HOT_RELOAD", "false").lower() == "true"
+        
+        # Import SDKs and create clients when a process starts, instead of on its first document
+        self.prewarm = os.getenv("PREWARM", "true").lower() == "true"
+        
+        # Background job configuration
+        self.job_backend = os.getenv("JOB_BACKEND", "memory")  # memory or redis
+        self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.job_workers = int(os.getenv("JOB_WORKERS", "4"))
+        self.job_storage_dir = os.getenv("JOB_STORAGE_DIR", "temp/jobs")
+        # Jobs hitting an open circuit go back to the queue, at most this many times
+        self.job_max_deferrals = int(os.getenv("JOB_MAX_DEFERRALS", "20"))
+        
+        # Folder watcher daemon (watch_folder.py) for documents dropped by scanners
+        self.watch_dir = os.getenv("WATCH_DIR", "data/inbox")
+        self.watch_workers = int(os.getenv("WATCH_WORKERS", "4"))
+        self.watch_in_flight = int(os.getenv("WATCH_IN_FLIGHT", "8"))
+        self.watch_poll_seconds = float(os.getenv("WATCH_POLL_SECONDS", "5"))
+        self.watch_settle_seconds = float(os.getenv("WATCH_SETTLE_SECONDS", "2"))
+        self.watch_checkpoint_path = os.getenv("WATCH_CHECKPOINT_PATH", "")  # Defaults to <WATCH_DIR>/.checkpoint.jsonl
+        
+        # Stream every completed job as a flattened row to this JSONL file (disabled when empty)
+        self.export_jsonl_path = os.getenv("EXPORT_JSONL_PATH", "")
+        
+        # Persistent result store
+        self.result_store_backend = os.getenv("RESULT_STORE_BACKEND", "sqlite")  # sqlite or none
+        self.result_store_path = os.getenv("RESULT_STORE_PATH", "data/results.db")
+        self.skip_duplicate_documents = os.getenv("SKIP_DUPLICATE_DOCUMENTS", "true").lower() == "true"
+        
+        # Compact OCR output per document hash, so retries skip the OCR call (disabled when empty)
+        self.ocr_cache_dir = os.getenv("OCR_CACHE_DIR", "data/ocr_cache")
+        
+        # Reuse the result of a previously extracted re-scan of the same form (MinHash over OCR text)
+        self.near_duplicate_detection = os.getenv("NEAR_DUPLICATE_DETECTION", "true").lower() == "true"
+        self.near_duplicate_threshold = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+        
+        # Threads per document running independent pipeline steps concurrently (1 runs them in order)
+        self.pipeline_max_workers = int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
     
     def get_available_languages(self):
         """Returns only the languages that are both implemented and enabled"""
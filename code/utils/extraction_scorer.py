@@ -0,0 +1,187 @@
+import re
+import logging
+from datetime import date
+from typing import Dict, Any, List, Optional
+from utils.form_record import FormRecord
+from utils.form_schema import FormSchema, get_form_schema, flatten_paths
+
+logger = logging.getLogger(__name__)
+
+class ExtractionScorer:
+    """Scores an extraction on schema fill, structure compliance and value script consistency,
+    and rates its confidence from rule checks and OCR agreement for the model cascade"""
+
+    # Free-text fields whose values are written in the fill language
+    # (checkbox values such as accident location stay Hebrew on English forms)
+    FREE_TEXT_FIELDS = {
+        "lastName", "firstName", "jobType", "accidentAddress", "accidentDescription",
+        "injuredBodyPart", "signature", "address.street", "address.city"
+    }
+
+    HEBREW_LETTER_PATTERN = re.compile(r'[א-ת]')
+    LATIN_LETTER_PATTERN = re.compile(r'[A-Za-z]')
+
+    FILL_WEIGHT = 0.4
+    STRUCTURE_WEIGHT = 0.3
+    SCRIPT_WEIGHT = 0.3
+
+    # Weights of the confidence score that decides whether to escalate to a larger model
+    COMPLETENESS_WEIGHT = 0.2
+    RULES_WEIGHT = 0.4
+    OCR_AGREEMENT_WEIGHT = 0.4
+
+    DATE_FIELDS = ("dateOfBirth", "dateOfInjury", "formFillingDate", "formReceiptDateAtClinic")
+    # Fields every completed form has; left empty, they count as failed checks instead of being skipped
+    REQUIRED_FIELDS = ("lastName", "firstName", "idNumber", "dateOfBirth", "dateOfInjury", "mobilePhone")
+    # Fields whose values are copied from the document rather than normalized by the model
+    OCR_COPIED_FIELDS = ("lastName", "firstName", "idNumber", "mobilePhone", "landlinePhone", "address.street", "address.city")
+
+    TIME_PATTERN = re.compile(r'^([01]\d|2[0-3]):[0-5]\d$')
+    NON_DIGIT_PATTERN = re.compile(r'\D')
+    WHITESPACE_PATTERN = re.compile(r'\s+')
+
+    def __init__(self, schema: Optional[FormSchema] = None):
+        self.schema = schema or get_form_schema()
+        self.template_paths = self.schema.dotted_paths
+
+        # The English and Hebrew templates list the same fields in the same order
+        english_paths = self.template_paths.get("en", [])
+        self.free_text_paths = {"en": {p for p in english_paths if p in self.FREE_TEXT_FIELDS}}
+        self.free_text_paths["he"] = {
+            hebrew_path
+            for english_path, hebrew_path in zip(english_paths, self.template_paths.get("he", []))
+            if english_path in self.FREE_TEXT_FIELDS
+        }
+
+    def score(self, data: Dict[str, Any], language: str) -> float:
+        """Return a score between 0 and 1; higher means a more plausible extraction"""
+        if not data or language not in self.template_paths:
+            return 0.0
+
+        flat = data.flatten() if isinstance(data, FormRecord) else dict(flatten_paths(data))
+        expected_paths = self.template_paths[language]
+
+        return (
+            self.FILL_WEIGHT * self.fill_ratio(flat, expected_paths)
+            + self.STRUCTURE_WEIGHT * self.structure_ratio(flat, expected_paths)
+            + self.SCRIPT_WEIGHT * self.script_consistency(flat, language)
+        )
+
+    def fill_ratio(self, flat: Dict[str, Any], expected_paths: List[str]) -> float:
+        if not expected_paths:
+            return 0.0
+        filled = sum(1 for path in expected_paths if str(flat.get(path, "") or "").strip())
+        return filled / len(expected_paths)
+
+    def structure_ratio(self, flat: Dict[str, Any], expected_paths: List[str]) -> float:
+        if not expected_paths:
+            return 0.0
+        matching = sum(1 for path in expected_paths if path in flat)
+        extra = len(flat.keys() - set(expected_paths))
+        return max(0, matching - extra) / len(expected_paths)
+
+    def script_consistency(self, flat: Dict[str, Any], language: str) -> float:
+        """Share of filled free-text values written in the script of the extraction language"""
+        pattern = self.LATIN_LETTER_PATTERN if language == "en" else self.HEBREW_LETTER_PATTERN
+        values = [str(flat.get(path) or "") for path in self.free_text_paths.get(language, ())]
+        values = [value for value in values if value.strip()]
+        if not values:
+            return 0.0
+        return sum(1 for value in values if pattern.search(value)) / len(values)
+
+    def confidence(self, data, language: str, ocr_text: str) -> float:
+        """Confidence between 0 and 1 from schema fill, rule checks and agreement with the OCR text.
+
+        A record that leaves required fields empty loses on every term, so an output that
+        drops most fields is never confident enough to skip escalation.
+        """
+        if not data or language not in self.template_paths:
+            return 0.0
+
+        record = data if isinstance(data, FormRecord) else FormRecord.from_dict(data, language, self.schema)
+        flat = record.flatten(language)
+
+        return (
+            self.COMPLETENESS_WEIGHT * self.fill_ratio(flat, self.template_paths[language])
+            + self.RULES_WEIGHT * self.rule_check_ratio(record)
+            + self.OCR_AGREEMENT_WEIGHT * self.ocr_agreement(record, ocr_text)
+        )
+
+    def rule_check_ratio(self, record: FormRecord) -> float:
+        """Share of ID, date, phone and time fields that pass their format rules.
+
+        Optional fields are checked only when filled; empty required fields fail.
+        """
+        checks = []
+
+        id_number = self._field(record, "idNumber")
+        if id_number or "idNumber" in self.REQUIRED_FIELDS:
+            checks.append(self.is_valid_id_number(id_number))
+
+        for date_field in self.DATE_FIELDS:
+            parts = [self._field(record, f"{date_field}.{part}") for part in ("day", "month", "year")]
+            if any(parts) or date_field in self.REQUIRED_FIELDS:
+                checks.append(self.is_valid_date(*parts))
+
+        mobile_phone = self._field(record, "mobilePhone")
+        if mobile_phone or "mobilePhone" in self.REQUIRED_FIELDS:
+            checks.append(mobile_phone.isdigit() and len(mobile_phone) == 10 and mobile_phone.startswith("05"))
+
+        landline_phone = self._field(record, "landlinePhone")
+        if landline_phone:
+            checks.append(landline_phone.isdigit() and len(landline_phone) in (9, 10) and landline_phone.startswith("0"))
+
+        time_of_injury = self._field(record, "timeOfInjury")
+        if time_of_injury:
+            checks.append(bool(self.TIME_PATTERN.match(time_of_injury)))
+
+        # Nothing to check is not evidence of a good extraction
+        return sum(checks) / len(checks) if checks else 0.0
+
+    def ocr_agreement(self, record: FormRecord, ocr_text: str) -> float:
+        """Share of copied fields whose value can be found in the OCR text; empty required fields count as not found"""
+        if not ocr_text:
+            return 0.0
+
+        normalized_text = self.WHITESPACE_PATTERN.sub(" ", ocr_text).lower()
+        ocr_digits = self.NON_DIGIT_PATTERN.sub("", ocr_text)
+
+        found = []
+        for field in self.OCR_COPIED_FIELDS:
+            value = self._field(record, field)
+            if not value:
+                if field in self.REQUIRED_FIELDS:
+                    found.append(False)
+                continue
+            if value.isdigit():
+                # Phone numbers may have had their first digit corrected to 0
+                found.append(value in ocr_digits or value[1:] in ocr_digits)
+            else:
+                found.append(self.WHITESPACE_PATTERN.sub(" ", value).lower() in normalized_text)
+
+        return sum(found) / len(found) if found else 0.0
+
+    @staticmethod
+    def is_valid_id_number(id_number: str) -> bool:
+        """Israeli ID check digit (Luhn variant over 9 digits)"""
+        if not id_number.isdigit() or len(id_number) > 9:
+            return False
+        total = 0
+        for index, digit in enumerate(id_number.zfill(9)):
+            product = int(digit) * (1 if index % 2 == 0 else 2)
+            total += product - 9 if product > 9 else product
+        return total % 10 == 0
+
+    @staticmethod
+    def is_valid_date(day: str, month: str, year: str) -> bool:
+        if not (day.isdigit() and month.isdigit() and year.isdigit() and len(year) == 4):
+            return False
+        try:
+            date(int(year), int(month), int(day))
+        except ValueError:
+            return False
+        return 1900 <= int(year) <= date.today().year + 1
+
+    @staticmethod
+    def _field(record: FormRecord, english_path: str) -> str:
+        return str(record.get_field(english_path) or "").strip()
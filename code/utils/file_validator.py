@@ -1,84 +1,358 @@
+import io
 import os
-import mimetypes
+import re
+import struct
+import hashlib
+from enum import Enum
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional, BinaryIO
 import logging
+from utils.pdf_backend import count_pdf_pages, find_pdf_backend
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 1024 * 1024
+
+# Azure Document Intelligence limits for image input
+MIN_IMAGE_SIDE = 50
+MAX_IMAGE_SIDE = 10000
+
+PDF_SIGNATURE = b"%PDF-"
+JPEG_SIGNATURE = b"\xff\xd8\xff"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Page tree nodes (dictionaries with /Kids); the root's /Count is the page count. Nodes inside
+# compressed object streams are not visible (a PDF parser counts those), and incremental
+# updates may repeat a node.
+_PDF_PAGE_TREE_PATTERN = re.compile(rb"<<[^<>]*/Kids[^<>]*>>")
+_PDF_COUNT_PATTERN = re.compile(rb"/Count\s+(\d+)")
+_PDF_OVERLAP = 4096
+# JPEG start-of-frame markers, which hold the image dimensions
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers without a length field
+_JPEG_STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD9))
+
+class RejectReason(Enum):
+    NOT_EXISTS = "not_exists"
+    EMPTY = "empty"
+    INVALID_EXTENSION = "invalid_extension"
+    TOO_LARGE = "too_large"
+    UNKNOWN_FORMAT = "unknown_format"       # Content is not a PDF, JPEG or PNG, whatever its name says
+    TYPE_MISMATCH = "type_mismatch"         # e.g. a PNG named .pdf
+    CORRUPT = "corrupt"                     # Truncated or unparseable header
+    TOO_MANY_PAGES = "too_many_pages"
+    IMAGE_TOO_SMALL = "image_too_small"
+    IMAGE_TOO_LARGE = "image_too_large"
+
+@dataclass
+class FileCheck:
+    """Outcome of one validation pass; reason is None when the file is accepted"""
+    reason: Optional[RejectReason] = None
+    content_type: Optional[str] = None      # Detected from the content, not the name
+    size: int = 0
+    page_count: Optional[int] = None        # None when it could not be determined (compressed page tree, no PDF parser)
+    width: Optional[int] = None
+    height: Optional[int] = None
+    sha256: Optional[str] = None            # Hex digest of the content, when the check was asked to hash it
+
+    @property
+    def ok(self) -> bool:
+        return self.reason is None
+
+class _CountingReader:
+    """Counts the bytes read from a stream, read-ahead included, optionally hashing them"""
+
+    def __init__(self, stream: BinaryIO, digest=None):
+        self.stream = stream
+        self.digest = digest
+        self.count = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.count += len(data)
+        if self.digest is not None:
+            self.digest.update(data)
+        return data
+
+class _BufferReader(io.RawIOBase):
+    """Seekable stream over any bytes-like object, without copying it (BytesIO copies memoryviews)"""
+
+    def __init__(self, data):
+        self.view = memoryview(data).cast("B")
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: len(self.view)}[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        data = self.view[self.position:self.position + len(buffer)]
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
 class FileValidator:
     ALLOWED_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png'}
-    ALLOWED_MIME_TYPES = {
-        'application/pdf',
-        'image/jpeg',
-        'image/jpg', 
-        'image/png'
+    EXTENSION_TYPES = {
+        '.pdf': 'application/pdf',
+        '.jpg': 'image/jpeg',
+        '.jpeg': 'image/jpeg',
+        '.png': 'image/png'
     }
-    
+
     def __init__(self, config):
         self.max_file_size = config.max_file_size
-    
+        self.max_pdf_pages = config.max_pdf_pages
+
+    def check_stream(self, stream: BinaryIO, file_name: str, size: Optional[int] = None,
+                     compute_hash: bool = False) -> FileCheck:
+        """Validate a document from its bytes in one pass, before it is written anywhere.
+
+        Checks the name's extension, the size, the content signature, and the PDF page
+        count or image dimensions. Images are read only up to their dimensions, unless
+        compute_hash asks for the SHA-256 of an accepted file, which is taken in the same
+        pass. PDFs are read in chunks, so memory use does not depend on the file size.
+        The stream is left at an unspecified position.
+        """
+        extension = Path(file_name).suffix.lower()
+        if extension not in self.ALLOWED_EXTENSIONS:
+            return FileCheck(RejectReason.INVALID_EXTENSION, size=size or 0)
+        if size is not None and size > self.max_file_size:
+            return FileCheck(RejectReason.TOO_LARGE, size=size)
+
+        stream = _CountingReader(stream, hashlib.sha256() if compute_hash else None)
+        head = _read_exactly(stream, 1024)
+        if not head:
+            return FileCheck(RejectReason.EMPTY)
+
+        if head.startswith(JPEG_SIGNATURE):
+            content_type = "image/jpeg"
+        elif head.startswith(PNG_SIGNATURE):
+            content_type = "image/png"
+        elif PDF_SIGNATURE in head:
+            # Readers accept the header anywhere in the first 1024 bytes
+            content_type = "application/pdf"
+        else:
+            return FileCheck(RejectReason.UNKNOWN_FORMAT, size=size or len(head))
+
+        check = FileCheck(content_type=content_type, size=size or 0)
+        if self.EXTENSION_TYPES[extension] != content_type:
+            check.reason = RejectReason.TYPE_MISMATCH
+            return check
+
+        if content_type == "application/pdf":
+            self._check_pdf(stream, head, check)
+        else:
+            self._check_image(stream, head, check)
+        if check.ok and (compute_hash or size is None):
+            # PDFs were read to the end already; an image's remaining bytes give its size and hash
+            self._count_remaining(stream)
+            check.size = check.size or stream.count
+            if compute_hash:
+                check.sha256 = stream.digest.hexdigest()
+        if check.ok and content_type == "application/pdf" and check.page_count is None:
+            self._count_pdf_pages_parsed(stream.stream, check)
+
+        if check.ok and check.size > self.max_file_size:
+            check.reason = RejectReason.TOO_LARGE
+        return check
+
+    def check_file(self, file_path: str, compute_hash: bool = False) -> FileCheck:
+        try:
+            size = os.path.getsize(file_path)
+            with open(file_path, "rb") as f:
+                return self.check_stream(f, file_path, size, compute_hash)
+        except FileNotFoundError:
+            return FileCheck(RejectReason.NOT_EXISTS)
+
+    def check_bytes(self, data, file_name: str, compute_hash: bool = False) -> FileCheck:
+        reader = _BufferReader(data)
+        return self.check_stream(reader, file_name, len(reader.view), compute_hash)
+
     def validate_file(self, file_path: str) -> bool:
         try:
-            if not os.path.exists(file_path):
-                logger.error(f"File does not exist: {file_path}")
-                return False
-            
-            if not self._validate_extension(file_path):
-                logger.error(f"Invalid file extension: {file_path}")
-                return False
-            
-            if not self._validate_size(file_path):
-                logger.error(f"File too large: {file_path}")
-                return False
-            
-            if not self._validate_mime_type(file_path):
-                logger.error(f"Invalid MIME type: {file_path}")
-                return False
-            
-            return True
-            
+            check = self.check_file(file_path)
         except Exception as e:
             logger.error(f"Error validating file {file_path}: {str(e)}")
             return False
-    
-    def _validate_extension(self, file_path: str) -> bool:
-        extension = Path(file_path).suffix.lower()
-        return extension in self.ALLOWED_EXTENSIONS
-    
-    def _validate_size(self, file_path: str) -> bool:
-        file_size = os.path.getsize(file_path)
-        return file_size <= self.max_file_size
-    
-    def _validate_mime_type(self, file_path: str) -> bool:
-        mime_type, _ = mimetypes.guess_type(file_path)
-        return mime_type in self.ALLOWED_MIME_TYPES
-    
-    def get_validation_error_message(self, file_path: str, language: str = "en") -> str:
+        if not check.ok:
+            logger.error(f"Rejected {file_path}: {check.reason.value}")
+        return check.ok
+
+    def _check_pdf(self, stream: BinaryIO, head: bytes, check: FileCheck) -> None:
+        size = len(head)
+        pages = self._pdf_page_count(head)
+        tail = head
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > self.max_file_size:
+                check.size = size
+                check.reason = RejectReason.TOO_LARGE
+                return
+            # Overlap the previous chunk so a node split across the boundary is still seen
+            pages = max(pages, self._pdf_page_count(tail + chunk))
+            tail = (tail + chunk)[-_PDF_OVERLAP:]
+
+        check.size = check.size or size
+        # The end-of-file marker is required within the last 1024 bytes; its absence means a cut-off upload
+        if b"%%EOF" not in tail[-1024:]:
+            check.reason = RejectReason.CORRUPT
+            return
+        check.page_count = pages or None
+        if check.page_count and self.max_pdf_pages and check.page_count > self.max_pdf_pages:
+            check.reason = RejectReason.TOO_MANY_PAGES
+
+    def _count_pdf_pages_parsed(self, stream: BinaryIO, check: FileCheck) -> None:
+        """Count the pages with a PDF parser when the page tree is not visible in the raw bytes.
+
+        Most writers put it in compressed object streams. The stream is read again from
+        the start, so this needs a seekable stream; without one, or without a parser, the
+        page count stays unknown and the page limit is not enforced.
+        """
+        seekable = getattr(stream, "seekable", None)
+        if seekable is None or not seekable():
+            logger.warning("PDF page tree is compressed and the upload cannot be re-read, page count unknown")
+            return
+        backend = find_pdf_backend()
+        if backend is None:
+            logger.warning("PDF page tree is compressed and no PDF parser is installed, page count unknown")
+            return
+        try:
+            stream.seek(0)
+            check.page_count = count_pdf_pages(stream, backend)
+        except Exception as e:
+            logger.info(f"Unparseable PDF: {str(e)}")
+            check.reason = RejectReason.CORRUPT
+            return
+        if self.max_pdf_pages and check.page_count > self.max_pdf_pages:
+            check.reason = RejectReason.TOO_MANY_PAGES
+
+    @staticmethod
+    def _pdf_page_count(data: bytes) -> int:
+        """Largest /Count of the page tree nodes in data (the root's), 0 when there are none"""
+        pages = 0
+        for node in _PDF_PAGE_TREE_PATTERN.finditer(data):
+            count = _PDF_COUNT_PATTERN.search(node.group())
+            if count:
+                pages = max(pages, int(count.group(1)))
+        return pages
+
+    def _check_image(self, stream: BinaryIO, head: bytes, check: FileCheck) -> None:
+        try:
+            if check.content_type == "image/png":
+                # The IHDR chunk always comes first
+                if head[12:16] != b"IHDR":
+                    raise ValueError("missing IHDR chunk")
+                check.width, check.height = struct.unpack(">II", head[16:24])
+            else:
+                check.width, check.height = self._jpeg_dimensions(stream, head)
+        except (ValueError, struct.error) as e:
+            logger.info(f"Unreadable image header: {str(e)}")
+            check.reason = RejectReason.CORRUPT
+            return
+
+        if min(check.width, check.height) < MIN_IMAGE_SIDE:
+            check.reason = RejectReason.IMAGE_TOO_SMALL
+        elif max(check.width, check.height) > MAX_IMAGE_SIDE:
+            check.reason = RejectReason.IMAGE_TOO_LARGE
+
+    @staticmethod
+    def _jpeg_dimensions(stream: BinaryIO, head: bytes):
+        """Walk the JPEG segments up to the start-of-frame marker, skipping over the others"""
+        buffer, position = head, 2
+
+        def take(count: int) -> bytes:
+            nonlocal buffer, position
+            if position + count > len(buffer):
+                buffer = buffer[position:] + _read_exactly(stream, max(count, 4096))
+                position = 0
+                if count > len(buffer):
+                    raise ValueError("truncated JPEG header")
+            data = buffer[position:position + count]
+            position += count
+            return data
+
+        while True:
+            if take(1) != b"\xff":
+                raise ValueError("invalid JPEG marker")
+            marker = take(1)[0]
+            while marker == 0xFF:
+                marker = take(1)[0]
+            if marker in _JPEG_STANDALONE_MARKERS:
+                continue
+            if marker in (0xD9, 0xDA):
+                raise ValueError("no frame header before the image data")
+            length = struct.unpack(">H", take(2))[0]
+            if length < 2:
+                raise ValueError("invalid JPEG segment length")
+            if marker in _JPEG_SOF_MARKERS:
+                _, height, width = struct.unpack(">BHH", take(5))
+                return width, height
+            remaining = length - 2
+            while remaining:
+                skipped = min(remaining, CHUNK_SIZE)
+                take(skipped)
+                remaining -= skipped
+
+    @staticmethod
+    def _count_remaining(stream: BinaryIO) -> None:
+        while stream.read(CHUNK_SIZE):
+            pass
+
+    def get_message(self, check: FileCheck, language: str = "en") -> str:
         messages = {
             "en": {
                 "not_exists": "File does not exist.",
+                "empty": "File is empty.",
                 "invalid_extension": f"Invalid file format. Allowed formats: {', '.join(self.ALLOWED_EXTENSIONS)}",
                 "too_large": f"File too large. Maximum size: {self.max_file_size // (1024*1024)}MB",
-                "invalid_mime": "Invalid file type."
+                "unknown_format": "File content is not a PDF, JPEG or PNG document.",
+                "type_mismatch": f"File content ({check.content_type}) does not match its extension.",
+                "corrupt": "File is damaged or incomplete.",
+                "too_many_pages": f"Too many pages ({check.page_count}). Maximum: {self.max_pdf_pages}",
+                "image_too_small": f"Image too small ({check.width}x{check.height}). Minimum: {MIN_IMAGE_SIDE}x{MIN_IMAGE_SIDE} pixels",
+                "image_too_large": f"Image too large ({check.width}x{check.height}). Maximum: {MAX_IMAGE_SIDE}x{MAX_IMAGE_SIDE} pixels"
             },
             "he": {
                 "not_exists": "הקובץ לא קיים.",
+                "empty": "הקובץ ריק.",
                 "invalid_extension": f"פורמט קובץ לא תקין. פורמטים מותרים: {', '.join(self.ALLOWED_EXTENSIONS)}",
                 "too_large": f"הקובץ גדול מדי. גודל מקסימלי: {self.max_file_size // (1024*1024)}MB",
-                "invalid_mime": "סוג קובץ לא תקין."
+                "unknown_format": "תוכן הקובץ אינו מסמך PDF, JPEG או PNG.",
+                "type_mismatch": f"תוכן הקובץ ({check.content_type}) אינו תואם את סיומת הקובץ.",
+                "corrupt": "הקובץ פגום או חלקי.",
+                "too_many_pages": f"יותר מדי עמודים ({check.page_count}). מקסימום: {self.max_pdf_pages}",
+                "image_too_small": f"התמונה קטנה מדי ({check.width}x{check.height}). מינימום: {MIN_IMAGE_SIDE}x{MIN_IMAGE_SIDE} פיקסלים",
+                "image_too_large": f"התמונה גדולה מדי ({check.width}x{check.height}). מקסימום: {MAX_IMAGE_SIDE}x{MAX_IMAGE_SIDE} פיקסלים"
             }
         }
-        
-        if not os.path.exists(file_path):
-            return messages[language]["not_exists"]
-        
-        if not self._validate_extension(file_path):
-            return messages[language]["invalid_extension"]
-        
-        if not self._validate_size(file_path):
-            return messages[language]["too_large"]
-        
-        if not self._validate_mime_type(file_path):
-            return messages[language]["invalid_mime"]
-        
-        return ""
\ No newline at end of file
+
+        if check.ok:
+            return ""
+        return messages.get(language, messages["en"])[check.reason.value]
+
+    def get_validation_error_message(self, file_path: str, language: str = "en") -> str:
+        return self.get_message(self.check_file(file_path), language)
@@ -0,0 +1,190 @@
+import json
+import logging
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+from utils.form_schema import FormSchema, get_form_schema
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+def dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+def loads(content) -> Any:
+    """Parse JSON text or bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+class FormRecord:
+    """Array-backed extraction result for form 283.
+
+    Field values are kept in a flat list in schema order, so the record is the same
+    size whichever language its keys are shown in. A value of None means the key was
+    absent from the source JSON (as opposed to "" for a present but empty field), and
+    keys outside the schema are kept in `extras`, so a record round-trips its source.
+    """
+
+    __slots__ = ("values", "language", "extras", "_json")
+
+    def __init__(self, values: List[Any], language: str, extras: Optional[List[Tuple[Tuple[str, ...], Any]]] = None):
+        self.values = values
+        self.language = language
+        self.extras = extras or []
+        self._json = None
+
+    @classmethod
+    def empty(cls, language: str = "en", schema: Optional[FormSchema] = None) -> "FormRecord":
+        schema = schema or get_form_schema()
+        return cls([""] * schema.field_count, language)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], language: Optional[str] = None, schema: Optional[FormSchema] = None) -> "FormRecord":
+        schema = schema or get_form_schema()
+        language = language or schema.detect_language(data)
+        positions = schema.positions[language]
+
+        values = [None] * schema.field_count
+        extras = []
+
+        def collect(node, parent):
+            for key, value in node.items():
+                path = parent + (key,)
+                if isinstance(value, dict) and value:
+                    collect(value, path)
+                    continue
+
+                position = positions.get(path)
+                if position is None:
+                    extras.append((path, value))
+                else:
+                    values[position] = value
+
+        collect(data, ())
+        return cls(values, language, extras)
+
+    @classmethod
+    def from_json(cls, content, language: Optional[str] = None, schema: Optional[FormSchema] = None) -> "FormRecord":
+        return cls.from_dict(loads(content), language, schema)
+
+    @classmethod
+    def from_msgpack(cls, content: bytes) -> "FormRecord":
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        language, values, extras = msgpack.unpackb(content)
+        return cls(values, language, [(tuple(path), value) for path, value in extras])
+
+    @classmethod
+    def coerce(cls, data) -> "FormRecord":
+        return data if isinstance(data, FormRecord) else cls.from_dict(data)
+
+    def __getitem__(self, dotted_path: str) -> Any:
+        schema = get_form_schema()
+        position = schema.positions[self.language].get(tuple(dotted_path.split(".")))
+        if position is None:
+            raise KeyError(dotted_path)
+        return self.values[position]
+
+    def __setitem__(self, dotted_path: str, value: Any) -> None:
+        schema = get_form_schema()
+        position = schema.positions[self.language].get(tuple(dotted_path.split(".")))
+        if position is None:
+            raise KeyError(dotted_path)
+        self.values[position] = value
+        self._json = None
+
+    def get_field(self, english_path: str) -> Any:
+        """Value of a field addressed by its English dotted path, whatever the record's language"""
+        schema = get_form_schema()
+        position = schema.positions["en"].get(tuple(english_path.split(".")))
+        if position is None:
+            raise KeyError(english_path)
+        return self.values[position]
+
+    def set_field(self, english_path: str, value: Any) -> None:
+        """Set a field addressed by its English dotted path, whatever the record's language"""
+        schema = get_form_schema()
+        position = schema.positions["en"].get(tuple(english_path.split(".")))
+        if position is None:
+            raise KeyError(english_path)
+        self.values[position] = value
+        self._json = None
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FormRecord):
+            return NotImplemented
+        return self.values == other.values and self.extras == other.extras
+
+    def __getstate__(self):
+        return self.values, self.language, self.extras
+
+    def __setstate__(self, state):
+        self.values, self.language, self.extras = state
+        self._json = None
+
+    def items(self, language: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        """Iterate (dotted path, value) pairs of present fields without building a dict"""
+        dotted_paths = get_form_schema().dotted_paths[language or self.language]
+        for dotted_path, value in zip(dotted_paths, self.values):
+            if value is not None:
+                yield dotted_path, value
+        for path, value in self.extras:
+            yield ".".join(path), value
+
+    def flatten(self, language: Optional[str] = None) -> Dict[str, Any]:
+        return dict(self.items(language))
+
+    def structure_keys(self, language: Optional[str] = None) -> set:
+        """Dotted paths of every present object and leaf, as compared by structure compliance"""
+        key_paths = get_form_schema().key_paths[language or self.language]
+        present_paths = [path for path, value in zip(key_paths, self.values) if value is not None]
+        present_paths.extend(path for path, _ in self.extras)
+
+        keys = set()
+        for path in present_paths:
+            for depth in range(1, len(path) + 1):
+                keys.add(".".join(path[:depth]))
+        return keys
+
+    def to_dict(self, language: Optional[str] = None) -> Dict[str, Any]:
+        """Nested dict with English or Hebrew keys (defaults to the record's own language)"""
+        key_paths = get_form_schema().key_paths[language or self.language]
+        result = {}
+        for path, value in zip(key_paths, self.values):
+            if value is not None:
+                self._insert(result, path, value)
+        for path, value in self.extras:
+            self._insert(result, path, value)
+        return result
+
+    def to_json(self) -> str:
+        """Pretty-printed JSON in the record's language, cached until the record changes"""
+        if self._json is None:
+            self._json = dumps(self.to_dict(), indent=True).decode("utf-8")
+        return self._json
+
+    def to_msgpack(self) -> bytes:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return msgpack.packb([self.language, self.values, [[list(path), value] for path, value in self.extras]])
+
+    @staticmethod
+    def _insert(target: Dict[str, Any], path: Tuple[str, ...], value: Any) -> None:
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+
+def as_dict(data) -> Dict[str, Any]:
+    """Plain nested dict for either a FormRecord or an already plain dict"""
+    return data.to_dict() if isinstance(data, FormRecord) else data
@@ -0,0 +1,96 @@
+import logging
+from typing import Dict, Any, List, Tuple
+from utils.assets import get_asset_registry, get_template
+
+logger = logging.getLogger(__name__)
+
+def load_templates() -> Dict[str, Dict[str, Any]]:
+    """Parsed empty templates by language, empty for a language whose template could not be loaded"""
+    templates = {}
+    for language in ("en", "he"):
+        template = get_template(language)
+        templates[language] = template.data if template is not None else {}
+    return templates
+
+def flatten_paths(data: Dict[str, Any], parent_key: str = "") -> List[Tuple[str, Any]]:
+    """Flatten a nested dict into (dotted path, leaf value) pairs, keeping key order"""
+    items = []
+    for key, value in data.items():
+        path = f"{parent_key}.{key}" if parent_key else key
+        if isinstance(value, dict):
+            items.extend(flatten_paths(value, path))
+        else:
+            items.append((path, value))
+    return items
+
+def _leaf_key_paths(data: Dict[str, Any], parent: Tuple[str, ...] = ()) -> List[Tuple[str, ...]]:
+    paths = []
+    for key, value in data.items():
+        if isinstance(value, dict):
+            paths.extend(_leaf_key_paths(value, parent + (key,)))
+        else:
+            paths.append(parent + (key,))
+    return paths
+
+def build_json_schema(template: Dict[str, Any]) -> Dict[str, Any]:
+    """Strict JSON Schema of a template: every key required, no other keys, string leaves"""
+    return {
+        "type": "object",
+        "properties": {
+            key: build_json_schema(value) if isinstance(value, dict) else {"type": "string"}
+            for key, value in template.items()
+        },
+        "required": list(template),
+        "additionalProperties": False
+    }
+
+def build_template(key_paths: List[Tuple[str, ...]]) -> Dict[str, Any]:
+    """Empty nested template containing only the given key paths"""
+    template = {}
+    for path in key_paths:
+        node = template
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = ""
+    return template
+
+class FormSchema:
+    """Field layout of form 283, generated from the empty English and Hebrew templates.
+
+    Both templates list the same fields in the same order, so a field is identified
+    by its position and each language is just a different view of the key names.
+    """
+
+    LANGUAGE_MARKER_KEYS = {
+        "he": ["שם משפחה", "שם פרטי", "מספר זהות", "מין"],
+        "en": ["firstName", "lastName", "idNumber", "gender"]
+    }
+
+    def __init__(self, templates: Dict[str, Dict[str, Any]]):
+        self.templates = templates
+        self.languages = tuple(language for language, template in templates.items() if template)
+
+        # Per language: key path tuples, dotted paths and path -> position
+        self.key_paths = {language: _leaf_key_paths(templates[language]) for language in self.languages}
+        self.dotted_paths = {
+            language: [".".join(path) for path in paths] for language, paths in self.key_paths.items()
+        }
+        self.positions = {
+            language: {path: index for index, path in enumerate(paths)}
+            for language, paths in self.key_paths.items()
+        }
+        self.field_count = len(self.key_paths[self.languages[0]]) if self.languages else 0
+
+    def json_schema(self, language: str) -> Dict[str, Any]:
+        """Strict JSON Schema of the form in one language, for structured outputs"""
+        return build_json_schema(self.templates[language])
+
+    def detect_language(self, data: Dict[str, Any]) -> str:
+        """Detect if a JSON object uses Hebrew or English field names"""
+        hebrew_count = sum(1 for key in self.LANGUAGE_MARKER_KEYS["he"] if key in data)
+        english_count = sum(1 for key in self.LANGUAGE_MARKER_KEYS["en"] if key in data)
+        return "he" if hebrew_count > english_count else "en"
+
+def get_form_schema() -> FormSchema:
+    """Schema built from the current templates, rebuilt only when a template file is reloaded"""
+    return get_asset_registry().derive("form_schema", ("template_en", "template_he"), lambda: FormSchema(load_templates()))
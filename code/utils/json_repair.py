@@ -0,0 +1,92 @@
+import re
+import logging
+from typing import Optional, Dict, Any, List
+from utils.form_record import loads
+
+logger = logging.getLogger(__name__)
+
+CODE_FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+def _remove_trailing_commas(text: str) -> str:
+    """Drop commas directly before a closing bracket, leaving string values untouched"""
+    chars: List[str] = []
+    in_string = False
+    escaped = False
+    comma_index = None  # Position of the last comma not yet followed by a value
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == ",":
+            comma_index = len(chars)
+        elif char in "}]" and comma_index is not None:
+            chars[comma_index] = ""
+            comma_index = None
+        elif not char.isspace():
+            comma_index = None
+            in_string = char == '"'
+        chars.append(char)
+    return "".join(chars)
+
+def _close_open_structures(text: str) -> str:
+    """Close an unterminated string and any brackets left open, e.g. after a truncated response"""
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    string_start = 0
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            string_start = index
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+
+    # A cut-off string value is incomplete, so drop it and let its key be reported missing
+    if in_string:
+        text = text[:string_start]
+    text = text.rstrip().rstrip(",")
+    # Drop a dangling key left without a value
+    text = re.sub(r',?\s*"[^"]*"\s*:\s*$', "", text)
+    text = re.sub(r'(?:,|(?<={))\s*"[^"]*"\s*$', "", text)
+    return text + "".join(reversed(stack))
+
+def repair_json(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Best-effort local repair of a model response that is not valid JSON.
+
+    Handles code fences, text around the object, trailing commas and output cut off
+    by the token limit. Returns None when no JSON object can be recovered.
+    """
+    if not text:
+        return None
+
+    candidate = CODE_FENCE_PATTERN.sub("", text.strip())
+    start = candidate.find("{")
+    if start == -1:
+        return None
+    end = candidate.rfind("}")
+    candidates = [candidate[start:end + 1]] if end > start else []
+    candidates.append(_close_open_structures(candidate[start:]))
+
+    for attempt in candidates:
+        attempt = _remove_trailing_commas(attempt)
+        try:
+            data = loads(attempt)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            logger.info("Repaired malformed JSON response locally")
+            return data
+    return None
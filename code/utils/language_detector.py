@@ -0,0 +1,111 @@
+import logging
+from typing import Tuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Every byte except ASCII letters, for bytes.translate(None, delete)
+_NON_LATIN_BYTES = bytes(b for b in range(256) if not (0x41 <= b <= 0x5A or 0x61 <= b <= 0x7A))
+
+# UTF-8 lead byte of U+05C0-U+05FF, the block holding the Hebrew letters
+_HEBREW_LEAD_BYTE = b'\xd7'
+
+class LanguageDetector:
+    """Detects the fill language of a form from the ratio of Latin to Hebrew letters.
+
+    Form 283 is printed in Hebrew, so even English-filled forms are mostly Hebrew
+    letters; a modest share of Latin letters is what marks an English fill.
+
+    Letters are counted over the UTF-8 bytes in C-level passes instead of regex
+    matches: Latin letters are what remains after deleting every other byte, and
+    Hebrew letters are counted by their shared UTF-8 lead byte. The text is
+    consumed in line-aligned chunks so a clear decision can stop early on long
+    multi-page documents.
+    """
+
+    # Text added by our own OCR formatting, not written on the form
+    IGNORED_TOKENS = (
+        "--- Key-Value Pairs: ---",
+        "--- Raw Lines: ---",
+        "No key-value pairs detected.",
+        "No lines detected.",
+        ":unselected:",
+        ":selected:",
+    )
+
+    def __init__(self, english_ratio_threshold: float = 0.05, min_letters: int = 20,
+                 chunk_size: int = 64 * 1024, early_exit_letters: Optional[int] = 20000,
+                 early_exit_confidence: float = 0.9):
+        self.english_ratio_threshold = english_ratio_threshold
+        self.min_letters = min_letters
+        self.chunk_size = chunk_size
+        self.early_exit_letters = early_exit_letters
+        self.early_exit_confidence = early_exit_confidence
+
+        # Ignored tokens are ASCII and never overlap, so their letters can be
+        # subtracted by occurrence count rather than removed from the text
+        self._ignored_tokens = [
+            (token.encode("utf-8"), len(token.encode("utf-8").translate(None, _NON_LATIN_BYTES)))
+            for token in self.IGNORED_TOKENS
+        ]
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        """Return the detected language ("en"/"he") and a confidence between 0 and 1"""
+        hebrew_letters = 0
+        latin_letters = 0
+
+        for chunk in self._iter_chunks(text):
+            chunk_hebrew, chunk_latin = self.count_letters(chunk)
+            hebrew_letters += chunk_hebrew
+            latin_letters += chunk_latin
+
+            if self.early_exit_letters is not None and hebrew_letters + latin_letters >= self.early_exit_letters:
+                language, confidence = self._decide(hebrew_letters, latin_letters)
+                if confidence >= self.early_exit_confidence:
+                    return language, confidence
+
+        return self._decide(hebrew_letters, latin_letters)
+
+    def count_letters(self, text: str) -> Tuple[int, int]:
+        """Count Hebrew and Latin letters, excluding our own OCR formatting tokens"""
+        data = text.encode("utf-8")
+
+        hebrew_letters = data.count(_HEBREW_LEAD_BYTE)
+        latin_letters = len(data.translate(None, _NON_LATIN_BYTES))
+        for token, token_letters in self._ignored_tokens:
+            latin_letters -= data.count(token) * token_letters
+
+        return hebrew_letters, latin_letters
+
+    def _iter_chunks(self, text: str):
+        """Yield chunks of roughly chunk_size characters, split after a newline so no token is cut"""
+        start = 0
+        length = len(text)
+        while start < length:
+            end = start + self.chunk_size
+            if end >= length:
+                yield text[start:]
+                return
+
+            newline = text.find("\n", end)
+            end = length if newline == -1 else newline + 1
+            yield text[start:end]
+            start = end
+
+    def _decide(self, hebrew_letters: int, latin_letters: int) -> Tuple[str, float]:
+        total_letters = hebrew_letters + latin_letters
+        if total_letters == 0:
+            # Default to English if unclear
+            return "en", 0.0
+
+        threshold = self.english_ratio_threshold
+        latin_ratio = latin_letters / total_letters
+        language = "en" if latin_ratio >= threshold else "he"
+
+        # Confidence grows with the distance from the threshold and saturates one threshold-width away
+        confidence = min(1.0, abs(latin_ratio - threshold) / threshold)
+
+        # Very short texts can't support a confident decision
+        if total_letters < self.min_letters:
+            confidence *= total_letters / self.min_letters
+
+        return language, confidence
@@ -0,0 +1,87 @@
+import os
+import logging
+import threading
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("requests", "prompt_tokens", "cached_tokens", "completion_tokens", "cache_hit_requests", "latency_seconds")
+TIER_COUNTERS = ("attempts", "accepted", "escalated", "failed", "score_total", "seconds")
+
+class LLMUsageStats:
+    """Per-deployment token usage, prompt cache hits and latency, and per-tier cascade outcomes, of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deployments: Dict[str, Dict[str, float]] = {}
+        self._tiers: Dict[str, Dict[str, float]] = {}
+
+    def record(self, deployment: str, usage: Any, latency_seconds: float = 0.0) -> None:
+        """Add one completion's usage (the `usage` object of a chat completion response)"""
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", 0) or 0
+
+        self.add(deployment, {
+            "requests": 1,
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "completion_tokens": completion_tokens,
+            "cache_hit_requests": 1 if cached_tokens else 0,
+            "latency_seconds": latency_seconds
+        })
+
+    def record_tier(self, tier: str, outcome: str, score: float, seconds: float) -> None:
+        """Add one cascade attempt; outcome is accepted, escalated or failed"""
+        self.add_tier(tier, {"attempts": 1, outcome: 1, "score_total": score, "seconds": seconds})
+
+    def add(self, deployment: str, counters: Dict[str, float]) -> None:
+        self._add(self._deployments, deployment, counters, COUNTERS)
+
+    def add_tier(self, tier: str, counters: Dict[str, float]) -> None:
+        self._add(self._tiers, tier, counters, TIER_COUNTERS)
+
+    def merge(self, snapshot: Optional[Dict[str, Dict[str, Dict[str, float]]]]) -> None:
+        """Add the counters drained from another process, e.g. a job worker"""
+        snapshot = snapshot or {}
+        for deployment, counters in snapshot.get("deployments", {}).items():
+            self.add(deployment, counters)
+        for tier, counters in snapshot.get("tiers", {}).items():
+            self.add_tier(tier, counters)
+
+    def drain(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Return the raw counters and reset them"""
+        with self._lock:
+            snapshot = {"deployments": self._deployments, "tiers": self._tiers}
+            self._deployments, self._tiers = {}, {}
+        return snapshot
+
+    def report(self) -> Dict[str, Any]:
+        """Counters with cache hit ratio (cached / prompt tokens) and mean latency per deployment,
+        and acceptance rate, mean confidence and mean duration per cascade tier"""
+        with self._lock:
+            deployments = {name: dict(counters) for name, counters in self._deployments.items()}
+            tiers = {name: dict(counters) for name, counters in self._tiers.items()}
+
+        for counters in deployments.values():
+            counters["cache_hit_ratio"] = counters["cached_tokens"] / counters["prompt_tokens"] if counters["prompt_tokens"] else 0.0
+            counters["mean_latency_seconds"] = counters["latency_seconds"] / counters["requests"] if counters["requests"] else 0.0
+        for counters in tiers.values():
+            attempts = counters["attempts"] or 1
+            counters["acceptance_rate"] = counters["accepted"] / attempts
+            counters["mean_score"] = counters.pop("score_total") / attempts
+            counters["mean_seconds"] = counters.pop("seconds") / attempts
+        return {"pid": os.getpid(), "deployments": deployments, "tiers": tiers}
+
+    def _add(self, target: Dict[str, Dict[str, float]], key: str, counters: Dict[str, float], names) -> None:
+        with self._lock:
+            totals = target.setdefault(key, dict.fromkeys(names, 0))
+            for name in names:
+                totals[name] += counters.get(name, 0)
+
+_usage_stats = LLMUsageStats()
+
+def get_usage_stats() -> LLMUsageStats:
+    """Process-wide usage statistics shared by every OpenAIService"""
+    return _usage_stats
@@ -0,0 +1,122 @@
+import re
+import random
+import hashlib
+import logging
+import threading
+from array import array
+from typing import Optional, Dict, List, Tuple, Set, Iterable
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+NUMBER_PATTERN = re.compile(r"\d{2,}")
+
+def normalize_tokens(text: str) -> List[str]:
+    """Lower-cased word tokens, so re-scans with different line breaks and spacing still match"""
+    return WORD_PATTERN.findall(text.lower())
+
+def numeric_tokens(text: str) -> Set[str]:
+    """Digit runs (ID numbers, dates, phone numbers) that tell apart two copies of the same form"""
+    return set(NUMBER_PATTERN.findall(text))
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class MinHasher:
+    """MinHash signatures of word shingles, whose agreement estimates Jaccard similarity"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 283):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+        # Universal hash functions h(x) = (a * x + b) mod p, fixed by the seed so signatures stay comparable
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+
+    def shingles(self, text: str) -> Set[int]:
+        tokens = normalize_tokens(text)
+        size = min(self.shingle_size, len(tokens)) or 1
+        return {
+            int.from_bytes(hashlib.blake2b(" ".join(tokens[i:i + size]).encode("utf-8"), digest_size=4).digest(), "little")
+            for i in range(max(len(tokens) - size + 1, 0))
+        }
+
+    def signature(self, text: str) -> array:
+        shingles = self.shingles(text)
+        if not shingles:
+            return array("I", [MAX_HASH] * self.num_perm)
+        return array("I", [
+            min((a * shingle + b) % MERSENNE_PRIME for shingle in shingles) & MAX_HASH
+            for a, b in self._permutations
+        ])
+
+    @staticmethod
+    def similarity(first: array, second: array) -> float:
+        if len(first) != len(second) or not first:
+            return 0.0
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+class NearDuplicateIndex:
+    """In-memory LSH index over MinHash signatures of processed documents.
+
+    A signature is split into bands and each band is hashed to a bucket, so only
+    documents sharing at least one bucket are compared. Candidates must then reach
+    the similarity threshold on the full signature and on their numeric tokens, since
+    two different claimants' forms share most of the template text.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, threshold: float = 0.9):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[str, array] = {}
+        self._numbers: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, document_hash: str) -> bool:
+        return document_hash in self._signatures
+
+    def add(self, document_hash: str, signature: array, numbers: Iterable[str]) -> None:
+        if len(signature) != self.num_perm:
+            logger.warning(f"Ignoring signature of {document_hash[:12]} with {len(signature)} permutations")
+            return
+        with self._lock:
+            self._signatures[document_hash] = signature
+            self._numbers[document_hash] = set(numbers)
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, set()).add(document_hash)
+
+    def query(self, signature: array, numbers: Iterable[str]) -> Optional[Tuple[str, float]]:
+        """Most similar indexed document as (document hash, similarity), if above the threshold"""
+        numbers = set(numbers)
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            best = None
+            for document_hash in candidates:
+                similarity = MinHasher.similarity(signature, self._signatures[document_hash])
+                if similarity < self.threshold or jaccard(numbers, self._numbers[document_hash]) < self.threshold:
+                    continue
+                if best is None or similarity > best[1]:
+                    best = (document_hash, similarity)
+        return best
+
+    def _band_keys(self, signature: array) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
@@ -0,0 +1,198 @@
+import os
+import bisect
+import logging
+import tempfile
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, NamedTuple, Tuple
+from utils.form_record import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+BoundingBox = Tuple[float, float, float, float]  # (left, top, right, bottom) in page units
+
+class OcrPage(NamedTuple):
+    page_number: int
+    width: float
+    height: float
+    unit: str
+
+class OcrLine(NamedTuple):
+    page_number: int
+    content: str
+    bbox: BoundingBox
+    confidence: Optional[float]
+
+class OcrKeyValue(NamedTuple):
+    key: str
+    value: str
+    confidence: Optional[float]
+    page_number: int
+    key_bbox: Optional[BoundingBox]
+    value_bbox: Optional[BoundingBox]
+
+class OcrSelectionMark(NamedTuple):
+    page_number: int
+    selected: bool
+    bbox: BoundingBox
+    confidence: Optional[float]
+
+def polygon_to_bbox(polygon) -> Optional[BoundingBox]:
+    """Axis-aligned box around a flat [x1, y1, x2, y2, ...] polygon"""
+    if not polygon:
+        return None
+    xs, ys = polygon[0::2], polygon[1::2]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def _region_bbox(element) -> Tuple[int, Optional[BoundingBox]]:
+    regions = getattr(element, "bounding_regions", None) or []
+    if not regions:
+        return 0, None
+    return regions[0].page_number, polygon_to_bbox(regions[0].polygon)
+
+@dataclass
+class OcrDocument:
+    """Compact OCR output: the parts of an AnalyzeResult that later stages use.
+
+    Built right after OCR so the SDK result (words, spans, polygons, styles,
+    paragraphs, tables) can be released. It is also the unit stored in the OCR cache.
+    """
+    pages: List[OcrPage] = field(default_factory=list)
+    lines: List[OcrLine] = field(default_factory=list)
+    key_values: List[OcrKeyValue] = field(default_factory=list)
+    selection_marks: List[OcrSelectionMark] = field(default_factory=list)
+    mean_confidence: Optional[float] = None
+
+    @classmethod
+    def from_analyze_result(cls, result) -> "OcrDocument":
+        document = cls()
+        all_confidences = []
+
+        for page in result.pages or []:
+            document.pages.append(OcrPage(page.page_number, page.width or 0.0, page.height or 0.0, page.unit or ""))
+
+            # Line confidence is the mean of the words inside the line's span
+            words = sorted(
+                (word.span.offset, word.confidence) for word in (page.words or []) if word.span is not None
+            )
+            word_offsets = [offset for offset, _ in words]
+            all_confidences.extend(confidence for _, confidence in words if confidence is not None)
+
+            for line in page.lines or []:
+                confidences = []
+                for span in line.spans or []:
+                    start = bisect.bisect_left(word_offsets, span.offset)
+                    end = bisect.bisect_left(word_offsets, span.offset + span.length)
+                    confidences.extend(confidence for _, confidence in words[start:end] if confidence is not None)
+                document.lines.append(OcrLine(
+                    page.page_number,
+                    line.content.strip(),
+                    polygon_to_bbox(line.polygon) or (0.0, 0.0, 0.0, 0.0),
+                    sum(confidences) / len(confidences) if confidences else None
+                ))
+
+            for mark in page.selection_marks or []:
+                document.selection_marks.append(OcrSelectionMark(
+                    page.page_number,
+                    mark.state == "selected",
+                    polygon_to_bbox(mark.polygon) or (0.0, 0.0, 0.0, 0.0),
+                    mark.confidence
+                ))
+
+        for kv in getattr(result, "key_value_pairs", None) or []:
+            if not kv.key:
+                continue
+            page_number, key_bbox = _region_bbox(kv.key)
+            value_bbox = _region_bbox(kv.value)[1] if kv.value else None
+            document.key_values.append(OcrKeyValue(
+                kv.key.content.strip(),
+                kv.value.content.strip() if kv.value else "",
+                kv.confidence,
+                page_number,
+                key_bbox,
+                value_bbox
+            ))
+
+        document.mean_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else None
+        return document
+
+    def page_lines(self, page_number: int) -> List[OcrLine]:
+        return [line for line in self.lines if line.page_number == page_number]
+
+    def to_text(self) -> Optional[str]:
+        """Key-value pairs and first-page raw lines, in the text format the extraction prompt expects"""
+        if not self.pages:
+            return None
+
+        key_value_lines = ["--- Key-Value Pairs: ---"]
+        if self.key_values:
+            key_value_lines.extend(f"{kv.key}: {kv.value}" for kv in self.key_values)
+        else:
+            key_value_lines.append("No key-value pairs detected.")
+
+        raw_lines = ["--- Raw Lines: ---"]
+        first_page_lines = self.page_lines(self.pages[0].page_number)
+        if first_page_lines:
+            raw_lines.extend(line.content for line in first_page_lines)
+        else:
+            raw_lines.append("No lines detected.")
+
+        return ("\n".join(key_value_lines) + "\n\n" + "\n".join(raw_lines)).strip()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pages": [list(page) for page in self.pages],
+            "lines": [list(line) for line in self.lines],
+            "key_values": [list(kv) for kv in self.key_values],
+            "selection_marks": [list(mark) for mark in self.selection_marks],
+            "mean_confidence": self.mean_confidence
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OcrDocument":
+        def box(value):
+            return tuple(value) if value is not None else None
+
+        return cls(
+            pages=[OcrPage(*page) for page in data.get("pages", [])],
+            lines=[OcrLine(page, content, box(bbox), confidence) for page, content, bbox, confidence in data.get("lines", [])],
+            key_values=[
+                OcrKeyValue(key, value, confidence, page, box(key_bbox), box(value_bbox))
+                for key, value, confidence, page, key_bbox, value_bbox in data.get("key_values", [])
+            ],
+            selection_marks=[
+                OcrSelectionMark(page, selected, box(bbox), confidence)
+                for page, selected, bbox, confidence in data.get("selection_marks", [])
+            ],
+            mean_confidence=data.get("mean_confidence")
+        )
+
+class OcrCache:
+    """OCR documents on disk, one JSON file per document hash"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, document_hash: str) -> Optional[OcrDocument]:
+        path = self.directory / f"{document_hash}.json"
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                return OcrDocument.from_dict(loads(f.read()))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable OCR cache entry {path.name}: {str(e)}")
+            return None
+
+    def put(self, document_hash: str, document: OcrDocument) -> None:
+        # Write to a temp file and rename, so concurrent workers never read a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dumps(document.to_dict()))
+            os.replace(temp_path, self.directory / f"{document_hash}.json")
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
@@ -0,0 +1,41 @@
+import threading
+import importlib.util
+from typing import Optional
+
+# PDFium is not thread-safe; held around every use of it in this process (reentrant, so callers may hold it too)
+PDF_LOCK = threading.RLock()
+
+def find_pdf_backend() -> Optional[str]:
+    """Name of the installed PDF rasterizer, pypdfium2 preferred; None when neither is installed.
+
+    Only looks the packages up; they are imported when the first page is rendered.
+    """
+    if importlib.util.find_spec("pypdfium2") is not None:
+        return "pypdfium2"
+    if importlib.util.find_spec("fitz") is not None:
+        return "pymupdf"
+    return None
+
+def count_pdf_pages(source, backend: Optional[str] = None) -> int:
+    """Page count from a real PDF parser; source is the document's bytes or a seekable binary file.
+
+    Unlike a scan of the raw bytes, this also reads page trees inside compressed object
+    streams. Raises RuntimeError when no parser is installed.
+    """
+    backend = backend or find_pdf_backend()
+    if backend == "pypdfium2":
+        import pypdfium2 as pdfium
+
+        with PDF_LOCK:
+            pdf = pdfium.PdfDocument(source)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    if backend == "pymupdf":
+        import fitz
+
+        data = source if isinstance(source, (bytes, bytearray, memoryview)) else source.read()
+        with fitz.open(stream=data, filetype="pdf") as pdf:
+            return pdf.page_count
+    raise RuntimeError("No PDF parser is installed (pypdfium2 or PyMuPDF)")
@@ -0,0 +1,166 @@
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Callable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Step:
+    """One pipeline stage.
+
+    run receives the declared inputs as keyword arguments and returns a dict with exactly
+    the declared outputs, or a ShortCircuit to end the run early (e.g. on a cache hit).
+    after lists steps that must finish first without passing data (e.g. validate before OCR).
+    """
+    name: str
+    run: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    after: Tuple[str, ...] = ()
+    stage: Optional[str] = None  # Reported to the progress callback when the step starts
+
+@dataclass
+class ShortCircuit:
+    """Returned by a step to stop the run; value is handed back to the caller as is"""
+    value: Any
+
+@dataclass
+class PipelineRun:
+    values: Dict[str, Any]
+    timings: Dict[str, float] = field(default_factory=dict)
+    short_circuit: Optional[ShortCircuit] = None
+    stopped_at: str = ""    # Name of the step that short-circuited
+
+class Pipeline:
+    """A DAG of steps, checked once when built.
+
+    Every input must be an initial input or the output of exactly one step, and every
+    step named in after must exist; the dependency graph must be acyclic.
+    """
+
+    def __init__(self, steps: List[Step], initial_inputs: Tuple[str, ...] = ()):
+        self.steps = {step.name: step for step in steps}
+        if len(self.steps) != len(steps):
+            raise ValueError("Pipeline step names must be unique")
+        self.initial_inputs = tuple(initial_inputs)
+
+        producers = {name: None for name in self.initial_inputs}
+        for step in steps:
+            for output in step.outputs:
+                if output in producers:
+                    raise ValueError(f"Pipeline value {output!r} is produced twice")
+                producers[output] = step.name
+
+        self.dependencies: Dict[str, Set[str]] = {}
+        for step in steps:
+            missing = [name for name in step.inputs if name not in producers]
+            if missing:
+                raise ValueError(f"Step {step.name!r} needs {', '.join(missing)}, which nothing produces")
+            unknown = [name for name in step.after if name not in self.steps]
+            if unknown:
+                raise ValueError(f"Step {step.name!r} runs after unknown steps {', '.join(unknown)}")
+            self.dependencies[step.name] = {producers[name] for name in step.inputs if producers[name]} | set(step.after)
+
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order, done = [], set()
+        pending = list(self.steps)
+        while pending:
+            ready = [name for name in pending if self.dependencies[name] <= done]
+            if not ready:
+                raise ValueError(f"Pipeline steps {', '.join(pending)} have a dependency cycle")
+            order.extend(ready)
+            done.update(ready)
+            pending = [name for name in pending if name not in done]
+        return order
+
+class PipelineExecutor:
+    """Runs a pipeline, starting each step as soon as its dependencies are done.
+
+    Independent steps of one run execute concurrently on a thread pool of that run's own
+    (the stages mostly wait on network calls or release the GIL in hashing and I/O), so
+    documents processed at the same time never queue behind each other's steps. With
+    max_workers of 1 the steps run one by one in the calling thread. A ShortCircuit
+    result stops scheduling; steps already running finish but their outputs are
+    discarded. A failing step raises its exception after the other running steps finish.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+
+    def run(self, pipeline: Pipeline, inputs: Dict[str, Any],
+            progress_callback: Optional[Callable[[str], None]] = None) -> PipelineRun:
+        missing = [name for name in pipeline.initial_inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"Missing pipeline inputs: {', '.join(missing)}")
+
+        run = PipelineRun(values=dict(inputs))
+        report_stage = progress_callback or (lambda stage: None)
+        if self.max_workers <= 1:
+            for name in pipeline.order:
+                result = self._run_step(pipeline.steps[name], run.values, run.timings, report_stage)
+                if self._apply(pipeline.steps[name], result, run):
+                    break
+            return run
+
+        # Never more threads than steps; they are started only as steps are submitted
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pipeline.steps)), thread_name_prefix="pipeline") as pool:
+            self._run_concurrently(pipeline, run, report_stage, pool)
+        return run
+
+    def _run_concurrently(self, pipeline: Pipeline, run: PipelineRun,
+                          report_stage: Callable[[str], None], pool: ThreadPoolExecutor) -> None:
+        done: Set[str] = set()
+        started: Set[str] = set()
+        running: Dict[Future, str] = {}
+        error = None
+        while True:
+            if run.short_circuit is None and error is None:
+                for name in pipeline.order:
+                    if name not in started and pipeline.dependencies[name] <= done:
+                        started.add(name)
+                        future = pool.submit(self._run_step, pipeline.steps[name], dict(run.values), run.timings, report_stage)
+                        running[future] = name
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    result = future.result()
+                    if run.short_circuit is None and error is None:
+                        self._apply(pipeline.steps[name], result, run)
+                except Exception as e:
+                    error = error or e
+                    continue
+                done.add(name)
+
+        if error is not None:
+            raise error
+
+    @staticmethod
+    def _run_step(step: Step, values: Dict[str, Any], timings: Dict[str, float], report_stage: Callable[[str], None]):
+        if step.stage:
+            report_stage(step.stage)
+        start = time.perf_counter()
+        try:
+            return step.run(**{name: values[name] for name in step.inputs})
+        finally:
+            timings[step.name] = time.perf_counter() - start
+
+    @staticmethod
+    def _apply(step: Step, result: Any, run: PipelineRun) -> bool:
+        """Store a step's outputs; True when it short-circuited the run"""
+        if isinstance(result, ShortCircuit):
+            run.short_circuit = result
+            run.stopped_at = step.name
+            return True
+        result = result or {}
+        if set(result) != set(step.outputs):
+            raise ValueError(f"Step {step.name!r} returned {sorted(result)} instead of {sorted(step.outputs)}")
+        run.values.update(result)
+        return False
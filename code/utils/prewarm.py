@@ -0,0 +1,49 @@
+import time
+import logging
+import importlib
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# SDKs that the services import on first use rather than at module import
+HEAVY_MODULES = (
+    "openai",
+    "azure.ai.documentintelligence",
+    "azure.core.credentials",
+)
+
+def import_heavy_modules() -> Dict[str, float]:
+    """Import the lazily loaded SDKs, returning the seconds each one took"""
+    timings = {}
+    for module_name in HEAVY_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(module_name)
+        except ImportError as e:
+            logger.warning(f"Could not prewarm {module_name}: {str(e)}")
+        timings[module_name] = time.perf_counter() - start
+    return timings
+
+def prewarm(processing_service=None) -> Dict[str, float]:
+    """Pay the cold-start costs of a process before it takes work.
+
+    Imports the SDKs and builds the extraction prompts; with a DocumentProcessingService
+    it also creates that service's clients and loads its near-duplicate index. Meant for
+    worker initializers and server startup, so the first document is not the slow one.
+    """
+    start = time.perf_counter()
+    timings = import_heavy_modules()
+
+    from prompts.field_extraction_prompt import get_prefix_token_estimate
+
+    step_start = time.perf_counter()
+    for language in ("en", "he"):
+        get_prefix_token_estimate(language)
+    timings["prompts"] = time.perf_counter() - step_start
+
+    if processing_service is not None:
+        timings.update(processing_service.warm_up())
+
+    logger.info(f"Prewarmed in {time.perf_counter() - start:.2f}s: " +
+                ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    return timings
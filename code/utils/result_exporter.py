@@ -0,0 +1,208 @@
+import os
+import uuid
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable
+from utils.form_record import FormRecord, dumps
+from utils.form_schema import get_form_schema
+
+logger = logging.getLogger(__name__)
+
+METADATA_COLUMNS = ("file_name", "document_language", "ocr_confidence", "total_seconds", "timings", "exported_at")
+
+def build_export_row(extracted_data, detected_language: str, file_name: str = "",
+                     timings: Optional[Dict[str, float]] = None, ocr_confidence: Optional[float] = None,
+                     elapsed: Optional[float] = None) -> Dict[str, Any]:
+    """Flatten one extraction into a row with English field columns, whatever the document language.
+
+    Keys outside the schema are not exported, so every row has the same columns. total_seconds
+    is the measured wall-clock elapsed time; only results saved before it was recorded fall
+    back to the sum of their step timings, which ran one after another back then.
+    """
+    record = extracted_data if isinstance(extracted_data, FormRecord) else FormRecord.from_dict(extracted_data, detected_language)
+    timings = timings or {}
+
+    row = {
+        "file_name": file_name,
+        "document_language": detected_language,
+        "ocr_confidence": ocr_confidence,
+        "total_seconds": elapsed if elapsed is not None else (sum(timings.values()) if timings else None),
+        "timings": timings,
+        "exported_at": datetime.now(timezone.utc).isoformat()
+    }
+
+    # Positions are shared between languages, so the English paths label Hebrew records too
+    for dotted_path, value in zip(get_form_schema().dotted_paths["en"], record.values):
+        row[dotted_path] = None if value is None else str(value)
+
+    return row
+
+class JsonlResultWriter:
+    """Streams export rows to a JSON Lines file, one row per line.
+
+    Rows are written with a single os.write on an O_APPEND descriptor, which appends the
+    whole buffer at the end of the file at once: several processes (API workers, the
+    Streamlit server) can share one file without their lines interleaving. With the
+    default flush_every of 1 every row reaches the file as soon as it is written, so a
+    crash loses nothing; batch exports pass a larger value to write rows in groups.
+    """
+
+    def __init__(self, path: str, append: bool = True, flush_every: int = 1):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.flush_every = flush_every
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | (0 if append else os.O_TRUNC)
+        self._fd = os.open(path, flags, 0o644)
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending.append(dumps(row) + b"\n")
+            if len(self._pending) >= self.flush_every:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            data = b"".join(self._pending)
+            self._pending = []
+            # Short writes only happen when the disk is full; the rest is written after them
+            while data:
+                data = data[os.write(self._fd, data):]
+
+    def write_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.write(row)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                try:
+                    self._flush()
+                finally:
+                    os.close(self._fd)
+                    self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class ColumnarResultWriter:
+    """Writes export rows to Parquet or Arrow IPC files in row groups.
+
+    Each writer creates a new part file in the target directory, so repeated exports
+    append to the same dataset without rewriting earlier files.
+    """
+
+    FILE_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+    def __init__(self, directory: str, file_format: str = "parquet", row_group_size: int = 10000,
+                 compression: str = "zstd"):
+        if file_format not in self.FILE_EXTENSIONS:
+            raise ValueError(f"Unsupported columnar format: {file_format}")
+
+        import pyarrow as pa
+
+        self._pa = pa
+        self.file_format = file_format
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schema = self.build_arrow_schema()
+
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self.path = os.path.join(directory, f"part-{timestamp}-{uuid.uuid4().hex[:8]}{self.FILE_EXTENSIONS[file_format]}")
+
+        self._writer = None
+        self._buffer = []
+        self._lock = threading.Lock()
+        self.rows_written = 0
+
+    def build_arrow_schema(self):
+        pa = self._pa
+        fields = [
+            pa.field("file_name", pa.string()),
+            pa.field("document_language", pa.string()),
+            pa.field("ocr_confidence", pa.float64()),
+            pa.field("total_seconds", pa.float64()),
+            pa.field("timings", pa.map_(pa.string(), pa.float64())),
+            pa.field("exported_at", pa.string()),
+        ]
+        fields.extend(pa.field(path, pa.string()) for path in get_form_schema().dotted_paths["en"])
+        return pa.schema(fields)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.row_group_size:
+                self._flush_row_group()
+
+    def write_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.write(row)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._buffer:
+                self._flush_row_group()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                logger.info(f"Exported {self.rows_written} rows to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _flush_row_group(self):
+        pa = self._pa
+        rows = self._buffer
+        self._buffer = []
+
+        # Convert row-oriented dicts to columns once per row group
+        columns = []
+        for field in self.schema:
+            values = [row.get(field.name) for row in rows]
+            if field.name == "timings":
+                values = [list(value.items()) if value else None for value in values]
+            columns.append(pa.array(values, type=field.type))
+        table = pa.Table.from_arrays(columns, schema=self.schema)
+
+        if self._writer is None:
+            self._writer = self._open_writer()
+
+        if self.file_format == "parquet":
+            self._writer.write_table(table, row_group_size=len(rows))
+        else:
+            for batch in table.to_batches():
+                self._writer.write_batch(batch)
+        self.rows_written += len(rows)
+
+    def _open_writer(self):
+        if self.file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            return pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+
+        import pyarrow.ipc as ipc
+
+        options = ipc.IpcWriteOptions(compression=self.compression)
+        return ipc.new_file(self.path, self.schema, options=options)
+
+def rows_to_parquet_bytes(rows: Iterable[Dict[str, Any]]) -> bytes:
+    """Serialize export rows to an in-memory Parquet file, e.g. for a download button"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with ColumnarResultWriter(temp_dir, "parquet") as writer:
+            writer.write_many(rows)
+        if writer.rows_written == 0:
+            return b""
+        with open(writer.path, "rb") as f:
+            return f.read()
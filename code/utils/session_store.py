@@ -0,0 +1,235 @@
+import os
+import sys
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import dataclasses
+from pathlib import Path
+from typing import Optional, Dict, Any, List, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+BYTES_TYPES = (bytes, bytearray, memoryview)
+
+class SessionStats(NamedTuple):
+    session_id: str
+    entries: int
+    memory_bytes: int
+    disk_bytes: int
+    idle_seconds: float
+
+class _Entry:
+    __slots__ = ("value", "size", "path")
+
+    def __init__(self, value: Any, size: int, path: Optional[Path] = None):
+        self.value = value      # None once spilled to disk
+        self.size = size
+        self.path = path
+
+class _Session:
+    def __init__(self):
+        self.entries: Dict[str, _Entry] = {}
+        self.last_access = time.monotonic()
+
+def estimate_size(value: Any) -> int:
+    """Approximate bytes held by a value; exact for byte strings"""
+    if isinstance(value, BYTES_TYPES):
+        return memoryview(value).nbytes
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if dataclasses.is_dataclass(value):
+        return sys.getsizeof(value) + sum(estimate_size(getattr(value, field.name)) for field in dataclasses.fields(value))
+    # Records such as FormRecord keep their data in slots
+    slots = getattr(type(value), "__slots__", ())
+    if slots:
+        return sys.getsizeof(value) + sum(estimate_size(getattr(value, name, None)) for name in slots)
+    return sys.getsizeof(value)
+
+class SessionStore:
+    """Per-session values with size accounting, idle eviction and spilling of large blobs to disk.
+
+    Shared by all sessions of a server process. Byte strings of at least spill_threshold
+    bytes are written to disk right away, and when the values held in memory exceed
+    max_memory_bytes the largest blobs of the least recently used sessions are spilled
+    too. Sessions idle for longer than ttl_seconds are dropped with their files.
+    """
+
+    def __init__(self, spill_dir: str, ttl_seconds: float = 3600, max_memory_bytes: int = 512 * 1024 * 1024,
+                 spill_threshold: int = 5 * 1024 * 1024, sweep_interval: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_threshold = spill_threshold
+        self.sweep_interval = sweep_interval
+
+        Path(spill_dir).mkdir(parents=True, exist_ok=True)
+        self._remove_orphaned_spill_dirs(Path(spill_dir))
+        # One directory per store, so spill files of a crashed process are recognizable as orphans
+        self.spill_dir = Path(tempfile.mkdtemp(dir=spill_dir, prefix="store-"))
+
+        self._sessions: Dict[str, _Session] = {}
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._last_sweep = time.monotonic()
+        self._lock = threading.RLock()
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes
+
+    def put(self, session_id: str, key: str, value: Any) -> None:
+        size = estimate_size(value)
+        with self._lock:
+            session = self._touch(session_id)
+            self._remove(session_id, session, key)
+            entry = _Entry(value, size)
+            session.entries[key] = entry
+            self._memory_bytes += size
+            if isinstance(value, BYTES_TYPES) and size >= self.spill_threshold:
+                self._spill(session_id, key, entry)
+            self._maybe_sweep()
+
+    def get(self, session_id: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            entry = session.entries.get(key) if session is not None else None
+            if entry is None:
+                return default
+            session.last_access = time.monotonic()
+            self._maybe_sweep()
+            path = entry.path
+            if path is None:
+                return entry.value
+        try:
+            return path.read_bytes()
+        except OSError as e:
+            logger.error(f"Spilled session value {key} is unreadable: {str(e)}")
+            return default
+
+    def contains(self, session_id: str, key: str) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session is not None and key in session.entries
+
+    def pop(self, session_id: str, key: str) -> None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._remove(session_id, session, key)
+
+    def keys(self, session_id: str) -> List[str]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return list(session.entries) if session is not None else []
+
+    def drop_session(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return
+            for key in list(session.entries):
+                self._remove(session_id, session, key)
+        shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def stats(self) -> List[SessionStats]:
+        """Memory and disk use per session, largest first"""
+        now = time.monotonic()
+        with self._lock:
+            stats = [
+                SessionStats(
+                    session_id,
+                    len(session.entries),
+                    sum(entry.size for entry in session.entries.values() if entry.path is None),
+                    sum(entry.size for entry in session.entries.values() if entry.path is not None),
+                    now - session.last_access
+                )
+                for session_id, session in self._sessions.items()
+            ]
+        return sorted(stats, key=lambda stat: stat.memory_bytes + stat.disk_bytes, reverse=True)
+
+    def sweep(self) -> None:
+        """Drop idle sessions, then spill blobs until the memory budget is met"""
+        now = time.monotonic()
+        with self._lock:
+            self._last_sweep = now
+            # Keeps this store's directory from looking orphaned to other processes
+            os.utime(self.spill_dir)
+            idle = [session_id for session_id, session in self._sessions.items() if now - session.last_access > self.ttl_seconds]
+            for session_id in idle:
+                logger.info(f"Evicting idle session {session_id[:8]}")
+                self.drop_session(session_id)
+
+            if self._memory_bytes <= self.max_memory_bytes:
+                return
+            # Least recently used sessions first, largest blob first within a session
+            for session_id, session in sorted(self._sessions.items(), key=lambda item: item[1].last_access):
+                spillable = sorted(
+                    ((key, entry) for key, entry in session.entries.items()
+                     if entry.path is None and isinstance(entry.value, BYTES_TYPES)),
+                    key=lambda item: item[1].size, reverse=True
+                )
+                for key, entry in spillable:
+                    self._spill(session_id, key, entry)
+                    if self._memory_bytes <= self.max_memory_bytes:
+                        return
+            logger.warning(f"Session values hold {self._memory_bytes:,} bytes in memory, over the {self.max_memory_bytes:,} byte budget")
+
+    def _touch(self, session_id: str) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session()
+        session.last_access = time.monotonic()
+        return session
+
+    def _maybe_sweep(self) -> None:
+        if self._memory_bytes > self.max_memory_bytes or time.monotonic() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def _session_dir(self, session_id: str) -> Path:
+        return self.spill_dir / hashlib.sha1(session_id.encode("utf-8")).hexdigest()[:16]
+
+    def _spill(self, session_id: str, key: str, entry: _Entry) -> None:
+        path = self._session_dir(session_id) / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.bin"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(entry.value)
+        except OSError as e:
+            logger.error(f"Could not spill session value {key} to disk: {str(e)}")
+            return
+        entry.value, entry.path = None, path
+        self._memory_bytes -= entry.size
+        self._disk_bytes += entry.size
+
+    def _remove(self, session_id: str, session: _Session, key: str) -> None:
+        entry = session.entries.pop(key, None)
+        if entry is None:
+            return
+        if entry.path is None:
+            self._memory_bytes -= entry.size
+            return
+        self._disk_bytes -= entry.size
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
+
+    def _remove_orphaned_spill_dirs(self, spill_dir: Path) -> None:
+        """Spill directories of stores whose process exited without cleaning up"""
+        cutoff = time.time() - self.ttl_seconds
+        for directory in spill_dir.glob("store-*"):
+            try:
+                if directory.is_dir() and directory.stat().st_mtime < cutoff:
+                    shutil.rmtree(directory, ignore_errors=True)
+            except OSError:
+                continue
@@ -0,0 +1,35 @@
+import math
+from typing import Dict, Generic, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+Point = Tuple[float, float]
+
+class GridIndex(Generic[T]):
+    """Uniform grid over points on a page, for nearest-neighbour queries within a radius"""
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[Tuple[Point, T]]] = {}
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def insert(self, point: Point, item: T) -> None:
+        self._cells.setdefault(self._cell(*point), []).append((point, item))
+
+    def within(self, point: Point, radius: float) -> List[Tuple[float, T]]:
+        """(distance, item) pairs of every item within radius of point, nearest first"""
+        cx, cy = self._cell(*point)
+        reach = int(math.ceil(radius / self.cell_size))
+        found = []
+        for gx in range(cx - reach, cx + reach + 1):
+            for gy in range(cy - reach, cy + reach + 1):
+                for (x, y), item in self._cells.get((gx, gy), ()):
+                    distance = math.hypot(x - point[0], y - point[1])
+                    if distance <= radius:
+                        found.append((distance, item))
+        found.sort(key=lambda pair: pair[0])
+        return found
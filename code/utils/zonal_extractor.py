@@ -0,0 +1,249 @@
+import re
+import math
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+from utils.form_record import dumps, loads
+from utils.form_schema import FormSchema, get_form_schema
+from utils.ocr_document import BoundingBox, OcrDocument, OcrLine
+from utils.checkbox_resolver import CHECKBOX_FIELDS, MARKER, normalize_label
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_PATH = Path(__file__).parent.parent.parent / "templates" / "form_283_layout.json"
+
+Affine = Tuple[float, float, float, float, float, float]  # x' = a*x + b*y + c, y' = d*x + e*y + f
+
+# Fields that cannot be cut out of a zone: checkboxes are resolved from selection marks, the signature is an image
+EXCLUDED_FIELDS = set(CHECKBOX_FIELDS) | {"signature"}
+NUMERIC_FIELDS = {
+    "idNumber", "landlinePhone", "mobilePhone", "address.houseNumber", "address.entrance",
+    "address.apartment", "address.postalCode", "address.poBox"
+}
+NON_DIGIT_PATTERN = re.compile(r"\D")
+TIME_PATTERN = re.compile(r"(\d{1,2})\s*[:.]\s*(\d{2})")
+
+def _center(bbox: BoundingBox) -> Tuple[float, float]:
+    return (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+
+def _find_label_lines(lines: List[OcrLine], label: str) -> List[OcrLine]:
+    """Lines reading exactly the label first, then lines that contain it"""
+    exact, containing = [], []
+    for line in lines:
+        text = normalize_label(line.content).rstrip(":").strip()
+        if text == label:
+            exact.append(line)
+        elif label in text:
+            containing.append(line)
+    return exact or containing
+
+def _solve_3x3(matrix: List[List[float]], vector: List[float]) -> Optional[List[float]]:
+    """Gaussian elimination with partial pivoting; None when the system is singular"""
+    rows = [row[:] + [value] for row, value in zip(matrix, vector)]
+    for column in range(3):
+        pivot = max(range(column, 3), key=lambda row: abs(rows[row][column]))
+        if abs(rows[pivot][column]) < 1e-12:
+            return None
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        for row in range(3):
+            if row != column:
+                factor = rows[row][column] / rows[column][column]
+                rows[row] = [a - factor * b for a, b in zip(rows[row], rows[column])]
+    return [rows[i][3] / rows[i][i] for i in range(3)]
+
+def estimate_affine(pairs: List[Tuple[Tuple[float, float], Tuple[float, float]]]) -> Optional[Affine]:
+    """Least-squares affine transform mapping template points onto document points.
+
+    Falls back to a translation when there are fewer than three anchors or they are collinear.
+    """
+    if not pairs:
+        return None
+
+    if len(pairs) >= 3:
+        # Normal equations: (A^T A) p = A^T b with rows [x, y, 1], solved separately for x' and y'
+        ata = [[0.0] * 3 for _ in range(3)]
+        atx, aty = [0.0] * 3, [0.0] * 3
+        for (x, y), (u, v) in pairs:
+            row = (x, y, 1.0)
+            for i in range(3):
+                for j in range(3):
+                    ata[i][j] += row[i] * row[j]
+                atx[i] += row[i] * u
+                aty[i] += row[i] * v
+        x_params = _solve_3x3(ata, atx)
+        y_params = _solve_3x3(ata, aty)
+        if x_params is not None and y_params is not None:
+            return (*x_params, *y_params)
+
+    dx = sum(u - x for (x, _), (u, _) in pairs) / len(pairs)
+    dy = sum(v - y for (_, y), (_, v) in pairs) / len(pairs)
+    return (1.0, 0.0, dx, 0.0, 1.0, dy)
+
+def apply_affine(transform: Affine, point: Tuple[float, float]) -> Tuple[float, float]:
+    a, b, c, d, e, f = transform
+    x, y = point
+    return a * x + b * y + c, d * x + e * y + f
+
+def transform_box(transform: Affine, bbox: BoundingBox) -> BoundingBox:
+    corners = [apply_affine(transform, (x, y)) for x in (bbox[0], bbox[2]) for y in (bbox[1], bbox[3])]
+    xs, ys = [x for x, _ in corners], [y for _, y in corners]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def build_layout(document: OcrDocument, schema: Optional[FormSchema] = None, zone_height_ratio: float = 3.0) -> Dict[str, Any]:
+    """Layout template of the blank form: label box and value zone of every field found on page 1.
+
+    Zones default to the band below each label, zone_height_ratio label heights tall and a
+    quarter label width wider on each side; they can be adjusted by hand in the saved JSON.
+    """
+    schema = schema or get_form_schema()
+    page = document.pages[0]
+    lines = document.page_lines(page.page_number)
+
+    fields = {}
+    for english_path, hebrew_path in zip(schema.dotted_paths["en"], schema.key_paths["he"]):
+        if english_path in EXCLUDED_FIELDS:
+            continue
+
+        candidates = _find_label_lines(lines, hebrew_path[-1])
+        if len(hebrew_path) > 1 and candidates:
+            # Sub-fields such as day/month/year repeat, so take the one closest to the parent label
+            parents = _find_label_lines(lines, hebrew_path[0])
+            if parents:
+                parent_center = _center(parents[0].bbox)
+                candidates.sort(key=lambda line: math.dist(_center(line.bbox), parent_center))
+        if not candidates:
+            logger.warning(f"Label for {english_path} not found on the blank form")
+            continue
+
+        left, top, right, bottom = candidates[0].bbox
+        width, height = right - left, bottom - top
+        fields[english_path] = {
+            "label": hebrew_path[-1],
+            "label_bbox": [left, top, right, bottom],
+            "zone": [left - width / 4, bottom, right + width / 4, bottom + height * zone_height_ratio],
+            # Only labels that appear once on the page can anchor the alignment
+            "anchor": sum(1 for line in lines if normalize_label(line.content).rstrip(":").strip() == hebrew_path[-1]) == 1
+        }
+
+    return {"page_width": page.width, "page_height": page.height, "unit": page.unit, "fields": fields}
+
+def save_layout(layout: Dict[str, Any], path: Path = LAYOUT_PATH) -> None:
+    with open(path, "wb") as f:
+        f.write(dumps(layout, indent=True))
+
+def load_layout(path: Path = LAYOUT_PATH) -> Optional[Dict[str, Any]]:
+    if not Path(path).exists():
+        return None
+    try:
+        with open(path, "rb") as f:
+            return loads(f.read())
+    except Exception as e:
+        logger.error(f"Error loading form layout {path}: {str(e)}")
+        return None
+
+@dataclass
+class Alignment:
+    transform: Affine
+    anchors: int                # Anchor labels matched on the page
+    anchor_ratio: float         # Their share of the layout's anchor labels
+    residual_ratio: float       # Mean anchor deviation after the transform, as a share of the page width
+
+@dataclass
+class ZonalExtraction:
+    values: Dict[str, str]
+    alignment: Alignment
+    coverage: float             # Share of zones that yielded a value
+
+class ZonalExtractor:
+    """Assigns OCR lines to schema fields by position, after aligning the page to the blank form layout"""
+
+    def __init__(self, layout: Dict[str, Any], min_anchors: int = 3, max_residual_ratio: float = 0.02,
+                 min_coverage: float = 0.6):
+        self.layout = layout
+        self.fields = layout.get("fields", {})
+        self.min_anchors = min_anchors
+        # Share of zones that must yield a value; sparser results are left to the LLM
+        self.min_coverage = min_coverage
+        # Alignment is rejected when anchors deviate by more than this share of the page width on average
+        self.max_residual_ratio = max_residual_ratio
+        self.labels = {field["label"] for field in self.fields.values()}
+        self.anchor_count = sum(1 for field in self.fields.values() if field.get("anchor"))
+
+    def alignment_quality(self, alignment: Alignment) -> float:
+        """Between 0 and 1 from how many anchors were found and how closely the transform fits them.
+
+        Independent of the extracted values, which are cut from the OCR lines and so always
+        agree with the OCR text.
+        """
+        fit = max(0.0, 1.0 - alignment.residual_ratio / self.max_residual_ratio) if self.max_residual_ratio else 1.0
+        return 0.5 * alignment.anchor_ratio + 0.5 * fit
+
+    def align(self, document: OcrDocument) -> Optional[Alignment]:
+        """Affine transform from blank form to document coordinates, from the anchor labels found on page 1"""
+        if not document.pages:
+            return None
+        lines = document.page_lines(document.pages[0].page_number)
+
+        pairs = []
+        for field in self.fields.values():
+            if not field.get("anchor"):
+                continue
+            matches = _find_label_lines(lines, field["label"])
+            if len(matches) == 1:
+                pairs.append((_center(tuple(field["label_bbox"])), _center(matches[0].bbox)))
+
+        if len(pairs) < self.min_anchors:
+            logger.info(f"Only {len(pairs)} anchor labels found, skipping zonal extraction")
+            return None
+
+        transform = estimate_affine(pairs)
+        residual = sum(math.dist(apply_affine(transform, source), target) for source, target in pairs) / len(pairs)
+        page_width = document.pages[0].width or self.layout.get("page_width") or 1.0
+        if residual > page_width * self.max_residual_ratio:
+            logger.info(f"Form alignment residual {residual:.3f} is too large, skipping zonal extraction")
+            return None
+        return Alignment(transform, len(pairs), len(pairs) / max(self.anchor_count, 1), residual / page_width)
+
+    def extract(self, document: OcrDocument) -> Optional[ZonalExtraction]:
+        """Values by English dotted path, or None when the document cannot be aligned to the layout"""
+        alignment = self.align(document)
+        if alignment is None:
+            return None
+        transform = alignment.transform
+
+        lines = [
+            line for line in document.page_lines(document.pages[0].page_number)
+            if normalize_label(line.content).rstrip(":").strip() not in self.labels
+        ]
+
+        values = {}
+        for english_path, field in self.fields.items():
+            zone = transform_box(transform, tuple(field["zone"]))
+            inside = [line for line in lines if self._contains(zone, _center(line.bbox))]
+            # Reading order: top to bottom, then right to left
+            inside.sort(key=lambda line: (round(line.bbox[1], 2), -line.bbox[2]))
+            values[english_path] = self.normalize_value(english_path, " ".join(normalize_label(line.content) for line in inside))
+
+        coverage = sum(1 for value in values.values() if value) / len(values) if values else 0.0
+        if coverage < self.min_coverage:
+            logger.info(f"Zonal extraction filled only {coverage:.0%} of the fields")
+            return None
+        return ZonalExtraction(values, alignment, coverage)
+
+    @staticmethod
+    def normalize_value(english_path: str, text: str) -> str:
+        text = " ".join(text.replace(MARKER, " ").split())
+        if english_path in NUMERIC_FIELDS or english_path.endswith((".day", ".month", ".year")):
+            digits = NON_DIGIT_PATTERN.sub("", text)
+            if english_path.endswith((".day", ".month")) and digits:
+                return digits[-2:].zfill(2)
+            return digits
+        if english_path == "timeOfInjury":
+            match = TIME_PATTERN.search(text)
+            return f"{int(match.group(1)):02d}:{match.group(2)}" if match else ""
+        return text
+
+    @staticmethod
+    def _contains(zone: BoundingBox, point: Tuple[float, float]) -> bool:
+        return zone[0] <= point[0] <= zone[2] and zone[1] <= point[1] <= zone[3]
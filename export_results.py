@@ -0,0 +1,69 @@
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "code"))
+
+from utils.form_record import loads
+from utils.form_schema import get_form_schema
+from utils.result_exporter import build_export_row, ColumnarResultWriter, JsonlResultWriter
+
+logger = logging.getLogger(__name__)
+
+def iter_input_files(paths):
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.suffix in (".json", ".jsonl"))
+        else:
+            yield path
+
+def iter_rows(paths):
+    """Yield export rows one at a time, so large archives are never loaded at once"""
+    schema = get_form_schema()
+    for path in iter_input_files(paths):
+        try:
+            if path.suffix == ".jsonl":
+                # Batch results: one {"file_name", "detected_language", "extracted_data", ...} object per line
+                with open(path, "rb") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        item = loads(line)
+                        yield build_export_row(
+                            item["extracted_data"],
+                            item.get("detected_language") or schema.detect_language(item["extracted_data"]),
+                            item.get("file_name", path.name),
+                            item.get("timings"),
+                            item.get("ocr_confidence"),
+                            item.get("elapsed")
+                        )
+            else:
+                # A single extracted form, as saved by save_extracted_data or the download button
+                with open(path, "rb") as f:
+                    data = loads(f.read())
+                yield build_export_row(data, schema.detect_language(data), path.name)
+        except Exception as e:
+            logger.error(f"Skipping {path}: {str(e)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export extraction results to Parquet, Arrow or JSONL")
+    parser.add_argument("inputs", nargs="+", help="Extracted JSON files, batch JSONL files or directories of them")
+    parser.add_argument("--output", required=True, help="Dataset directory (parquet/arrow) or file (jsonl)")
+    parser.add_argument("--format", choices=["parquet", "arrow", "jsonl"], default="parquet")
+    parser.add_argument("--row-group-size", type=int, default=10000)
+    parser.add_argument("--overwrite", action="store_true", help="Replace the JSONL file instead of appending")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.format == "jsonl":
+        writer = JsonlResultWriter(args.output, append=not args.overwrite, flush_every=1000)
+    else:
+        writer = ColumnarResultWriter(args.output, args.format, args.row_group_size)
+
+    with writer:
+        writer.write_many(iter_rows(args.inputs))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The application modules import each other from the code directory, as app.py sets up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "code"))
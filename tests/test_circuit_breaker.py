@@ -0,0 +1,142 @@
+import pickle
+import types
+
+import pytest
+
+from utils import circuit_breaker
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, is_dependency_failure
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the breaker's monotonic clock with one the test advances by hand"""
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(circuit_breaker, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("ocr", failure_threshold=3, reset_timeout=30.0)
+
+
+def _fail(error=None):
+    raise error or TimeoutError("read timed out")
+
+
+def _trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(TimeoutError):
+            breaker.call(_fail)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(breaker.failure_threshold - 1):
+        with pytest.raises(TimeoutError):
+            breaker.call(_fail)
+    assert breaker.state == CLOSED
+
+    with pytest.raises(TimeoutError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.call(calls.append, "not made")
+    assert calls == []
+    assert error.value.dependency == "ocr"
+    assert error.value.retry_after == pytest.approx(30.0)
+
+
+def test_success_resets_failure_count(breaker):
+    for _ in range(breaker.failure_threshold - 1):
+        with pytest.raises(TimeoutError):
+            breaker.call(_fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(TimeoutError):
+        breaker.call(_fail)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_success_closes(breaker, clock):
+    _trip(breaker)
+    clock.now += 29.0
+    assert breaker.state == OPEN
+    clock.now += 1.0
+    assert breaker.state == HALF_OPEN
+
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_failure_reopens(breaker, clock):
+    _trip(breaker)
+    clock.now += 30.0
+    with pytest.raises(TimeoutError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.check()
+    assert error.value.retry_after == pytest.approx(30.0)
+
+
+def test_half_open_allows_a_single_probe(breaker, clock):
+    _trip(breaker)
+    clock.now += 30.0
+
+    def probe():
+        # A second call while the probe is in flight is rejected
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: "second")
+        return "probe"
+
+    assert breaker.call(probe) == "probe"
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_rejected_requests_count_as_success(breaker):
+    for _ in range(breaker.failure_threshold * 2):
+        with pytest.raises(HTTPError):
+            breaker.call(_fail, HTTPError(400))
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["successes"] == breaker.failure_threshold * 2
+
+
+def test_snapshot_counters(breaker):
+    _trip(breaker)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: None)
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == OPEN
+    assert snapshot["calls"] == 3 and snapshot["failures"] == 3 and snapshot["rejected"] == 1
+    assert snapshot["opened"] == 1
+    assert snapshot["last_error"] == "TimeoutError: read timed out"
+
+
+@pytest.mark.parametrize("error, expected", [
+    (TimeoutError(), True),
+    (ConnectionResetError(), True),
+    (HTTPError(503), True),
+    (HTTPError(429), True),
+    (HTTPError(408), True),
+    (HTTPError(404), False),
+    (types.SimpleNamespace(response=types.SimpleNamespace(status_code=502)), True),
+    (FileNotFoundError(), False),
+    (ValueError(), False),
+], ids=["timeout", "connection", "5xx", "throttled", "request-timeout", "4xx", "response-status", "missing-file", "bug"])
+def test_is_dependency_failure(error, expected):
+    assert is_dependency_failure(error) is expected
+
+
+def test_circuit_open_error_survives_pickling():
+    error = pickle.loads(pickle.dumps(CircuitOpenError("azure_openai", 12.5)))
+    assert isinstance(error, CircuitOpenError)
+    assert error.dependency == "azure_openai"
+    assert error.retry_after == 12.5
+    assert str(error) == "azure_openai is unavailable, retry in 12s"
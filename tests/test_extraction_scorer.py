@@ -0,0 +1,89 @@
+import pytest
+
+from utils.extraction_scorer import ExtractionScorer
+from utils.form_record import FormRecord
+
+FULL_FIELDS = {
+    "lastName": "Cohen",
+    "firstName": "Dana",
+    "idNumber": "123456782",
+    "gender": "Female",
+    "dateOfBirth.day": "03", "dateOfBirth.month": "04", "dateOfBirth.year": "1985",
+    "address.street": "Herzl",
+    "address.houseNumber": "5",
+    "address.city": "Haifa",
+    "mobilePhone": "0501234567",
+    "landlinePhone": "048123456",
+    "jobType": "Teacher",
+    "dateOfInjury.day": "10", "dateOfInjury.month": "01", "dateOfInjury.year": "2024",
+    "timeOfInjury": "08:30",
+    "accidentDescription": "Slipped on the stairs",
+    "injuredBodyPart": "Left ankle",
+    "signature": "Dana Cohen",
+}
+OCR_TEXT = "Cohen Dana 123456782 Herzl 5 Haifa 050-1234567 04-8123456 Teacher"
+
+
+def make_record(fields):
+    record = FormRecord.empty("en")
+    for path, value in fields.items():
+        record.set_field(path, value)
+    return record
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return ExtractionScorer()
+
+
+@pytest.mark.parametrize("id_number, valid", [
+    ("123456782", True), ("123456789", False), ("18", True), ("1234567890", False), ("12a456782", False), ("", False)
+])
+def test_id_check_digit(id_number, valid):
+    assert ExtractionScorer.is_valid_id_number(id_number) is valid
+
+
+@pytest.mark.parametrize("parts, valid", [
+    (("29", "02", "2024"), True), (("29", "02", "2023"), False), (("1", "1", "85"), False), (("01", "01", "1850"), False)
+])
+def test_date_rules(parts, valid):
+    assert ExtractionScorer.is_valid_date(*parts) is valid
+
+
+def test_full_record_is_confident(scorer):
+    record = make_record(FULL_FIELDS)
+    assert scorer.rule_check_ratio(record) == 1.0
+    assert scorer.ocr_agreement(record, OCR_TEXT) == 1.0
+    assert scorer.confidence(record, "en", OCR_TEXT) > 0.85
+
+
+def test_empty_required_fields_fail_their_checks(scorer):
+    record = make_record({"firstName": "Dana", "timeOfInjury": "08:30"})
+    # Only the time passes; the empty ID, dates of birth and injury and mobile phone fail
+    assert scorer.rule_check_ratio(record) == pytest.approx(1 / 5)
+    # Of the copied fields only the first name is found; the empty required ones count as not found
+    assert scorer.ocr_agreement(record, OCR_TEXT) == pytest.approx(1 / 4)
+    assert scorer.confidence(record, "en", OCR_TEXT) < 0.5
+
+
+def test_values_missing_from_ocr_text(scorer):
+    record = make_record({**FULL_FIELDS, "lastName": "Levi", "idNumber": "000000018"})
+    assert scorer.ocr_agreement(record, OCR_TEXT) == pytest.approx(5 / 7)
+
+
+def test_invalid_values_lower_rule_ratio(scorer):
+    record = make_record({**FULL_FIELDS, "mobilePhone": "0401234567", "timeOfInjury": "25:00"})
+    # ID, dates of birth and injury, two phones and time; the other dates are empty and optional
+    assert scorer.rule_check_ratio(record) == pytest.approx(4 / 6)
+
+
+def test_no_confidence_without_data_or_text(scorer):
+    assert scorer.confidence({}, "en", OCR_TEXT) == 0.0
+    assert scorer.confidence(make_record(FULL_FIELDS), "fr", OCR_TEXT) == 0.0
+    assert scorer.ocr_agreement(make_record(FULL_FIELDS), "") == 0.0
+
+
+def test_score_prefers_the_fill_language_script(scorer):
+    record = make_record(FULL_FIELDS)
+    assert scorer.score(record, "en") > scorer.score(make_record({**FULL_FIELDS, "lastName": "כהן", "firstName": "דנה",
+                                                                "jobType": "מורה", "signature": "דנה כהן"}), "en")
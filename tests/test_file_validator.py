@@ -0,0 +1,143 @@
+import hashlib
+import io
+import struct
+import zlib
+from types import SimpleNamespace
+
+import pytest
+
+from utils.file_validator import FileValidator, RejectReason
+
+
+def make_png(width=80, height=60):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    rows = b"".join(b"\x00" + b"\xff\x00\x00" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def make_jpeg(width=120, height=80):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 17, 8, height, width, 3) + b"\x01\x11\x00\x02\x11\x01\x03\x11\x01"
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xd9"
+
+
+def make_pdf(pages=2, padding=0):
+    return (
+        b"%PDF-1.4\n"
+        + f"1 0 obj\n<< /Type /Pages /Kids [{' '.join(f'{i + 2} 0 R' for i in range(pages))}] /Count {pages} >>\nendobj\n".encode()
+        + b"%" + b"x" * padding + b"\n"
+        + b"trailer\n<< /Root 1 0 R >>\n%%EOF\n"
+    )
+
+
+@pytest.fixture
+def validator():
+    return FileValidator(SimpleNamespace(max_file_size=5 * 1024 * 1024, max_pdf_pages=10))
+
+
+def test_png_dimensions_from_header(validator):
+    check = validator.check_bytes(make_png(80, 60), "scan.png")
+    assert check.ok
+    assert check.content_type == "image/png"
+    assert (check.width, check.height) == (80, 60)
+
+
+def test_jpeg_dimensions_from_frame_header(validator):
+    check = validator.check_bytes(make_jpeg(120, 80), "scan.jpg")
+    assert check.ok
+    assert check.content_type == "image/jpeg"
+    assert (check.width, check.height) == (120, 80)
+
+
+def test_pdf_page_count_from_page_tree(validator):
+    check = validator.check_bytes(make_pdf(pages=3), "form.pdf")
+    assert check.ok
+    assert check.page_count == 3
+
+
+def test_pdf_page_tree_split_across_chunks(validator):
+    # Chunks follow the 1024-byte head; the page tree node starts 20 bytes before the first chunk ends
+    boundary = 1024 + 1024 * 1024
+    data = b"%PDF-1.4\n%" + b"x" * (boundary - 20 - 19) + b"\n" + make_pdf(pages=4)[9:]
+    assert data.index(b"<< /Type /Pages") == boundary - 20
+    check = validator.check_stream(io.BytesIO(data), "form.pdf")
+    assert check.ok
+    assert check.page_count == 4
+    assert check.size == len(data)
+
+
+def test_too_many_pages(validator):
+    check = validator.check_bytes(make_pdf(pages=11), "form.pdf")
+    assert check.reason == RejectReason.TOO_MANY_PAGES
+    assert check.page_count == 11
+
+
+def test_pdf_without_end_marker_is_corrupt(validator):
+    check = validator.check_bytes(make_pdf().replace(b"%%EOF", b""), "form.pdf")
+    assert check.reason == RejectReason.CORRUPT
+
+
+@pytest.mark.parametrize("data, file_name, reason", [
+    (make_png(), "scan.pdf", RejectReason.TYPE_MISMATCH),
+    (b"GIF89a" + b"\x00" * 100, "scan.png", RejectReason.UNKNOWN_FORMAT),
+    (b"", "scan.png", RejectReason.EMPTY),
+    (make_png(), "scan.gif", RejectReason.INVALID_EXTENSION),
+    (make_png(20, 20), "scan.png", RejectReason.IMAGE_TOO_SMALL),
+    (make_png(12000, 1)[:33], "scan.png", RejectReason.IMAGE_TOO_SMALL),
+], ids=["png_named_pdf", "gif", "empty", "gif_extension", "small_image", "thin_image"])
+def test_rejections(validator, data, file_name, reason):
+    assert validator.check_bytes(data, file_name).reason == reason
+
+
+def test_image_too_large(validator):
+    # Only the header is read, so a header claiming huge dimensions is enough
+    header = make_png(80, 60)[:33].replace(struct.pack(">II", 80, 60), struct.pack(">II", 12000, 100))
+    assert validator.check_bytes(header, "scan.png").reason == RejectReason.IMAGE_TOO_LARGE
+
+
+def test_too_large_by_declared_size(validator):
+    check = validator.check_stream(io.BytesIO(make_png()), "scan.png", size=6 * 1024 * 1024)
+    assert check.reason == RejectReason.TOO_LARGE
+
+
+def test_too_large_pdf_stops_reading(validator):
+    data = make_pdf(padding=6 * 1024 * 1024)
+    check = validator.check_stream(io.BytesIO(data), "form.pdf")
+    assert check.reason == RejectReason.TOO_LARGE
+
+
+@pytest.mark.parametrize("data, file_name", [
+    (make_png(), "scan.png"), (make_jpeg(), "scan.jpeg"), (make_pdf(), "form.pdf")
+], ids=["png", "jpeg", "pdf"])
+def test_hash_taken_in_the_validation_pass(validator, data, file_name):
+    check = validator.check_bytes(memoryview(data), file_name, compute_hash=True)
+    assert check.ok
+    assert check.sha256 == hashlib.sha256(data).hexdigest()
+    assert check.size == len(data)
+
+
+def test_no_hash_unless_asked(validator):
+    assert validator.check_bytes(make_png(), "scan.png").sha256 is None
+
+
+def test_check_file(validator, tmp_path):
+    path = tmp_path / "form.pdf"
+    path.write_bytes(make_pdf(pages=2))
+    check = validator.check_file(str(path), compute_hash=True)
+    assert check.ok and check.page_count == 2
+    assert check.sha256 == hashlib.sha256(path.read_bytes()).hexdigest()
+    assert validator.check_file(str(tmp_path / "missing.pdf")).reason == RejectReason.NOT_EXISTS
+
+
+def test_messages_are_localized(validator):
+    check = validator.check_bytes(make_pdf(pages=11), "form.pdf")
+    assert "11" in validator.get_message(check, "en")
+    assert validator.get_message(check, "he") != validator.get_message(check, "en")
+    assert validator.get_message(validator.check_bytes(make_png(), "scan.png")) == ""
@@ -0,0 +1,108 @@
+import copy
+import pickle
+
+import pytest
+
+from utils.form_record import FormRecord, as_dict, dumps, loads
+from utils.form_schema import get_form_schema
+
+ENGLISH = {
+    "lastName": "Cohen",
+    "firstName": "Dana",
+    "idNumber": "123456782",
+    "dateOfBirth": {"day": "01", "month": "02", "year": "1985"},
+    "address": {"street": "Herzl", "houseNumber": "5", "city": "Haifa"},
+    "mobilePhone": "0501234567",
+    "timeOfInjury": "",
+}
+
+
+@pytest.fixture
+def record():
+    return FormRecord.from_dict(copy.deepcopy(ENGLISH))
+
+
+def test_dict_round_trip(record):
+    assert record.language == "en"
+    assert record.to_dict() == ENGLISH
+    assert record.extras == []
+
+
+def test_absent_and_empty_fields_differ(record):
+    assert record["timeOfInjury"] == ""
+    assert record["landlinePhone"] is None
+    assert "landlinePhone" not in record.flatten()
+    assert record.flatten()["timeOfInjury"] == ""
+
+
+def test_unknown_keys_are_kept_as_extras():
+    data = dict(copy.deepcopy(ENGLISH), notes="scanned twice", address={"street": "Herzl", "floor": "3"})
+    record = FormRecord.from_dict(data)
+    assert record.extras == [(("address", "floor"), "3"), (("notes",), "scanned twice")]
+    assert record.to_dict() == data
+    assert record.flatten()["address.floor"] == "3"
+    assert "address.floor" in record.structure_keys() and "address" in record.structure_keys()
+
+
+def test_hebrew_keys_round_trip(record):
+    hebrew = record.to_dict("he")
+    last_name_key = get_form_schema().dotted_paths["he"][0]
+    assert hebrew[last_name_key] == "Cohen"
+
+    from_hebrew = FormRecord.from_dict(hebrew)
+    assert from_hebrew.language == "he"
+    assert from_hebrew.get_field("dateOfBirth.year") == "1985"
+    assert from_hebrew == record
+    assert from_hebrew.to_dict("en") == ENGLISH
+
+
+def test_field_access_by_english_path(record):
+    record.set_field("address.city", "Tel Aviv")
+    assert record["address.city"] == "Tel Aviv"
+    assert record.get_field("address.city") == "Tel Aviv"
+    with pytest.raises(KeyError):
+        record.get_field("address.country")
+    with pytest.raises(KeyError):
+        record["nickname"] = "D"
+
+
+def test_empty_record_has_every_field():
+    record = FormRecord.empty("he")
+    assert record.language == "he"
+    assert len(record.flatten()) == get_form_schema().field_count
+    assert set(record.flatten().values()) == {""}
+
+
+def test_to_json_is_invalidated_on_change(record):
+    assert loads(record.to_json()) == ENGLISH
+    record["firstName"] = "Noa"
+    assert loads(record.to_json())["firstName"] == "Noa"
+
+
+def test_json_round_trip(record):
+    assert FormRecord.from_json(dumps(record.to_dict())) == record
+    assert FormRecord.from_json(record.to_json()).to_dict() == ENGLISH
+
+
+def test_pickle_round_trip(record):
+    record.to_json()
+    restored = pickle.loads(pickle.dumps(record))
+    assert restored == record
+    assert restored.language == "en"
+    assert restored.to_json() == record.to_json()
+
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    data = dict(copy.deepcopy(ENGLISH), notes="scanned twice")
+    record = FormRecord.from_dict(data)
+    restored = FormRecord.from_msgpack(record.to_msgpack())
+    assert restored == record
+    assert restored.to_dict() == data
+
+
+def test_coerce_and_as_dict(record):
+    assert FormRecord.coerce(record) is record
+    assert FormRecord.coerce(copy.deepcopy(ENGLISH)) == record
+    assert as_dict(record) == ENGLISH
+    assert as_dict(ENGLISH) is ENGLISH
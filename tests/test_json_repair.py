@@ -0,0 +1,37 @@
+from utils.json_repair import repair_json
+
+
+def test_code_fence_and_surrounding_text():
+    text = 'Here is the result:\n```json\n{"firstName": "Dana", "idNumber": "123"}\n```\nDone.'
+    assert repair_json(text) == {"firstName": "Dana", "idNumber": "123"}
+
+
+def test_trailing_commas():
+    assert repair_json('{"a": [1, 2,], "b": {"c": 1,},}') == {"a": [1, 2], "b": {"c": 1}}
+
+
+def test_trailing_comma_inside_string_is_kept():
+    assert repair_json('{"a": "he said, }", "b": 1,}') == {"a": "he said, }", "b": 1}
+    assert repair_json('{"a": "x, ]", "b": "q\\", }"}') == {"a": "x, ]", "b": 'q", }'}
+
+
+def test_truncated_object_is_closed():
+    assert repair_json('{"firstName": "Dana", "address": {"city": "Haifa", "street": "Her') == {
+        "firstName": "Dana", "address": {"city": "Haifa"}
+    }
+
+
+def test_dangling_key_is_dropped():
+    assert repair_json('{"firstName": "Dana", "lastName":') == {"firstName": "Dana"}
+    assert repair_json('{"firstName": "Dana", "lastName"') == {"firstName": "Dana"}
+
+
+def test_truncated_array():
+    assert repair_json('{"a": "1", "b": ["x,", ') == {"a": "1", "b": ["x,"]}
+
+
+def test_unrecoverable():
+    assert repair_json(None) is None
+    assert repair_json("") is None
+    assert repair_json("no json here") is None
+    assert repair_json("[1, 2, 3]") is None
@@ -0,0 +1,58 @@
+import pytest
+
+from utils.language_detector import LanguageDetector
+
+HEBREW_FORM = "שם משפחה: כהן\nשם פרטי: דנה\nכתובת: רחוב הרצל 5 חיפה\n"
+ENGLISH_FILL = "שם משפחה: Cohen\nשם פרטי: Dana\nכתובת: Herzl Street 5 Haifa\n"
+
+
+@pytest.fixture
+def detector():
+    return LanguageDetector()
+
+
+def test_hebrew_fill(detector):
+    language, confidence = detector.detect(HEBREW_FORM * 5)
+    assert language == "he"
+    assert confidence == 1.0
+
+
+def test_english_fill_on_hebrew_form(detector):
+    language, confidence = detector.detect(ENGLISH_FILL * 5)
+    assert language == "en"
+    assert confidence > 0.9
+
+
+def test_no_letters_defaults_to_english(detector):
+    assert detector.detect("") == ("en", 0.0)
+    assert detector.detect("12/03/2024 050-1234567") == ("en", 0.0)
+
+
+def test_ocr_formatting_tokens_are_not_counted(detector):
+    text = "--- Key-Value Pairs: ---\n" + HEBREW_FORM * 5 + "--- Raw Lines: ---\n:selected: :unselected:\n"
+    assert detector.detect(text)[0] == "he"
+    assert detector.count_letters("--- Raw Lines: ---\n:selected:") == (0, 0)
+
+
+def test_short_text_lowers_confidence(detector):
+    _, short_confidence = detector.detect("כהן")
+    _, long_confidence = detector.detect(HEBREW_FORM * 5)
+    assert short_confidence < long_confidence
+
+
+def test_count_letters(detector):
+    assert detector.count_letters("abc אבג 123") == (3, 3)
+
+
+def test_chunked_detection_matches_whole_text():
+    text = (HEBREW_FORM + ENGLISH_FILL) * 200
+    whole = LanguageDetector(early_exit_letters=None).detect(text)
+    chunked = LanguageDetector(chunk_size=256, early_exit_letters=None).detect(text)
+    assert chunked == whole
+
+
+def test_early_exit_on_clear_decision():
+    detector = LanguageDetector(chunk_size=64, early_exit_letters=100)
+    # The ambiguous tail is never read once the Hebrew start is decisive
+    text = HEBREW_FORM * 20 + "Latin text " * 10000
+    assert detector.detect(text)[0] == "he"
@@ -0,0 +1,110 @@
+import pytest
+
+from utils.near_duplicate import MinHasher, NearDuplicateIndex, jaccard, numeric_tokens
+
+TEMPLATE = (
+    "National Insurance Institute request for medical treatment for a work injury. "
+    "Last name {last} first name {first} ID number {id_number} date of birth {birth} "
+    "address street Herzl house 5 city Haifa mobile {mobile} date of injury {injury} "
+    "description of the accident the claimant slipped on a wet floor at the workplace "
+    "and injured the left hand signature of the applicant"
+)
+CLAIMANT = dict(last="Cohen", first="Dana", id_number="123456782", birth="01 02 1985",
+                mobile="0501234567", injury="14 03 2024")
+OTHER_CLAIMANT = dict(last="Levi", first="Avi", id_number="987654324", birth="22 11 1979",
+                      mobile="0527654321", injury="02 05 2024")
+
+
+@pytest.fixture
+def hasher():
+    return MinHasher()
+
+
+def test_signature_is_deterministic_across_instances():
+    text = TEMPLATE.format(**CLAIMANT)
+    assert MinHasher().signature(text) == MinHasher().signature(text)
+    assert MinHasher(seed=1).signature(text) != MinHasher().signature(text)
+
+
+def test_rescan_with_different_spacing_is_identical(hasher):
+    text = TEMPLATE.format(**CLAIMANT)
+    rescan = text.upper().replace(" ", "\n  ")
+    assert hasher.similarity(hasher.signature(text), hasher.signature(rescan)) == 1.0
+
+
+def test_similarity_tracks_jaccard(hasher):
+    text = TEMPLATE.format(**CLAIMANT)
+    edited = text.replace("slipped on a wet floor", "fell down the stairs")
+    expected = jaccard(hasher.shingles(text), hasher.shingles(edited))
+    estimate = hasher.similarity(hasher.signature(text), hasher.signature(edited))
+    # 128 permutations put the estimate within a few standard errors of the true value
+    assert estimate == pytest.approx(expected, abs=0.15)
+    assert 0.0 < estimate < 1.0
+
+
+def test_empty_text_and_mismatched_signatures(hasher):
+    assert hasher.shingles("") == set()
+    assert len(hasher.signature("")) == hasher.num_perm
+    assert hasher.similarity(hasher.signature("a b c"), MinHasher(num_perm=64).signature("a b c")) == 0.0
+
+
+def test_numeric_tokens_skip_single_digits():
+    assert numeric_tokens("ID 123456782, house 5, born 01/02/1985") == {"123456782", "01", "02", "1985"}
+
+
+def test_jaccard_of_empty_sets():
+    assert jaccard(set(), set()) == 1.0
+    assert jaccard({"1"}, set()) == 0.0
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=128, bands=10)
+
+
+def _index_entry(hasher, text):
+    return hasher.signature(text), numeric_tokens(text)
+
+
+def test_query_finds_rescan(hasher):
+    index = NearDuplicateIndex()
+    text = TEMPLATE.format(**CLAIMANT)
+    index.add("original", *_index_entry(hasher, text))
+    assert len(index) == 1 and "original" in index
+
+    match = index.query(*_index_entry(hasher, text.replace(" ", "  ") + " page 1"))
+    assert match is not None
+    document_hash, similarity = match
+    assert document_hash == "original"
+    assert similarity >= index.threshold
+
+
+def test_query_rejects_other_claimant_on_same_template(hasher):
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add("original", *_index_entry(hasher, TEMPLATE.format(**CLAIMANT)))
+    # Even with a lenient threshold the differing ID, dates and phone keep them apart
+    assert index.query(*_index_entry(hasher, TEMPLATE.format(**OTHER_CLAIMANT))) is None
+
+
+def test_query_requires_numbers_to_agree(hasher):
+    index = NearDuplicateIndex()
+    text = TEMPLATE.format(**CLAIMANT)
+    signature, numbers = _index_entry(hasher, text)
+    index.add("original", signature, numbers)
+    assert index.query(signature, numbers) == ("original", 1.0)
+    assert index.query(signature, {"999999999"}) is None
+
+
+def test_query_returns_most_similar(hasher):
+    index = NearDuplicateIndex(threshold=0.5)
+    text = TEMPLATE.format(**CLAIMANT)
+    numbers = numeric_tokens(text)
+    index.add("edited", hasher.signature(text.replace("left hand", "right knee")), numbers)
+    index.add("exact", hasher.signature(text), numbers)
+    assert index.query(hasher.signature(text), numbers)[0] == "exact"
+
+
+def test_signature_of_wrong_size_is_ignored():
+    index = NearDuplicateIndex()
+    index.add("short", MinHasher(num_perm=64).signature("a b c"), set())
+    assert len(index) == 0
@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+from utils.pipeline import Pipeline, PipelineExecutor, ShortCircuit, Step
+
+
+def _diamond(calls, short_circuit_at=None):
+    """source -> (left, right) -> join, recording each step as it runs"""
+    def make(name, outputs, value):
+        def run(**kwargs):
+            calls.append(name)
+            if name == short_circuit_at:
+                return ShortCircuit(f"stopped at {name}")
+            return {output: value(**kwargs) for output in outputs}
+        return run
+
+    return Pipeline([
+        Step("join", make("join", ("total",), lambda left, right: left + right), inputs=("left", "right"), outputs=("total",)),
+        Step("left", make("left", ("left",), lambda base: base + 1), inputs=("base",), outputs=("left",), stage="left"),
+        Step("right", make("right", ("right",), lambda base: base * 10), inputs=("base",), outputs=("right",), stage="right"),
+        Step("source", make("source", ("base",), lambda start: start), inputs=("start",), outputs=("base",), stage="source"),
+    ], initial_inputs=("start",))
+
+
+@pytest.fixture(params=[1, 4], ids=["sequential", "concurrent"])
+def executor(request):
+    return PipelineExecutor(max_workers=request.param)
+
+
+def test_topological_order():
+    order = _diamond([]).order
+    assert order.index("source") < order.index("left") < order.index("join")
+    assert order.index("right") < order.index("join")
+
+
+def test_run_passes_values_between_steps(executor):
+    calls, stages = [], []
+    run = executor.run(_diamond(calls), {"start": 2}, stages.append)
+    assert run.values == {"start": 2, "base": 2, "left": 3, "right": 20, "total": 23}
+    assert run.short_circuit is None and run.stopped_at == ""
+    assert sorted(calls) == ["join", "left", "right", "source"]
+    assert calls[0] == "source" and calls[-1] == "join"
+    assert sorted(stages) == ["left", "right", "source"]
+    assert set(run.timings) == {"source", "left", "right", "join"}
+
+
+def test_short_circuit_stops_later_steps(executor):
+    calls = []
+    run = executor.run(_diamond(calls, short_circuit_at="source"), {"start": 2})
+    assert calls == ["source"]
+    assert run.short_circuit == ShortCircuit("stopped at source")
+    assert run.stopped_at == "source"
+    assert "base" not in run.values
+
+
+def test_missing_initial_input(executor):
+    with pytest.raises(ValueError, match="start"):
+        executor.run(_diamond([]), {})
+
+
+def test_step_error_is_raised(executor):
+    def fail(base):
+        raise RuntimeError("OCR unavailable")
+
+    pipeline = Pipeline([
+        Step("source", lambda start: {"base": start}, inputs=("start",), outputs=("base",)),
+        Step("ocr", fail, inputs=("base",), outputs=("text",)),
+        Step("extract", lambda text: {"fields": text}, inputs=("text",), outputs=("fields",)),
+    ], initial_inputs=("start",))
+    with pytest.raises(RuntimeError, match="OCR unavailable"):
+        executor.run(pipeline, {"start": 1})
+
+
+def test_wrong_outputs_are_rejected(executor):
+    pipeline = Pipeline([Step("source", lambda: {"other": 1}, outputs=("base",))])
+    with pytest.raises(ValueError, match="instead of"):
+        executor.run(pipeline, {})
+
+
+def test_independent_steps_run_concurrently():
+    # Each branch waits for the other to start, which only succeeds if they overlap
+    barrier = threading.Barrier(2, timeout=5)
+
+    def branch(output):
+        def run():
+            barrier.wait()
+            return {output: True}
+        return run
+
+    pipeline = Pipeline([Step("left", branch("left"), outputs=("left",)), Step("right", branch("right"), outputs=("right",))])
+    run = PipelineExecutor(max_workers=2).run(pipeline, {})
+    assert run.values == {"left": True, "right": True}
+
+
+def test_after_orders_steps_without_data():
+    calls = []
+    pipeline = Pipeline([
+        Step("ocr", lambda: calls.append("ocr") or {}, after=("validate",)),
+        Step("validate", lambda: calls.append("validate") or {}),
+    ])
+    assert pipeline.order == ["validate", "ocr"]
+    PipelineExecutor(max_workers=4).run(pipeline, {})
+    assert calls == ["validate", "ocr"]
+
+
+@pytest.mark.parametrize("steps, message", [
+    ([Step("a", dict), Step("a", dict)], "unique"),
+    ([Step("a", dict, outputs=("x",)), Step("b", dict, outputs=("x",))], "produced twice"),
+    ([Step("a", dict, inputs=("x",))], "nothing produces"),
+    ([Step("a", dict, after=("b",))], "unknown steps"),
+    ([Step("a", dict, inputs=("y",), outputs=("x",)), Step("b", dict, inputs=("x",), outputs=("y",))], "cycle"),
+], ids=["duplicate-name", "duplicate-output", "missing-input", "unknown-after", "cycle"])
+def test_invalid_pipelines(steps, message):
+    with pytest.raises(ValueError, match=message):
+        Pipeline(steps)
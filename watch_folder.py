@@ -0,0 +1,48 @@
+import sys
+import signal
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "code"))
+
+from jobs.watcher import FolderWatcher
+from services.document_processing_service import DocumentProcessingService
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+def main():
+    config = Config()
+    parser = argparse.ArgumentParser(description="Extract documents dropped into a folder, e.g. by network scanners")
+    parser.add_argument("--dir", default=config.watch_dir, help="Folder to watch (default: WATCH_DIR)")
+    parser.add_argument("--once", action="store_true", help="Process the files already in the folder and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    processing_service = DocumentProcessingService(config)
+    if not processing_service.is_configured():
+        logger.error("Azure Document Intelligence and Azure OpenAI must both be configured")
+        sys.exit(1)
+    if config.prewarm:
+        from utils.prewarm import prewarm
+
+        prewarm(processing_service)
+
+    watcher = FolderWatcher(
+        processing_service,
+        args.dir,
+        workers=config.watch_workers,
+        in_flight=config.watch_in_flight,
+        poll_interval=config.watch_poll_seconds,
+        settle_seconds=config.watch_settle_seconds,
+        checkpoint_path=config.watch_checkpoint_path
+    )
+    # Let files being extracted finish before exiting
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: watcher.stop())
+    watcher.run(once=args.once)
+
+if __name__ == "__main__":
+    main()